@@ -1,23 +1,104 @@
 import io
-from flask import Flask, render_template, request, jsonify, send_file
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 import openai
 from utils.data_fetcher import DataFetcher
 from utils.calculations import MetricsCalculator
+from utils.correlation import CorrelationEngine
 from utils.ai_helper import AIHelper
+from utils.backtest import Backtester
+from utils.chart_encoding import CHART_FORMATS
+from utils.live_quotes import FakeQuoteSource, LiveQuotePoller, SharedQuotes, SubscriberLimitError, YahooQuoteSource
+from utils.prefetch import PrefetchScheduler
+from utils.portfolio import PortfolioOptimizer
+from utils.rolling import ROLLING_METRICS
+from utils.columnar_store import ColumnarStore
+from utils.screener import SORT_KEYS, Screener
+from utils.shared_cache import SharedCache
+from utils.watchlists import WatchlistStore
+from utils.instrumentation import CONTENT_TYPE, REQUEST_SECONDS, record_cache, render as render_metrics, timed
 import json
+import logging
+import time
 from openai import OpenAI
 import os
 import pandas as pd
 import yfinance as yf
 from datetime import datetime
 
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger('app')
+
 app = Flask(__name__)
 
 # Initialize utilities
 data_fetcher = DataFetcher()
 openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY')) 
 ai_helper = AIHelper(data_fetcher)
+correlation_engine = CorrelationEngine()
+prefetcher = PrefetchScheduler(
+    data_fetcher,
+    interval=float(os.getenv('PREFETCH_INTERVAL_SECONDS', 3600)),
+    chunk_size=int(os.getenv('PREFETCH_CHUNK_SIZE', 20))
+)
+# One quote poller per process for every dashboard following live prices
+quote_source = (
+    FakeQuoteSource() if os.getenv('QUOTE_SOURCE') == 'fake'
+    else YahooQuoteSource(data_fetcher.http, data_fetcher.yahoo_base_url)
+)
+quote_interval = float(os.getenv('QUOTE_POLL_SECONDS', 5))
+# Under serve.py the workers read quotes from one file that a single worker publishes to
+shared_quotes = (
+    SharedQuotes(quote_source, os.environ['QUOTE_BOARD_PATH'], interval=quote_interval)
+    if os.getenv('QUOTE_BOARD_PATH') else None
+)
+live_quotes = LiveQuotePoller(
+    shared_quotes or quote_source,
+    interval=quote_interval,
+    max_subscribers=int(os.getenv('LIVE_MAX_SUBSCRIBERS', 100))
+)
+LIVE_MAX_TICKERS = 200
+# Streamed analyses download cold tickers in chunks of this size and send each chunk's metrics when it lands
+STREAM_CHUNK_SIZE = max(1, int(os.getenv('STREAM_CHUNK_SIZE', 5)))
+# Frames and metrics per (ticker, date range), shared by every worker process
+analysis_ttl = float(os.getenv('ANALYSIS_CACHE_TTL_SECONDS', 300))
+analysis_cache = SharedCache(ttl=analysis_ttl) if analysis_ttl > 0 else None
+# Metrics tables over the whole ticker universe, one per date range
+screener = Screener(
+    data_fetcher, prefetcher,
+    store=ColumnarStore(os.environ['SCREENER_STORE_PATH']) if os.getenv('SCREENER_STORE_PATH') else None,
+    ttl=float(os.getenv('SCREENER_TTL_SECONDS', 900))
+)
+SCREENER_MAX_PAGE_SIZE = 500
+# Saved watchlists and their memoized analyses
+watchlist_store = WatchlistStore()
+# Same limit as the dashboard, so a saved watchlist always opens in full
+WATCHLIST_MAX_TICKERS = 10
  
+@app.before_request
+def start_timer():
+    request.started_at = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started_at = getattr(request, 'started_at', None)
+    if started_at is not None:
+        # Route templates keep the label set small (/api/tickers/<sector>)
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started_at,
+            route=route, method=request.method, status=response.status_code
+        )
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint (per process)"""
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
 @app.route('/') # loads the website
 def index():
     """Render main page"""
@@ -52,16 +133,12 @@ def search_ticker():
     if not results and ai_helper.client:
         ai_ticker = ai_helper.smart_search(query)
         if ai_ticker:
-            try:
-                test = yf.download(ai_ticker,period='5d',progress=False)
-                if not test.empty:
-                    results = [{
-                        'ticker': ai_ticker,
-                        'name': ai_ticker,
-                        'sector': 'AI Suggested'
-                    }]
-            except:
-                pass
+            if data_fetcher.validate_ticker(ai_ticker):
+                results = [{
+                    'ticker': ai_ticker,
+                    'name': ai_ticker,
+                    'sector': 'AI Suggested'
+                }]
     
     return jsonify({'results': results})
 
@@ -71,6 +148,125 @@ def get_company_name(ticker):
     name = data_fetcher.get_company_name(ticker)
     return jsonify({'ticker': ticker, 'name': name})
 
+def resolve_date_range(period, custom_start=None, custom_end=None):
+    """Return (start, end) for a period, honouring custom dates"""
+    if period == 'custom' and custom_start and custom_end:
+        return custom_start, custom_end
+
+    start_date, end_date = data_fetcher.get_date_range(period)
+    logger.debug("Date range: %s → %s", start_date, end_date)
+    return start_date, end_date
+
+def iter_watchlist(tickers, period, start_date, end_date, chunk_size=None):
+    """
+    Get price frames and metrics for a watchlist in batches, each as soon as it is ready:
+    tickers warmed by the prefetch scheduler or the analysis cache (served from memory),
+    then with chunk_size set, those the price cache answers without a download, then
+    the downloads in chunks of chunk_size as each one finishes
+    Yields: (stock_data, metrics_list) per batch with metrics in ticker order
+    """
+    stock_data, warm_metrics = prefetcher.get(period, start_date, end_date, tickers)
+
+    cold = [t for t in tickers if t not in stock_data]
+    record_cache('prefetch', True, len(tickers) - len(cold))
+    record_cache('prefetch', False, len(cold))
+
+    keys = {t: f"watchlist:{t}:{start_date}:{end_date}" for t in cold}
+    if cold and analysis_cache:
+        shared = analysis_cache.get_many(keys.values())
+        for t in cold:
+            if keys[t] in shared:
+                stock_data[t], warm_metrics[t] = shared[keys[t]]
+        record_cache('analysis', True, len(shared))
+        cold = [t for t in cold if t not in stock_data]
+        record_cache('analysis', False, len(cold))
+
+    if stock_data:
+        yield stock_data, [warm_metrics[t] for t in tickers if t in warm_metrics]
+    if not cold:
+        return
+
+    def load(batch):
+        frames = data_fetcher.fetch_stock_data(batch, start_date, end_date)
+        metrics_list = MetricsCalculator(frames).calculate_all_metrics_batch(
+            [t for t in batch if t in frames]
+        )
+        if metrics_list and analysis_cache:
+            analysis_cache.set_many({
+                keys[m['ticker']]: (frames[m['ticker']], m) for m in metrics_list
+            })
+        return frames, metrics_list
+
+    if chunk_size is None:
+        yield load(cold)
+        return
+
+    downloads = data_fetcher.needs_download(cold, start_date, end_date)
+    batches = [[t for t in cold if t not in downloads]]
+    batches += [downloads[i:i + chunk_size] for i in range(0, len(downloads), chunk_size)]
+    batches = [batch for batch in batches if batch]
+
+    with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix='watchlist') as pool:
+        for future in as_completed([pool.submit(load, batch) for batch in batches]):
+            yield future.result()
+
+def load_watchlist(tickers, period, start_date, end_date):
+    """
+    Get price frames and metrics for a watchlist (see iter_watchlist)
+    Returns: (stock_data, metrics_list) with metrics in ticker order
+    """
+    stock_data, metrics = {}, {}
+    for frames, metrics_list in iter_watchlist(tickers, period, start_date, end_date):
+        stock_data.update(frames)
+        metrics.update((m['ticker'], m) for m in metrics_list)
+
+    metrics_list = [metrics[t] for t in tickers if t in metrics]
+    return stock_data, metrics_list
+
+def load_frames(tickers, period, start_date, end_date):
+    """Price frames for tickers, from the prefetch cache where warm"""
+    stock_data, _ = prefetcher.get(period, start_date, end_date, tickers)
+    cold = [t for t in dict.fromkeys(tickers) if t not in stock_data]
+    if cold:
+        stock_data.update(data_fetcher.fetch_stock_data(cold, start_date, end_date))
+    return stock_data
+
+def build_analysis(stock_data, metrics_list, chart_format, max_points):
+    """
+    The /api/analyze payload (without date_range) for loaded frames and metrics
+    Adds company names and AI insights to metrics_list in place
+    """
+    calculator = MetricsCalculator(stock_data, correlation_engine)
+
+    for metrics in metrics_list:
+        # Add company name
+        metrics['name'] = data_fetcher.get_company_name(metrics['ticker'])
+
+    # Generate AI insights and summary concurrently if available
+    if ai_helper.client and metrics_list:
+        insights, ai_summary = ai_helper.generate_watchlist_insights(metrics_list)
+        for metrics, insight in zip(metrics_list, insights):
+            metrics['ai_insight'] = insight
+    else:
+        for metrics in metrics_list:
+            metrics['ai_insight'] = f"{metrics['ticker']}: Performance data available"
+        ai_summary = "Watchlist analysis complete"
+
+    result = {
+        'metrics': metrics_list,
+        'correlation_matrix': calculator.calculate_correlation_matrix(),
+        'watchlist_summary': calculator.get_watchlist_summary(metrics_list),
+        'ai_summary': ai_summary
+    }
+
+    if chart_format == 'legacy':
+        # Normalized prices for the comparison chart and actual prices for individual charts
+        result['normalized_prices'] = calculator.get_normalized_prices(max_points)
+        result['price_data'] = calculator.get_price_data(max_points)
+    else:
+        result['chart_data'] = calculator.get_chart_data(chart_format, max_points)
+    return result
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_watchlist():
     data = request.get_json()
@@ -79,79 +275,518 @@ def analyze_watchlist():
     period = data.get('period', '6M')
     custom_start = data.get('custom_start')
     custom_end = data.get('custom_end')
+    chart_format = data.get('chart_format', 'compact')
+    max_points = data.get('max_points')
 
-    print("=== ANALYZE REQUEST ===")
-    print("Tickers:", tickers)
-    print("Period:", period)
-    print("Custom start/end:", custom_start, custom_end)
+    logger.info("Analyze %s period=%s custom=%s..%s", tickers, period, custom_start, custom_end)
 
     
     if not tickers:
         return jsonify({'error': 'No tickers provided'}), 400
+
+    if chart_format not in CHART_FORMATS:
+        return jsonify({'error': f'chart_format must be one of {", ".join(CHART_FORMATS)}'}), 400
+
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({'error': 'max_points must be an integer of at least 3'}), 400
     
     # Get date range
-    if period == 'custom' and custom_start and custom_end:
-        start_date = custom_start
-        end_date = custom_end
-    else:
-        start_date, end_date = data_fetcher.get_date_range(period)
-        print("Date Range:", start_date, "→", end_date)
+    start_date, end_date = resolve_date_range(period, custom_start, custom_end)
     
-    # Fetch stock data
-    stock_data = data_fetcher.fetch_stock_data(tickers, start_date, end_date)
+    # Fetch stock data and calculate metrics
+    stock_data, metrics_list = load_watchlist(tickers, period, start_date, end_date)
     
     if not stock_data:
         return jsonify({'error': 'No data could be fetched for the provided tickers'}), 400
     
-    # Calculate metrics
-    calculator = MetricsCalculator(stock_data)
-    
-    metrics_list = []
-    for ticker in tickers:
-        metrics = calculator.calculate_all_metrics(ticker)
-        if metrics:
-            # Add company name
-            metrics['name'] = data_fetcher.get_company_name(ticker)
-            
-            # Generate AI insight if available
-            if ai_helper.client:
-                metrics['ai_insight'] = ai_helper.generate_stock_insight(ticker, metrics)
-            else:
-                metrics['ai_insight'] = f"{ticker}: Performance data available"
-            
-            metrics_list.append(metrics)
-    
-    # Get correlation matrix
-    correlation_matrix = calculator.calculate_correlation_matrix()
-    
-    # Get normalized prices for comparison chart
-    normalized_prices = calculator.get_normalized_prices()
-    
-    # Get actual prices for individual charts
-    price_data = calculator.get_price_data()
-    
-    # Get watchlist summary
-    watchlist_summary = calculator.get_watchlist_summary(metrics_list)
-    
-    # Generate AI summary for watchlist
-    if ai_helper.client and metrics_list:
-        ai_summary = ai_helper.generate_watchlist_summary(metrics_list)
-    else:
+    result = build_analysis(stock_data, metrics_list, chart_format, max_points)
+    result['date_range'] = {'start': start_date, 'end': end_date}
+
+    with timed('serialize'):
+        return jsonify(result)
+
+@app.route('/api/analyze/stream', methods=['POST'])
+def analyze_watchlist_stream():
+    """
+    Streaming variant of /api/analyze
+    Metrics always use full-resolution data; max_points only downsamples the chart series
+    Emits newline-delimited JSON events as each part of the analysis is ready:
+    start, metric (one per ticker, in the order their data arrives), correlation_matrix, chart_data (or
+    normalized_prices and price_data with chart_format='legacy'),
+    watchlist_summary, insight (one per ticker), ai_summary, done
+    """
+    data = request.get_json()
+
+    tickers = data.get('tickers', [])
+    period = data.get('period', '6M')
+    chart_format = data.get('chart_format', 'compact')
+    max_points = data.get('max_points')
+
+    if not tickers:
+        return jsonify({'error': 'No tickers provided'}), 400
+
+    if chart_format not in CHART_FORMATS:
+        return jsonify({'error': f'chart_format must be one of {", ".join(CHART_FORMATS)}'}), 400
+
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({'error': 'max_points must be an integer of at least 3'}), 400
+
+    start_date, end_date = resolve_date_range(period, data.get('custom_start'), data.get('custom_end'))
+
+    def event(name, payload):
+        with timed('serialize'):
+            return app.json.dumps({'event': name, 'data': payload}) + '\n'
+
+    def generate():
+        date_range = {'start': start_date, 'end': end_date}
+        yield event('start', {'tickers': tickers, 'date_range': date_range})
+
+        # Metrics go out batch by batch, so one slow download does not hold back the rest
+        stock_data, metrics_by_ticker = {}, {}
+        use_ai = bool(ai_helper.client)
+        for frames, batch in iter_watchlist(tickers, period, start_date, end_date, STREAM_CHUNK_SIZE):
+            stock_data.update(frames)
+            for metrics in batch:
+                metrics['name'] = data_fetcher.get_company_name(metrics['ticker'])
+                if not use_ai:
+                    metrics['ai_insight'] = f"{metrics['ticker']}: Performance data available"
+                metrics_by_ticker[metrics['ticker']] = metrics
+                yield event('metric', metrics)
+
+        if not stock_data:
+            yield event('error', {'error': 'No data could be fetched for the provided tickers'})
+            return
+
+        calculator = MetricsCalculator(stock_data, correlation_engine)
+        metrics_list = [metrics_by_ticker[t] for t in tickers if t in metrics_by_ticker]
+
+        # Start the AI calls before the charts so they overlap with serialization
+        insights = ai_helper.iter_watchlist_insights(metrics_list) if use_ai and metrics_list else iter(())
+
+        yield event('correlation_matrix', calculator.calculate_correlation_matrix())
+        if chart_format == 'legacy':
+            yield event('normalized_prices', calculator.get_normalized_prices(max_points))
+            yield event('price_data', calculator.get_price_data(max_points))
+        else:
+            yield event('chart_data', calculator.get_chart_data(chart_format, max_points))
+        yield event('watchlist_summary', calculator.get_watchlist_summary(metrics_list))
+
         ai_summary = "Watchlist analysis complete"
-    
+        for index, text in insights:
+            if index is None:
+                ai_summary = text
+            else:
+                metrics_list[index]['ai_insight'] = text
+                yield event('insight', {'ticker': metrics_list[index]['ticker'], 'ai_insight': text})
+
+        yield event('ai_summary', ai_summary)
+        yield event('done', {'date_range': date_range})
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/live', methods=['GET'])
+def live_quotes_stream():
+    """
+    Server-Sent Events with live prices for an analyzed watchlist
+    Query: tickers (comma-separated), period, custom_start, custom_end
+    Each 'quotes' event is a list of {ticker, price, end_price, total_return,
+    change_pct, time}: total_return over the period from the cached history's
+    start price, change_pct against the last close
+    """
+    tickers = list(dict.fromkeys(
+        t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()
+    ))
+    period = request.args.get('period', '1Y')
+
+    if not tickers:
+        return jsonify({'error': 'No tickers provided'}), 400
+
+    if len(tickers) > LIVE_MAX_TICKERS:
+        return jsonify({'error': f'At most {LIVE_MAX_TICKERS} tickers can be followed'}), 400
+
+    start_date, end_date = resolve_date_range(
+        period, request.args.get('custom_start'), request.args.get('custom_end')
+    )
+    # Usually a cache hit: the dashboard subscribes right after analyzing
+    _, metrics_list = load_watchlist(tickers, period, start_date, end_date)
+    baselines = {
+        m['ticker']: {'start_price': m['start_price'], 'end_price': m['end_price']}
+        for m in metrics_list if m['start_price'] and m['end_price']
+    }
+    if not baselines:
+        return jsonify({'error': 'No data could be fetched for the provided tickers'}), 400
+
+    try:
+        subscription = live_quotes.subscribe(baselines)
+    except SubscriberLimitError:
+        return jsonify({'error': 'Too many live quote streams, try again later'}), 503
+
+    def event(name, payload):
+        return f"event: {name}\ndata: {app.json.dumps(payload)}\n\n"
+
+    def generate():
+        try:
+            yield event('ready', {'tickers': subscription.tickers, 'interval': live_quotes.interval})
+            while True:
+                updates = subscription.get(timeout=15)
+                # Comment lines keep proxies from closing an idle stream
+                yield event('quotes', updates) if updates else ': keepalive\n\n'
+        finally:
+            live_quotes.unsubscribe(subscription)
+
+    # No request context needed, so none is held for the life of the connection
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/live/status', methods=['GET'])
+def live_quotes_status():
+    """Poller state: subscribers, followed symbols and the last poll"""
+    return jsonify(live_quotes.status())
+
+@app.route('/api/rolling', methods=['POST'])
+def rolling_analysis():
+    """
+    Rolling volatility, Sharpe, beta and drawdowns for a watchlist
+    Body: tickers, period, custom_start, custom_end,
+          window (trading days, default 63), benchmark (default SPY),
+          metrics (subset of ROLLING_METRICS, default all)
+    """
+    data = request.get_json()
+
+    tickers = data.get('tickers', [])
+    period = data.get('period', '1Y')
+    window = data.get('window', 63)
+    benchmark = (data.get('benchmark') or 'SPY').upper()
+    metrics = data.get('metrics')
+
+    if not tickers:
+        return jsonify({'error': 'No tickers provided'}), 400
+
+    if not isinstance(window, int) or window < 2:
+        return jsonify({'error': 'window must be an integer of at least 2'}), 400
+
+    if metrics is not None and not set(metrics) <= set(ROLLING_METRICS):
+        return jsonify({'error': f'metrics must be a subset of {", ".join(ROLLING_METRICS)}'}), 400
+
+    start_date, end_date = resolve_date_range(period, data.get('custom_start'), data.get('custom_end'))
+
+    stock_data = load_frames(tickers + [benchmark], period, start_date, end_date)
+
+    if not any(t in stock_data for t in tickers):
+        return jsonify({'error': 'No data could be fetched for the provided tickers'}), 400
+
+    result = MetricsCalculator(stock_data).get_rolling_metrics(window, benchmark, metrics)
+
+    # The benchmark is only an input unless it was asked for
+    if benchmark not in tickers:
+        result['series'].pop(benchmark, None)
+
+    result.update({
+        'window': window,
+        'benchmark': benchmark if benchmark in stock_data else None,
+        'date_range': {'start': start_date, 'end': end_date}
+    })
+    return jsonify(result)
+
+@app.route('/api/portfolio', methods=['POST'])
+def portfolio_optimization():
+    """
+    Long-only min-variance, max-Sharpe and risk-parity weights plus the
+    efficient frontier for a watchlist
+    Body: tickers, period, custom_start, custom_end,
+          risk_free_rate (default 0.02), frontier_points (default 25)
+    """
+    data = request.get_json()
+
+    tickers = data.get('tickers', [])
+    period = data.get('period', '1Y')
+    risk_free_rate = data.get('risk_free_rate', 0.02)
+    frontier_points = data.get('frontier_points', 25)
+
+    if len(tickers) < 2:
+        return jsonify({'error': 'At least two tickers are needed'}), 400
+
+    if not isinstance(frontier_points, int) or not 2 <= frontier_points <= 200:
+        return jsonify({'error': 'frontier_points must be an integer between 2 and 200'}), 400
+
+    if not isinstance(risk_free_rate, (int, float)):
+        return jsonify({'error': 'risk_free_rate must be a number'}), 400
+
+    start_date, end_date = resolve_date_range(period, data.get('custom_start'), data.get('custom_end'))
+    stock_data = load_frames(tickers, period, start_date, end_date)
+    stock_data = {t: stock_data[t] for t in dict.fromkeys(tickers) if t in stock_data}
+
+    if len(stock_data) < 2:
+        return jsonify({'error': 'Data could be fetched for fewer than two tickers'}), 400
+
+    try:
+        optimizer = PortfolioOptimizer.from_stock_data(stock_data, risk_free_rate)
+        result = optimizer.optimize(frontier_points)
+    except ValueError as e:
+        return jsonify({'error': f'Cannot optimize this watchlist: {e}'}), 400
+
+    result['missing'] = [t for t in tickers if t not in stock_data]
+    result['date_range'] = {'start': start_date, 'end': end_date}
+    return jsonify(result)
+
+@app.route('/api/backtest', methods=['POST'])
+def backtest():
+    """
+    Equity curves and metrics for strategies run over the whole watchlist
+    Body: tickers, period, custom_start, custom_end,
+          strategies ({name: {'type': one of STRATEGY_DEFAULTS, **parameters}},
+                      default: every strategy with default parameters),
+          initial_capital (default 10000), cost_bps (default 0),
+          risk_free_rate (default 0.02), max_points (LTTB budget per curve)
+    """
+    data = request.get_json()
+
+    tickers = data.get('tickers', [])
+    period = data.get('period', '1Y')
+    strategies = data.get('strategies')
+    initial_capital = data.get('initial_capital', 10000)
+    cost_bps = data.get('cost_bps', 0)
+    risk_free_rate = data.get('risk_free_rate', 0.02)
+    max_points = data.get('max_points')
+
+    if not tickers:
+        return jsonify({'error': 'No tickers provided'}), 400
+
+    if strategies is not None and not (
+        isinstance(strategies, dict) and strategies and all(isinstance(s, dict) for s in strategies.values())
+    ):
+        return jsonify({'error': 'strategies must map names to {"type": ..., parameters}'}), 400
+
+    numbers = {'initial_capital': initial_capital, 'cost_bps': cost_bps, 'risk_free_rate': risk_free_rate}
+    for name, value in numbers.items():
+        if not isinstance(value, (int, float)) or value < 0:
+            return jsonify({'error': f'{name} must be a non-negative number'}), 400
+
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({'error': 'max_points must be an integer of at least 3'}), 400
+
+    start_date, end_date = resolve_date_range(period, data.get('custom_start'), data.get('custom_end'))
+    stock_data = load_frames(tickers, period, start_date, end_date)
+    stock_data = {t: stock_data[t] for t in dict.fromkeys(tickers) if t in stock_data}
+
+    if not stock_data:
+        return jsonify({'error': 'No data could be fetched for the provided tickers'}), 400
+
+    try:
+        backtester = Backtester(stock_data, initial_capital, risk_free_rate)
+        result = backtester.run(strategies, cost_bps, max_points)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    result['tickers'] = backtester.tickers
+    result['missing'] = [t for t in tickers if t not in stock_data]
+    result['date_range'] = {'start': start_date, 'end': end_date}
+    return jsonify(result)
+
+@app.route('/api/screener', methods=['POST'])
+def screen_universe():
+    """
+    Filter, sort and page the metrics of every symbol in the universe
+    Body: period (default 1Y), custom_start, custom_end,
+          filters ({metric: {'min': x, 'max': y}}), sectors (list),
+          sort (a metric or 'ticker', default sharpe_ratio), order ('desc' or 'asc'),
+          top (keep only the best k by the sort key), page (from 1), page_size (default 50)
+    The first request for a date range builds the table; later ones only run the query
+    """
+    data = request.get_json() or {}
+
+    period = data.get('period', '1Y')
+    filters = data.get('filters') or {}
+    sectors = data.get('sectors')
+    sort = data.get('sort', 'sharpe_ratio')
+    order = data.get('order', 'desc')
+    top = data.get('top')
+    page = data.get('page', 1)
+    page_size = data.get('page_size', 50)
+
+    if not isinstance(filters, dict):
+        return jsonify({'error': 'filters must map metrics to {"min": x, "max": y}'}), 400
+
+    if sectors is not None and not (isinstance(sectors, list) and all(isinstance(s, str) for s in sectors)):
+        return jsonify({'error': 'sectors must be a list of sector names'}), 400
+
+    if sort not in SORT_KEYS:
+        return jsonify({'error': f'sort must be one of {", ".join(SORT_KEYS)}'}), 400
+
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': "order must be 'asc' or 'desc'"}), 400
+
+    if top is not None and (not isinstance(top, int) or top < 1):
+        return jsonify({'error': 'top must be a positive integer'}), 400
+
+    if not isinstance(page, int) or page < 1:
+        return jsonify({'error': 'page must be a positive integer'}), 400
+
+    if not isinstance(page_size, int) or not 1 <= page_size <= SCREENER_MAX_PAGE_SIZE:
+        return jsonify({'error': f'page_size must be an integer from 1 to {SCREENER_MAX_PAGE_SIZE}'}), 400
+
+    start_date, end_date = resolve_date_range(period, data.get('custom_start'), data.get('custom_end'))
+    table = screener.table(period, start_date, end_date)
+
+    try:
+        total, results = table.query(
+            filters, sectors, sort, order == 'desc', top, (page - 1) * page_size, page_size
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    universe_size = len(screener.universe())
     return jsonify({
-        'metrics': metrics_list,
-        'correlation_matrix': correlation_matrix,
-        'normalized_prices': normalized_prices,
-        'price_data': price_data,
-        'watchlist_summary': watchlist_summary,
-        'ai_summary': ai_summary,
-        'date_range': {
-            'start': start_date,
-            'end': end_date
-        }
+        'results': results,
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'pages': -(-total // page_size),
+        'screened': len(table),
+        'universe_size': universe_size,
+        'missing': universe_size - len(table),
+        'sectors': table.sectors(),
+        'built_at': datetime.fromtimestamp(table.built_at).isoformat(timespec='seconds'),
+        'date_range': {'start': start_date, 'end': end_date}
     })
 
+def parse_watchlist(data, partial=False):
+    """
+    Validate a watchlist body; returns (fields, error)
+    Tickers are upper-cased and de-duplicated, keeping their order
+    """
+    fields = {}
+    name = data.get('name')
+    if name is not None or not partial:
+        if not isinstance(name, str) or not name.strip() or len(name.strip()) > 100:
+            return None, 'name must be a non-empty string of at most 100 characters'
+        fields['name'] = name.strip()
+
+    tickers = data.get('tickers')
+    if tickers is not None or not partial:
+        if not isinstance(tickers, list) or not all(isinstance(t, str) and t.strip() for t in tickers):
+            return None, 'tickers must be a list of symbols'
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers))
+        if len(tickers) > WATCHLIST_MAX_TICKERS:
+            return None, f'A watchlist holds at most {WATCHLIST_MAX_TICKERS} tickers'
+        fields['tickers'] = tickers
+    return fields, None
+
+@app.route('/api/watchlists', methods=['GET'])
+def list_watchlists():
+    return jsonify({'watchlists': watchlist_store.list()})
+
+@app.route('/api/watchlists', methods=['POST'])
+def create_watchlist():
+    """Body: name, tickers"""
+    fields, error = parse_watchlist(request.get_json() or {})
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        return jsonify(watchlist_store.create(fields['name'], fields['tickers'])), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+
+@app.route('/api/watchlists/<int:watchlist_id>', methods=['GET'])
+def get_watchlist(watchlist_id):
+    watchlist = watchlist_store.get(watchlist_id)
+    if watchlist is None:
+        return jsonify({'error': 'Watchlist not found'}), 404
+    return jsonify(watchlist)
+
+@app.route('/api/watchlists/<int:watchlist_id>', methods=['PUT'])
+def update_watchlist(watchlist_id):
+    """Body: name and/or tickers; changing the tickers drops the saved analyses"""
+    fields, error = parse_watchlist(request.get_json() or {}, partial=True)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        watchlist = watchlist_store.update(watchlist_id, **fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    if watchlist is None:
+        return jsonify({'error': 'Watchlist not found'}), 404
+    return jsonify(watchlist)
+
+@app.route('/api/watchlists/<int:watchlist_id>', methods=['DELETE'])
+def delete_watchlist(watchlist_id):
+    if not watchlist_store.delete(watchlist_id):
+        return jsonify({'error': 'Watchlist not found'}), 404
+    return '', 204
+
+@app.route('/api/watchlists/<int:watchlist_id>/analysis', methods=['GET'])
+def watchlist_analysis(watchlist_id):
+    """
+    The /api/analyze payload for a saved watchlist, memoized per date range
+    Query: period, custom_start, custom_end, chart_format, max_points
+    A saved analysis is served as stored until the tickers change or new
+    price rows for them land in the price cache
+    """
+    period = request.args.get('period', '6M')
+    chart_format = request.args.get('chart_format', 'compact')
+    max_points = request.args.get('max_points', type=int)
+
+    if chart_format not in CHART_FORMATS:
+        return jsonify({'error': f'chart_format must be one of {", ".join(CHART_FORMATS)}'}), 400
+
+    if max_points is not None and max_points < 3:
+        return jsonify({'error': 'max_points must be an integer of at least 3'}), 400
+
+    watchlist = watchlist_store.get(watchlist_id)
+    if watchlist is None:
+        return jsonify({'error': 'Watchlist not found'}), 404
+    tickers = watchlist['tickers']
+    if not tickers:
+        return jsonify({'error': 'Watchlist has no tickers'}), 400
+
+    start_date, end_date = resolve_date_range(
+        period, request.args.get('custom_start'), request.args.get('custom_end')
+    )
+    key = f"{start_date}:{end_date}:{chart_format}:{max_points}"
+
+    data_token = data_fetcher.data_version(tickers)
+    if data_token is not None:
+        blob = watchlist_store.get_analysis(watchlist_id, key, watchlist['version'], data_token)
+        record_cache('watchlist', blob is not None)
+        if blob is not None:
+            return Response(blob, mimetype='application/json')
+
+    stock_data, metrics_list = load_watchlist(tickers, period, start_date, end_date)
+    if not stock_data:
+        return jsonify({'error': 'No data could be fetched for the provided tickers'}), 400
+    # Read after loading so the token covers whatever the load just downloaded
+    data_token = data_fetcher.data_version(tickers)
+
+    result = build_analysis(stock_data, metrics_list, chart_format, max_points)
+    result['date_range'] = {'start': start_date, 'end': end_date}
+    result['watchlist_id'] = watchlist_id
+
+    with timed('serialize'):
+        blob = app.json.dumps(result).encode()
+    if data_token is not None:
+        watchlist_store.set_analysis(watchlist_id, key, watchlist['version'], data_token, blob)
+    return Response(blob, mimetype='application/json')
+
+@app.route('/api/prefetch/status', methods=['GET'])
+def prefetch_status():
+    """Get scheduler state and per-ticker freshness of the warm cache"""
+    return jsonify(prefetcher.status())
+
+@app.route('/api/prefetch/start', methods=['POST'])
+def prefetch_start():
+    """Start the background prefetch scheduler"""
+    started = prefetcher.start()
+    return jsonify({'running': prefetcher.running, 'changed': started})
+
+@app.route('/api/prefetch/stop', methods=['POST'])
+def prefetch_stop():
+    """Stop the background prefetch scheduler"""
+    stopped = prefetcher.stop(timeout=5)
+    return jsonify({'running': prefetcher.running, 'changed': stopped})
+
 @app.route('/api/explain', methods=['POST'])
 def explain_concept():
     """Get AI explanation for a financial concept"""
@@ -165,6 +800,28 @@ def explain_concept():
     explanation = ai_helper.explain_concept(concept, context)
     return jsonify({'explanation': explanation})
 
+@app.route('/api/ai/cache', methods=['GET'])
+def ai_cache_stats():
+    """Get hit/miss counters for the AI response cache"""
+    return jsonify(ai_helper.cache.stats())
+
+@app.route('/api/search/cache', methods=['GET'])
+def search_cache_stats():
+    """Get hit/miss counters for the symbol check and search caches"""
+    return jsonify(data_fetcher.lookup_cache_stats())
+
+@app.route('/api/analysis/cache', methods=['GET'])
+def analysis_cache_stats():
+    """Get hit/miss counters for the cross-process analysis cache"""
+    if analysis_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **analysis_cache.stats()})
+
+@app.route('/api/watchlists/cache', methods=['GET'])
+def watchlist_cache_stats():
+    """Get hit/miss counters and size of the saved watchlist analyses"""
+    return jsonify(watchlist_store.stats())
+
 @app.route('/api/search_ticker', methods=['POST'])
 def search_ticker_api():
     data = request.get_json()
@@ -225,4 +882,7 @@ def chat():
 
 
 if __name__ == '__main__':
+    # Only the reloader child serves requests, so only it warms the cache
+    if os.getenv('PREFETCH_ENABLED') == '1' and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        prefetcher.start()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,84 @@
+"""
+Time utils.backtest on synthetic watchlists against a day-by-day loop.
+
+Run from the repository root:
+    python -m benchmarks.bench_backtest --tickers 500 --years 10
+
+Times building the price matrix, each strategy's schedule plus simulation,
+and the full Backtester.run() the /api/backtest endpoint makes. The naive
+side keeps share counts and cash and walks every day in Python, which is
+how an offline spreadsheet-style backtest works; it runs on --check-tickers
+tickers only (it is slow) and the max relative equity difference is printed.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_stock_data
+from utils.backtest import STRATEGY_DEFAULTS, Backtester
+
+
+def naive_equity(backtester, rows, targets, cost_bps):
+    closes = np.nan_to_num(backtester.closes)
+    rebalances = {row: k for k, row in enumerate(rows)}
+    cash, shares = 1.0, np.zeros(closes.shape[1])
+    equity = np.empty(len(closes))
+
+    for t in range(len(closes)):
+        value = cash + shares @ closes[t]
+        if t in rebalances:
+            target = targets[rebalances[t]]
+            turnover = np.abs(target - shares * closes[t] / value).sum()
+            value *= 1 - cost_bps / 10000 * turnover
+            with np.errstate(divide='ignore', invalid='ignore'):
+                shares = np.where(target > 0, target * value / closes[t], 0)
+            cash = value * (1 - target.sum())
+        equity[t] = value
+    return equity * backtester.initial_capital
+
+
+def elapsed_ms(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--cost-bps', type=float, default=5)
+    parser.add_argument('--check-tickers', type=int, default=50)
+    args = parser.parse_args()
+
+    stock_data = generate_stock_data(args.tickers, args.years * 252, correlation=0.3)
+    print(f"{args.tickers} tickers x {args.years * 252} days, {args.cost_bps:g} bps costs")
+
+    setup_ms, backtester = elapsed_ms(lambda: Backtester(stock_data))
+    print(f"{'stage':<16}{'rebalances':>12}{'ms':>10}")
+    print(f"{'price matrix':<16}{'':>12}{setup_ms:>10.1f}")
+    for name, params in STRATEGY_DEFAULTS.items():
+        def strategy():
+            rows, targets = getattr(backtester, name)(**params)
+            backtester.simulate(rows, targets, args.cost_bps)
+            return rows
+        ms, rows = elapsed_ms(strategy)
+        print(f"{name:<16}{len(rows):>12}{ms:>10.1f}")
+
+    run_ms, _ = elapsed_ms(lambda: Backtester(stock_data).run(cost_bps=args.cost_bps))
+    print(f"{'run (all)':<16}{'':>12}{run_ms:>10.1f}")
+
+    subset = dict(list(stock_data.items())[:args.check_tickers])
+    small = Backtester(subset)
+    print(f"\nagainst the daily loop on {len(subset)} tickers")
+    print(f"{'strategy':<16}{'vectorized ms':>14}{'loop ms':>10}{'max rel diff':>14}")
+    for name, params in STRATEGY_DEFAULTS.items():
+        rows, targets = getattr(small, name)(**params)
+        fast_ms, (fast, _) = elapsed_ms(lambda: small.simulate(rows, targets, args.cost_bps))
+        loop_ms, slow = elapsed_ms(lambda: naive_equity(small, rows, targets, args.cost_bps))
+        print(f"{name:<16}{fast_ms:>14.1f}{loop_ms:>10.1f}{np.abs(fast / slow - 1).max():>14.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare one-request downloads against BulkDownloader on a simulated Yahoo.
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_download --tickers 500 --bad 3 --latency 0.2
+
+The simulated download sleeps `latency` plus `per_ticker` seconds per symbol
+and raises when a chunk contains one of the --bad symbols, like a request
+Yahoo rejects. The single request is what fetch_stock_data used to send;
+the bulk side chunks, parallelizes and bisects. Splitting the downloaded
+frame is timed separately: xs(...).copy() per ticker against split_download.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_stock_data, synthetic_downloader
+from utils.bulk_download import FIELDS, BulkDownloader, split_download
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--bad', type=int, default=3, help='symbols that make their request fail')
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--per-ticker', type=float, default=0.004)
+    parser.add_argument('--chunk-size', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    stock_data = generate_stock_data(args.tickers, args.years * 252)
+    download = synthetic_downloader(stock_data)
+    tickers = list(stock_data) + [f'BAD{i}' for i in range(args.bad)]
+    requests = []
+
+    def fetch_chunk(chunk, start_date, end_date):
+        requests.append(len(chunk))
+        time.sleep(args.latency + args.per_ticker * len(chunk))
+        if any(t.startswith('BAD') for t in chunk):
+            raise RuntimeError('HTTP 404 for the batch')
+        return split_download(download(' '.join(chunk), start=start_date, end=end_date), chunk)
+
+    start_date, end_date = '1990-01-01', '2100-01-01'
+    print(f"{args.tickers} tickers + {args.bad} bad, {args.latency}s latency")
+    print(f"{'mode':<28}{'seconds':>10}{'requests':>10}{'downloaded':>12}{'failed':>8}")
+
+    begin = time.perf_counter()
+    try:
+        single = fetch_chunk(tickers, start_date, end_date)
+    except RuntimeError:
+        single = {}
+    print(f"{'one request':<28}{time.perf_counter() - begin:>10.2f}{len(requests):>10}{len(single):>12}"
+          f"{len(tickers) - len(single):>8}")
+
+    requests.clear()
+    bulk = BulkDownloader(fetch_chunk, chunk_size=args.chunk_size, workers=args.workers, rate=0, backoff=0)
+    begin = time.perf_counter()
+    downloaded, failures = bulk.download(tickers, start_date, end_date)
+    print(f"{'bulk (chunked, bisected)':<28}{time.perf_counter() - begin:>10.2f}{len(requests):>10}"
+          f"{len(downloaded):>12}{len(failures):>8}")
+
+    data = download(' '.join(stock_data), start=start_date, end=end_date)
+    begin = time.perf_counter()
+    for ticker in stock_data:
+        data.xs(ticker, axis=1, level=1).copy()[FIELDS].dropna()
+    xs_ms = (time.perf_counter() - begin) * 1000
+
+    by_ticker = data.swaplevel(axis=1).sort_index(axis=1)
+    begin = time.perf_counter()
+    split_download(by_ticker, list(stock_data))
+    split_ms = (time.perf_counter() - begin) * 1000
+    print(f"\nsplitting {len(stock_data)} tickers: xs+copy {xs_ms:.1f} ms, split_download {split_ms:.1f} ms")
+
+    sample = next(iter(stock_data))
+    pd.testing.assert_frame_equal(
+        split_download(by_ticker, [sample])[sample], stock_data[sample], check_freq=False, check_names=False
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare memory use of stock_data DataFrames vs the memory-mapped columnar store.
+
+Run from the repository root:
+    python -m benchmarks.bench_columnar --tickers 2000 --years 20
+
+Peak traced allocations (tracemalloc) are reported for holding the universe
+and for computing batch metrics over one year for every ticker. Mapped pages
+of the store are file-backed and not counted, which is the point: they can
+be dropped by the OS at any time.
+"""
+import argparse
+import gc
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_stock_data
+from utils.calculations import MetricsCalculator
+from utils.columnar_store import ColumnarStore
+
+
+def traced(fn):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--years', type=int, default=20)
+    args = parser.parse_args()
+
+    n_days = args.years * 252
+    path = tempfile.mkdtemp(prefix='columnar_')
+    try:
+        stock_data, held, _, _ = traced(lambda: generate_stock_data(args.tickers, n_days))
+        start_date = stock_data['SYN0000'].index[-252].strftime('%Y-%m-%d')
+        ColumnarStore.build(path, stock_data)
+
+        _, _, frames_peak, frames_elapsed = traced(
+            lambda: MetricsCalculator(
+                {t: df[df.index >= start_date] for t, df in stock_data.items()}
+            ).calculate_all_metrics_batch()
+        )
+        del stock_data
+        gc.collect()
+
+        store, store_held, _, _ = traced(lambda: ColumnarStore(path))
+        _, _, store_peak, store_elapsed = traced(
+            lambda: MetricsCalculator.calculate_store_metrics(store, start_date=start_date)
+        )
+
+        print(f"{args.tickers} tickers x {n_days} days, metrics over the last 252 days")
+        print(f"{'source':<14}{'held MB':>10}{'metrics peak MB':>18}{'metrics ms':>12}")
+        print(f"{'DataFrames':<14}{held / 2**20:>10.1f}{frames_peak / 2**20:>18.1f}{frames_elapsed * 1000:>12.1f}")
+        print(f"{'memmap store':<14}{store_held / 2**20:>10.1f}{store_peak / 2**20:>18.1f}{store_elapsed * 1000:>12.1f}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
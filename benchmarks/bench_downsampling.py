@@ -0,0 +1,65 @@
+"""
+Compare chart payloads with and without LTTB downsampling.
+
+Run from the repository root:
+    python -m benchmarks.bench_downsampling --tickers 10 --years 30 --max-points 1500
+
+"Render-ready" time is the server encode + JSON serialization plus a
+json.loads of the payload as a stand-in for the browser parse; the point
+count is what Plotly then has to draw per line.
+"""
+import argparse
+import base64
+import json
+import time
+
+from benchmarks.synthetic import generate_stock_data
+from utils.calculations import MetricsCalculator
+
+
+def measure(calculator, fmt, max_points, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if fmt == 'legacy':
+            payload = {
+                'normalized_prices': calculator.get_normalized_prices(max_points),
+                'price_data': calculator.get_price_data(max_points)
+            }
+        else:
+            payload = {'chart_data': calculator.get_chart_data(fmt, max_points)}
+        body = json.dumps(payload)
+        json.loads(body)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    if fmt == 'legacy':
+        points = len(next(iter(payload['price_data'].values()))['prices'])
+    elif fmt == 'binary':
+        points = len(base64.b64decode(payload['chart_data']['axis']['deltas'])) // 2 + 1
+    else:
+        points = len(payload['chart_data']['axis']['deltas']) + 1
+    return len(body), points, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--max-points', type=int, default=1500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    stock_data = generate_stock_data(args.tickers, args.years * 252)
+    calculator = MetricsCalculator(stock_data)
+
+    print(f"{args.tickers} tickers x {args.years * 252} days")
+    print(f"{'format':<10}{'max_points':>12}{'points':>10}{'bytes':>14}{'ready ms':>12}")
+    for fmt in ('legacy', 'compact', 'binary'):
+        for max_points in (None, args.max_points):
+            size, points, elapsed = measure(calculator, fmt, max_points, args.repeat)
+            print(f"{fmt:<10}{str(max_points or '-'):>12}{points:>10}{size:>14,}{elapsed * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Check RunningMetrics against the full recompute and time a daily update.
+
+Run from the repository root:
+    python -m benchmarks.bench_incremental --series 300 --tickers 500 --years 5
+
+Property check: random close series of random length (random walks, flat
+prices, crashes, prices rounded to cents) are fed one bar at a time and
+after every bar the unrounded running values are compared with
+MetricsCalculator's per-ticker methods; the largest relative difference
+is printed and the run exits with status 1 above --tolerance.
+
+Timing: appending one new day to every ticker's state against recomputing
+calculate_all_metrics_batch over the whole history.
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_stock_data
+from utils.calculations import MetricsCalculator
+from utils.running_metrics import RunningMetrics
+
+
+def random_closes(rng, kind, n):
+    if kind == 'flat':
+        return np.full(n, 50.0)
+    if kind == 'cents':
+        return np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.05, n))), 2)
+    if kind == 'crash':
+        head = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n // 2 + 1)))
+        return np.concatenate([head, head[-1] * 0.3 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))])
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def full_values(calculator, closes):
+    df = pd.DataFrame({'Close': closes})
+    return {
+        'total_return': calculator.calculate_total_return(df),
+        'annualized_return': calculator.calculate_annualized_return(df),
+        'annualized_volatility': calculator.calculate_volatility(df),
+        'sharpe_ratio': calculator.calculate_sharpe_ratio(df),
+        'max_drawdown': calculator.calculate_max_drawdown(df)
+    }
+
+
+def relative_difference(running, full):
+    worst = 0.0
+    for name, expected in full.items():
+        actual = running[name]
+        if math.isnan(expected) or math.isnan(actual):
+            if not (math.isnan(expected) and math.isnan(actual)):
+                return math.inf
+            continue
+        worst = max(worst, abs(actual - expected) / max(1.0, abs(expected)))
+    return worst
+
+
+def property_check(n_series, max_days, seed):
+    rng = np.random.default_rng(seed)
+    calculator = MetricsCalculator({})
+    kinds = ('walk', 'flat', 'cents', 'crash')
+    worst = 0.0
+
+    for i in range(n_series):
+        closes = random_closes(rng, kinds[i % len(kinds)], int(rng.integers(2, max_days)))
+        state = RunningMetrics('X', closes[0])
+        for k in range(1, len(closes)):
+            state.append(closes[k])
+            worst = max(worst, relative_difference(state.values(), full_values(calculator, closes[:k + 1])))
+        # The array-built state must agree with the appended one
+        worst = max(worst, relative_difference(
+            RunningMetrics.from_closes('X', closes).values(), full_values(calculator, closes)
+        ))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--series', type=int, default=300, help='random series in the property check')
+    parser.add_argument('--max-days', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=5)
+    args = parser.parse_args()
+
+    worst = property_check(args.series, args.max_days, args.seed)
+    print(f"property check: {args.series} series, max relative difference {worst:.2e}")
+
+    n_days = args.years * 252
+    stock_data = generate_stock_data(args.tickers, n_days + 1)
+    history = {t: df.iloc[:-1] for t, df in stock_data.items()}
+    states = {t: RunningMetrics.from_closes(t, df['Close'].to_numpy()) for t, df in history.items()}
+    new_bar = {t: float(df['Close'].iloc[-1]) for t, df in stock_data.items()}
+
+    start = time.perf_counter()
+    for ticker, state in states.items():
+        state.append(new_bar[ticker])
+    incremental = [state.metrics() for state in states.values()]
+    append_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    recomputed = MetricsCalculator(stock_data).calculate_all_metrics_batch()
+    full_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{args.tickers} tickers x {n_days} days, one new bar each")
+    print(f"  append + metrics   {append_ms:8.2f} ms")
+    print(f"  full recompute     {full_ms:8.2f} ms  ({full_ms / append_ms:.0f}x)")
+    print(f"  identical rounded metrics: {incremental == recomputed}")
+
+    return 1 if worst > args.tolerance else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
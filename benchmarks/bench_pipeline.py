@@ -0,0 +1,222 @@
+"""
+Time every stage of the analyze pipeline offline on synthetic GBM prices.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline --tickers 10,100 --years 1,5 --output bench.json
+    python -m benchmarks.bench_pipeline --tickers 10,100 --years 1,5 --compare bench.json
+
+Stages (each on the same synthetic watchlist):
+  fetch            DataFetcher.fetch_stock_data against a stubbed yf.download
+  metrics          MetricsCalculator.calculate_all_metrics_batch
+  correlation      calculate_correlation_matrix, pandas path
+  correlation_warm calculate_correlation_matrix through a warm CorrelationEngine
+  series_legacy    get_normalized_prices + get_price_data
+  chart_compact    get_chart_data('compact')
+  chart_binary     get_chart_data('binary')
+  serialize        JSON encoding of the legacy /api/analyze payload
+  analyze          POST /api/analyze end to end (stubbed download, AI off)
+
+For each stage: p50/p99/mean latency, runs per second and peak traced
+memory (tracemalloc, measured in a separate run). --output saves the results
+as JSON; --compare loads an earlier file and flags p50 regressions beyond
+--threshold, exiting with status 1 if there are any.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_stock_data, synthetic_downloader
+
+# Keep the app offline and free of cross-run state before anything imports it
+_tmp = tempfile.mkdtemp(prefix='bench_pipeline_')
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('DOWNLOAD_COALESCE_MS', '0')
+os.environ.setdefault('BULK_RATE_PER_SECOND', '0')
+os.environ['ANALYSIS_CACHE_TTL_SECONDS'] = '0'
+os.environ['PRICE_CACHE_PATH'] = os.path.join(_tmp, 'prices.sqlite3')
+os.environ['SHARED_CACHE_PATH'] = os.path.join(_tmp, 'shared.sqlite3')
+
+from utils.calculations import MetricsCalculator  # noqa: E402
+from utils.correlation import CorrelationEngine  # noqa: E402
+from utils.data_fetcher import DataFetcher  # noqa: E402
+
+
+def build_stages(stock_data, start_date, end_date):
+    tickers = list(stock_data)
+    fetcher = DataFetcher(cache=False, downloader=synthetic_downloader(stock_data))
+    calculator = MetricsCalculator(stock_data)
+    engine = CorrelationEngine()
+    engine.correlation_matrix(stock_data)
+    warm = MetricsCalculator(stock_data, engine)
+
+    def serialize():
+        return json.dumps({
+            'metrics': calculator.calculate_all_metrics_batch(),
+            'correlation_matrix': calculator.calculate_correlation_matrix(),
+            'normalized_prices': calculator.get_normalized_prices(),
+            'price_data': calculator.get_price_data()
+        })
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as app_module
+    app_module.data_fetcher.downloader = synthetic_downloader(stock_data)
+    app_module.data_fetcher.cache = None
+    app_module.ai_helper.client = None
+    client = app_module.app.test_client()
+    body = {
+        'tickers': tickers, 'period': 'custom', 'chart_format': 'compact',
+        'custom_start': start_date, 'custom_end': end_date
+    }
+
+    def analyze():
+        response = client.post('/api/analyze', json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return response.get_data()
+
+    return {
+        'fetch': lambda: fetcher.fetch_stock_data(tickers, start_date, end_date),
+        'metrics': calculator.calculate_all_metrics_batch,
+        'correlation': calculator.calculate_correlation_matrix,
+        'correlation_warm': warm.calculate_correlation_matrix,
+        'series_legacy': lambda: (calculator.get_normalized_prices(), calculator.get_price_data()),
+        'chart_compact': lambda: calculator.get_chart_data('compact'),
+        'chart_binary': lambda: calculator.get_chart_data('binary'),
+        'serialize': serialize,
+        'analyze': analyze
+    }
+
+
+def measure(fn, repeat):
+    # The app and fetcher print progress; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'runs_per_s': round(float(1000 / latencies.mean()), 2),
+        'peak_mb': round(peak / 2 ** 20, 3)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(ticker_counts, year_counts, repeat, stage_filter):
+    results = {}
+    for n_tickers in ticker_counts:
+        for years in year_counts:
+            n_days = years * 252
+            stock_data = generate_stock_data(n_tickers, n_days)
+            index = next(iter(stock_data.values())).index
+            start_date = index[0].strftime('%Y-%m-%d')
+            end_date = (index[-1] + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+            scenario = f'{n_tickers}x{n_days}'
+            results[scenario] = {}
+            for name, fn in build_stages(stock_data, start_date, end_date).items():
+                if stage_filter and name not in stage_filter:
+                    continue
+                results[scenario][name] = measure(fn, repeat)
+                stats = results[scenario][name]
+                print(f"{scenario:<12}{name:<18}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                      f"{stats['runs_per_s']:>10.1f}{stats['peak_mb']:>10.2f}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print p50 ratios against a baseline run; return the regressed stages"""
+    regressions = []
+    print(f"\n{'scenario':<12}{'stage':<18}{'base p50':>10}{'p50':>10}{'ratio':>8}")
+    for scenario, stages in results.items():
+        for name, stats in stages.items():
+            base = baseline.get('scenarios', {}).get(scenario, {}).get(name)
+            if not base:
+                continue
+            ratio = stats['p50_ms'] / base['p50_ms'] if base['p50_ms'] else float('inf')
+            flag = '  REGRESSION' if ratio > 1 + threshold else ''
+            if flag:
+                regressions.append((scenario, name, ratio))
+            print(f"{scenario:<12}{name:<18}{base['p50_ms']:>10.2f}{stats['p50_ms']:>10.2f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', default='10,100', help='comma-separated ticker counts')
+    parser.add_argument('--years', default='1,5', help='comma-separated history lengths in years')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--stages', default='', help='comma-separated subset of stages')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file from an earlier --output')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='p50 slowdown ratio counted as a regression (default 0.10)')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12}{'stage':<18}{'p50 ms':>10}{'p99 ms':>10}{'runs/s':>10}{'peak MB':>10}")
+    results = run(
+        [int(n) for n in args.tickers.split(',')],
+        [int(y) for y in args.years.split(',')],
+        args.repeat,
+        set(filter(None, args.stages.split(',')))
+    )
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'cpus': os.cpu_count(),
+            'repeat': args.repeat
+        },
+        'scenarios': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
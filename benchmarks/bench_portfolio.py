@@ -0,0 +1,103 @@
+"""
+Time PortfolioOptimizer on synthetic watchlists and check it against SciPy.
+
+Run from the repository root:
+    python -m benchmarks.bench_portfolio --tickers 50,200 --years 1,5
+
+For each size: the covariance setup, every solver on its own and the full
+optimize() call the /api/portfolio endpoint makes (p50 over --repeat runs).
+Prices follow a one-factor model with a spread of drifts and volatilities
+so the solvers have real structure to work on. When SciPy is installed, min-variance and max-Sharpe are re-solved with SLSQP
+(only up to --check-max assets, it is slow) and the gaps are printed; the
+risk parity check is the spread of the risk contributions.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_stock_data
+from utils.portfolio import PortfolioOptimizer
+
+try:
+    from scipy.optimize import minimize
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+def p50(fn, repeat):
+    fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies)) * 1000
+
+
+def slsqp(opt):
+    n = len(opt.tickers)
+    bounds = [(0, 1)] * n
+    constraints = {'type': 'eq', 'fun': lambda w: w.sum() - 1}
+    options = {'ftol': 1e-12, 'maxiter': 1000}
+    start = np.full(n, 1.0 / n)
+
+    variance = minimize(lambda w: w @ opt.cov @ w, start, jac=lambda w: 2 * opt.cov @ w,
+                        bounds=bounds, constraints=constraints, method='SLSQP', options=options)
+    sharpe = minimize(lambda w: -(opt.mu @ w - opt.risk_free_rate) / np.sqrt(w @ opt.cov @ w), start,
+                      bounds=bounds, constraints=constraints, method='SLSQP', options=options)
+    return variance.x, sharpe.x
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', default='50,200', help='comma-separated asset counts')
+    parser.add_argument('--years', default='1,5', help='comma-separated history lengths in years')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--check-max', type=int, default=50,
+                        help='largest asset count to check against SLSQP')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12}{'setup':>9}{'min var':>9}{'frontier':>10}{'sharpe':>9}{'rparity':>9}{'optimize':>10}  ms")
+    checks = []
+    for n_tickers in (int(n) for n in args.tickers.split(',')):
+        for years in (int(y) for y in args.years.split(',')):
+            rng = np.random.default_rng(n_tickers)
+            stock_data = generate_stock_data(
+                n_tickers, years * 252, mu=rng.uniform(-0.05, 0.25, n_tickers),
+                sigma=rng.uniform(0.15, 0.5, n_tickers), correlation=0.3
+            )
+            opt = PortfolioOptimizer.from_stock_data(stock_data)
+            solutions = opt.frontier_solutions()
+
+            timings = [
+                p50(lambda: PortfolioOptimizer.from_stock_data(stock_data), args.repeat),
+                p50(opt.min_variance, args.repeat),
+                p50(opt.frontier_solutions, args.repeat),
+                p50(lambda: opt.max_sharpe(solutions=solutions), args.repeat),
+                p50(opt.risk_parity, args.repeat),
+                p50(lambda: PortfolioOptimizer.from_stock_data(stock_data).optimize(), args.repeat)
+            ]
+            scenario = f'{n_tickers}x{years * 252}'
+            print(f"{scenario:<12}" + ''.join(f"{t:>{w}.1f}" for t, w in zip(timings, (9, 9, 10, 9, 9, 10))))
+
+            rp = opt.risk_parity()
+            contributions = rp * (opt.cov @ rp)
+            check = [scenario, contributions.max() / contributions.min() - 1]
+            if SCIPY_AVAILABLE and n_tickers <= args.check_max:
+                mv, ms = opt.min_variance(), opt.max_sharpe(solutions=solutions)
+                ref_mv, ref_ms = slsqp(opt)
+                vol = lambda w: np.sqrt(w @ opt.cov @ w)
+                sharpe = lambda w: (opt.mu @ w - opt.risk_free_rate) / vol(w)
+                check += [vol(mv) - vol(ref_mv), sharpe(ref_ms) - sharpe(ms)]
+            checks.append(check)
+
+    print(f"\n{'scenario':<12}{'rp spread':>12}{'vol gap':>12}{'sharpe gap':>12}"
+          "   (gaps vs SLSQP; negative means ours is better)")
+    for scenario, *values in checks:
+        print(f"{scenario:<12}" + ''.join(f"{v:>12.2e}" for v in values))
+
+
+if __name__ == '__main__':
+    main()
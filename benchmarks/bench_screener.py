@@ -0,0 +1,89 @@
+"""
+Time screener queries over a large synthetic universe.
+
+Run from the repository root:
+    python -m benchmarks.bench_screener --tickers 5000 --years 1
+
+Metrics for every ticker are computed once with calculate_all_metrics_batch
+and loaded into a ScreenerTable. Each query (filter + sector + sort + top-k,
+one page) is then timed against the same query written over the metric
+dicts in plain Python, and both must return the same page.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_stock_data
+from utils.calculations import MetricsCalculator
+from utils.screener import ScreenerTable
+from utils.ticker_index import TickerIndex
+
+SECTORS = ('Technology', 'Healthcare', 'Finance', 'Energy', 'Consumer', 'Industrial', 'Utilities')
+
+QUERIES = {
+    'sharpe > 1, drawdown > -15%': dict(
+        filters={'sharpe_ratio': {'min': 1}, 'max_drawdown': {'min': -15}}, sort='sharpe_ratio'
+    ),
+    'healthcare, low volatility': dict(
+        filters={'annualized_volatility': {'max': 25}}, sectors=['Healthcare'], sort='total_return'
+    ),
+    'top 100 by return, page 3': dict(sort='total_return', top=100, offset=40, limit=20),
+    'top 50 by days (all tied)': dict(sort='days', top=50),
+    'everything by ticker': dict(sort='ticker', descending=False)
+}
+
+
+def naive_query(metrics, sector_of, filters=None, sectors=None, sort='sharpe_ratio', descending=True,
+                top=None, offset=0, limit=50):
+    rows = [
+        m for m in metrics
+        if all(bounds.get('min', -np.inf) <= m[c] <= bounds.get('max', np.inf) for c, bounds in (filters or {}).items())
+        and (not sectors or sector_of[m['ticker']] in sectors)
+    ]
+    rows.sort(key=lambda m: m[sort], reverse=descending)
+    if top is not None:
+        rows = rows[:top]
+    return len(rows), [m['ticker'] for m in rows[offset:offset + limit]]
+
+
+def timed_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    stock_data = generate_stock_data(
+        args.tickers, args.years * 252, mu=rng.normal(0.08, 0.2, args.tickers),
+        sigma=rng.uniform(0.1, 0.6, args.tickers), correlation=0.3
+    )
+    index = TickerIndex()
+    for i, ticker in enumerate(stock_data):
+        index.add(ticker, f'Company {ticker}', SECTORS[i % len(SECTORS)])
+    sector_of = {entry['ticker']: entry['sector'] for entry in index.entries}
+
+    start = time.perf_counter()
+    metrics = MetricsCalculator(stock_data).calculate_all_metrics_batch()
+    metrics_ms = (time.perf_counter() - start) * 1000
+    build_ms, table = timed_ms(lambda: ScreenerTable.from_metrics(metrics, index, None), 1)
+    print(f"{args.tickers} tickers x {args.years * 252} days: metrics {metrics_ms:.0f} ms, table {build_ms:.1f} ms")
+
+    print(f"{'query':<30}{'matches':>9}{'table ms':>10}{'python ms':>11}")
+    for name, query in QUERIES.items():
+        table_ms, (total, rows) = timed_ms(lambda: table.query(**query), args.repeat)
+        naive_ms, expected = timed_ms(lambda: naive_query(metrics, sector_of, **query), args.repeat)
+        assert (total, [r['ticker'] for r in rows]) == expected, name
+        print(f"{name:<30}{total:>9}{table_ms:>10.2f}{naive_ms:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Load test serve.py with 1..N worker processes on synthetic data.
+
+Run from the repository root:
+    python -m benchmarks.bench_server --workers 1,2,4 --clients 8 --requests 400
+
+A temporary price cache is seeded with synthetic frames for a past date
+range, so requests are served without any download and the server is
+CPU-bound. Client load comes from separate processes so the client side
+does not share one GIL. The analysis cache is disabled unless
+--shared-cache is given, so every request recomputes its metrics.
+
+The default endpoint is /api/rolling. /api/analyze also waits on the AI
+insight calls (OPENAI_API_KEY), which dominate its latency unless a reachable
+key is configured.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+from benchmarks.synthetic import generate_stock_data
+from utils.price_cache import PriceCache
+
+ENDPOINTS = {'analyze': '/api/analyze', 'rolling': '/api/rolling'}
+
+
+def seed_cache(path, n_tickers, n_days):
+    stock_data = generate_stock_data(n_tickers, n_days)
+    cache = PriceCache(path)
+    start = end = None
+    for ticker, df in stock_data.items():
+        start = df.index[0].strftime('%Y-%m-%d')
+        end = (df.index[-1] + np.timedelta64(1, 'D')).strftime('%Y-%m-%d')
+        cache.merge(ticker, df, start, end)
+    return list(stock_data), start, end
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/sectors', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def client(args):
+    url, body, count = args
+    latencies = []
+    for _ in range(count):
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_load(workers, env, endpoint, body, clients, requests_total):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(workers), '--bind', f'127.0.0.1:{port}'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(port)
+        url = f'http://127.0.0.1:{port}{ENDPOINTS[endpoint]}'
+        # One warm-up request per worker
+        client((url, body, workers))
+
+        per_client = max(1, requests_total // clients)
+        with multiprocessing.Pool(clients) as pool:
+            start = time.perf_counter()
+            results = pool.map(client, [(url, body, per_client)] * clients)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    latencies = np.concatenate(results) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--endpoint', choices=ENDPOINTS, default='rolling')
+    parser.add_argument('--shared-cache', action='store_true')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_server_')
+    prices_path = os.path.join(tmp, 'prices.sqlite3')
+    tickers, start, end = seed_cache(prices_path, args.tickers, args.years * 252)
+
+    env = dict(os.environ)
+    env.update({
+        'PRICE_CACHE_PATH': prices_path,
+        'SHARED_CACHE_PATH': os.path.join(tmp, 'shared.sqlite3'),
+        'LLM_CACHE_PATH': os.path.join(tmp, 'llm.sqlite3'),
+        'ANALYSIS_CACHE_TTL_SECONDS': '300' if args.shared_cache else '0',
+        'PREFETCH_ENABLED': '0'
+    })
+    env.setdefault('OPENAI_API_KEY', 'benchmark')
+
+    body = json.dumps({
+        'tickers': tickers,
+        'period': 'custom',
+        'custom_start': start,
+        'custom_end': end,
+        'benchmark': tickers[0]
+    }).encode()
+
+    print(f"{args.endpoint}: {args.tickers} tickers x {args.years * 252} days, "
+          f"{args.clients} clients, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'scaling':>10}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(',')]:
+        throughput, p50, p99 = run_load(workers, env, args.endpoint, body, args.clients, args.requests)
+        baseline = baseline or throughput
+        print(f"{workers:>8}{throughput:>10.1f}{p50:>10.1f}{p99:>10.1f}{throughput / baseline:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+def generate_stock_data(n_tickers=10, n_days=252, start='2000-01-03', seed=0,
+                        mu=0.08, sigma=0.25, start_price=100.0, correlation=0.0):
+    """
+    Generate synthetic OHLCV frames with geometric Brownian motion closes
+    mu and sigma may be per-ticker arrays; correlation > 0 adds a common
+    market factor so every pair of tickers has that return correlation
+    Returns the same {ticker: DataFrame} layout DataFetcher.fetch_stock_data produces
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=n_days)
+    dt = 1 / 252
+
+    drift = (mu - 0.5 * sigma ** 2) * dt
+    shocks = rng.normal(drift, sigma * np.sqrt(dt), size=(n_days, n_tickers))
+    if correlation > 0:
+        market = rng.normal(0, 1, size=(n_days, 1))
+        noise = (shocks - drift) / (sigma * np.sqrt(dt))
+        shocks = drift + sigma * np.sqrt(dt) * (
+            np.sqrt(correlation) * market + np.sqrt(1 - correlation) * noise
+        )
+    shocks[0] = 0
+    closes = start_price * np.exp(np.cumsum(shocks, axis=0))
+
+    stock_data = {}
+    for i in range(n_tickers):
+        close = closes[:, i]
+        spread = np.abs(rng.normal(0, 0.01, n_days)) * close
+        stock_data[f'SYN{i:04d}'] = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.002, n_days)),
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': rng.integers(1_000_000, 10_000_000, n_days).astype(float)
+        }, index=index)
+
+    return stock_data
+
+
+def synthetic_downloader(stock_data):
+    """
+    A stand-in for yf.download serving frames from stock_data
+    Returns the (Price, Ticker) MultiIndex layout yfinance uses, limited to
+    [start, end) and to the requested tickers
+    """
+    def download(tickers, start=None, end=None, **kwargs):
+        names = [t for t in tickers.split() if t in stock_data]
+        if not names:
+            return pd.DataFrame()
+        frames = {}
+        for ticker in names:
+            df = stock_data[ticker]
+            frames[ticker] = df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+        data = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        data.columns.names = ['Price', 'Ticker']
+        return data
+
+    return download
@@ -0,0 +1,187 @@
+"""
+Production entry point: N worker processes sharing one listening socket.
+
+    python serve.py --workers 4 --bind 0.0.0.0:5000
+
+Runs gunicorn when it is installed; otherwise the parent process binds the
+socket, forks the workers and each one serves it with a threaded werkzeug
+server, restarting any worker that dies. `python app.py` stays the
+single-process debug server.
+
+Workers share the SQLite price cache, the analysis cache (SHARED_CACHE_PATH)
+and, unless LLM_CACHE_PATH is set otherwise, an on-disk AI response cache.
+One worker per host holds a file lock and runs the host-wide background jobs:
+the live quote publisher that every worker reads from (QUOTE_BOARD_PATH) and,
+with PREFETCH_ENABLED=1, the prefetch scheduler.
+
+Each live quote stream (/api/live) holds a gunicorn thread while the page is
+open, so workers get WEB_THREADS threads (default 32) and at most half of
+them serve streams (LIVE_MAX_SUBSCRIBERS), leaving the rest for requests.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+
+try:
+    import gunicorn.app.base
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+_host_lock = None
+
+logger = logging.getLogger('serve')
+
+
+def configure_environment():
+    """Defaults that make per-process caches shared between workers"""
+    os.environ.setdefault('LLM_CACHE_PATH', os.path.join(CACHE_DIR, 'llm.sqlite3'))
+    os.environ.setdefault('QUOTE_BOARD_PATH', os.path.join(CACHE_DIR, 'quotes.sqlite3'))
+
+
+def acquire_host_lock():
+    """Take the host-wide lock without waiting; True if this process now holds it"""
+    global _host_lock
+    if _host_lock is not None:
+        return False
+    try:
+        import fcntl
+    except ImportError:
+        # No fcntl means no fork() either: this is the only process
+        _host_lock = True
+        return True
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    lock = open(os.path.join(CACHE_DIR, 'host.lock'), 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return False
+    # Held for the life of the worker; released if it exits
+    _host_lock = lock
+    return True
+
+
+def init_worker():
+    """Import the app in the worker; exactly one worker runs the host-wide background jobs"""
+    import app as app_module
+
+    if acquire_host_lock():
+        if app_module.shared_quotes is not None:
+            app_module.shared_quotes.start()
+        if os.getenv('PREFETCH_ENABLED') == '1':
+            app_module.prefetcher.start()
+
+    return app_module.app
+
+
+def parse_bind(bind):
+    host, _, port = bind.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+def serve_gunicorn(bind, workers, threads):
+    class Application(gunicorn.app.base.BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', 120)
+
+        def load(self):
+            return init_worker()
+
+    Application().run()
+
+
+def serve_prefork(bind, workers):
+    host, port = parse_bind(bind)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    logger.info("✓ Serving on http://%s:%s with %d werkzeug workers", host, port, workers)
+
+    def run_worker():
+        from werkzeug.serving import make_server
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        server = make_server(host, port, init_worker(), threaded=True, fd=sock.fileno())
+        server.serve_forever()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker()
+            finally:
+                os._exit(1)
+        return pid
+
+    children = {spawn() for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            logger.warning("⚠ Worker %d exited with status %d, restarting", pid, status)
+            children.add(spawn())
+
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the Stock Monitor with multiple worker processes')
+    parser.add_argument('--bind', default=os.getenv('BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', 32)),
+                        help='threads per worker (gunicorn only)')
+    parser.add_argument('--no-gunicorn', action='store_true', help='use the built-in pre-fork server')
+    args = parser.parse_args()
+
+    configure_environment()
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        format='%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'
+    )
+
+    if GUNICORN_AVAILABLE and not args.no_gunicorn:
+        # Live quote streams never take more than half of a worker's threads
+        os.environ.setdefault('LIVE_MAX_SUBSCRIBERS', str(max(1, args.threads // 2)))
+        serve_gunicorn(args.bind, args.workers, args.threads)
+    elif hasattr(os, 'fork'):
+        serve_prefork(args.bind, args.workers)
+    else:
+        logger.warning("⚠ No fork() on this platform, serving with a single process")
+        host, port = parse_bind(args.bind)
+        init_worker().run(host=host, port=port, threaded=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,10 @@
 let watchlist = [];
 const MAX_WATCHLIST = 10;
 let currentAnalysisData = null;
+// Point budget for chart series; long custom ranges are downsampled server-side
+const CHART_MAX_POINTS = 1500;
+// Server-Sent Events stream with live prices for the analyzed watchlist
+let liveQuotes = null;
 
 // Initialize tooltips
 document.addEventListener('DOMContentLoaded', function() {
@@ -289,6 +293,107 @@ function updateWatchlistDisplay() {
     clearBtn.style.display = 'block';
 }
 
+// ============================================
+// SAVED WATCHLISTS
+// ============================================
+
+let savedWatchlists = [];
+
+function loadSavedWatchlists(selectedId) {
+    return fetch('/api/watchlists')
+        .then(response => response.json())
+        .then(data => {
+            savedWatchlists = data.watchlists;
+            const select = document.getElementById('savedWatchlists');
+            select.innerHTML = '<option value="">Saved watchlists</option>';
+            savedWatchlists.forEach(item => {
+                const option = document.createElement('option');
+                option.value = item.id;
+                option.textContent = `${item.name} (${item.tickers.length})`;
+                select.appendChild(option);
+            });
+            if (selectedId) select.value = selectedId;
+        })
+        .catch(error => console.error('Error loading saved watchlists:', error));
+}
+
+document.addEventListener('DOMContentLoaded', () => loadSavedWatchlists());
+
+// Save the current watchlist, overwriting a saved one with the same name
+document.getElementById('saveWatchlist').addEventListener('click', function() {
+    if (watchlist.length === 0) {
+        alert('Please add at least one stock to your watchlist!');
+        return;
+    }
+    const name = prompt('Name this watchlist:');
+    if (!name || !name.trim()) return;
+
+    const tickers = watchlist.map(item => item.ticker);
+    const existing = savedWatchlists.find(item => item.name === name.trim());
+    fetch(existing ? `/api/watchlists/${existing.id}` : '/api/watchlists', {
+        method: existing ? 'PUT' : 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ name: name.trim(), tickers: tickers })
+    })
+    .then(response => response.json().then(data => {
+        if (!response.ok) throw new Error(data.error);
+        return loadSavedWatchlists(data.id);
+    }))
+    .catch(error => alert(`Could not save watchlist: ${error.message}`));
+});
+
+document.getElementById('deleteSavedWatchlist').addEventListener('click', function() {
+    const id = document.getElementById('savedWatchlists').value;
+    if (!id || !confirm('Delete this saved watchlist?')) return;
+    fetch(`/api/watchlists/${id}`, { method: 'DELETE' }).then(() => loadSavedWatchlists());
+});
+
+// Load a saved watchlist and show its analysis (served from the server's saved result when current)
+document.getElementById('openSavedWatchlist').addEventListener('click', function() {
+    const id = document.getElementById('savedWatchlists').value;
+    const saved = savedWatchlists.find(item => String(item.id) === id);
+    if (!saved) return;
+
+    watchlist = saved.tickers.map(ticker => ({ ticker, name: ticker }));
+    updateWatchlistDisplay();
+    if (watchlist.length === 0) return;
+
+    const period = document.querySelector('input[name="timePeriod"]:checked').value;
+    const params = new URLSearchParams({
+        period: period,
+        custom_start: document.getElementById('customStartDate').value,
+        custom_end: document.getElementById('customEndDate').value,
+        chart_format: 'binary',
+        max_points: CHART_MAX_POINTS
+    });
+
+    stopLiveQuotes();
+    document.getElementById('loadingSpinner').style.display = 'block';
+    document.getElementById('welcomeMessage').style.display = 'none';
+    document.getElementById('statisticsPanel').style.display = 'none';
+    document.getElementById('aiInsightsPanel').style.display = 'none';
+
+    fetch(`/api/watchlists/${id}/analysis?${params}`)
+        .then(response => response.json().then(data => {
+            if (!response.ok) throw new Error(data.error);
+            return data;
+        }))
+        .then(data => {
+            document.getElementById('loadingSpinner').style.display = 'none';
+            document.getElementById('statisticsPanel').style.display = 'block';
+            document.getElementById('aiInsightsPanel').style.display = 'block';
+            displayAnalysis(data);
+            currentAnalysisData = data;
+            startLiveQuotes(data);
+        })
+        .catch(error => {
+            console.error('Error opening saved watchlist:', error);
+            alert(`Could not analyze saved watchlist: ${error.message}`);
+            document.getElementById('loadingSpinner').style.display = 'none';
+            document.getElementById('welcomeMessage').style.display = 'block';
+        });
+});
+
 // ============================================
 // ANALYSIS FUNCTIONALITY
 // ============================================
@@ -312,6 +417,8 @@ function analyzeWatchlist() {
         return;
     }
     
+    stopLiveQuotes();
+
     // Show loading, hide other panels
     document.getElementById('loadingSpinner').style.display = 'block';
     document.getElementById('welcomeMessage').style.display = 'none';
@@ -322,7 +429,7 @@ function analyzeWatchlist() {
     
     console.log("Analyzing tickers:", tickers);
     
-    fetch('/api/analyze', {
+    fetch('/api/analyze/stream', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -331,17 +438,21 @@ function analyzeWatchlist() {
             tickers: tickers,
             period: period,
             custom_start: customStart,
-            custom_end: customEnd
+            custom_end: customEnd,
+            chart_format: 'binary',
+            max_points: CHART_MAX_POINTS
         })
     })
-    .then(response => response.json())
+    .then(response => {
+        if (!response.ok || !response.body) {
+            throw new Error('Network response was not ok');
+        }
+        return readAnalysisStream(response.body.getReader());
+    })
     .then(data => {
         console.log("Analysis complete:", data);
         currentAnalysisData = data;
-        displayAnalysis(data);
-        document.getElementById('loadingSpinner').style.display = 'none';
-        document.getElementById('statisticsPanel').style.display = 'block';
-        document.getElementById('aiInsightsPanel').style.display = 'block';
+        startLiveQuotes(data);
     })
     .catch(error => {
         console.error('Error analyzing watchlist:', error);
@@ -351,58 +462,259 @@ function analyzeWatchlist() {
     });
 }
 
+// Read newline-delimited JSON events and render each one as it arrives
+function readAnalysisStream(reader) {
+    const decoder = new TextDecoder();
+    const data = { metrics: [] };
+    let buffer = '';
+
+    function handleLine(line) {
+        if (!line.trim()) return;
+        const message = JSON.parse(line);
+        handleAnalysisEvent(message.event, message.data, data);
+    }
+
+    function pump() {
+        return reader.read().then(({ done, value }) => {
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.forEach(handleLine);
+
+            if (done) {
+                handleLine(buffer);
+                return data;
+            }
+            return pump();
+        });
+    }
+
+    return pump();
+}
+
+function handleAnalysisEvent(event, payload, data) {
+    switch (event) {
+        case 'start':
+            data.date_range = payload.date_range;
+            document.getElementById('metricsTableBody').innerHTML = '';
+            document.getElementById('stockInsights').innerHTML = '<h6 class="mt-3">AI Stock Insights:</h6>';
+            document.getElementById('aiSummary').textContent = 'Generating summary...';
+            break;
+        case 'metric':
+            if (data.metrics.length === 0) {
+                document.getElementById('loadingSpinner').style.display = 'none';
+                document.getElementById('statisticsPanel').style.display = 'block';
+                document.getElementById('aiInsightsPanel').style.display = 'block';
+            }
+            data.metrics.push(payload);
+            appendMetricRow(payload);
+            appendInsightCard(payload);
+            break;
+        case 'correlation_matrix':
+            data.correlation_matrix = payload;
+            createReturnsChart(data.metrics);
+            createScatterChart(data.metrics);
+            createCorrelationMatrix(payload);
+            break;
+        case 'normalized_prices':
+            data.normalized_prices = payload;
+            createNormalizedChart(payload);
+            break;
+        case 'price_data':
+            data.price_data = payload;
+            break;
+        case 'chart_data': {
+            const decoded = decodeChartData(payload);
+            data.normalized_prices = decoded.normalized_prices;
+            data.price_data = decoded.price_data;
+            createNormalizedChart(data.normalized_prices);
+            break;
+        }
+        case 'watchlist_summary':
+            data.watchlist_summary = payload;
+            break;
+        case 'insight': {
+            const metric = data.metrics.find(m => m.ticker === payload.ticker);
+            if (metric) metric.ai_insight = payload.ai_insight;
+            const card = document.querySelector(`.stock-insight-card[data-ticker="${payload.ticker}"] .insight-text`);
+            if (card) card.textContent = payload.ai_insight;
+            break;
+        }
+        case 'ai_summary':
+            data.ai_summary = payload;
+            document.getElementById('aiSummary').textContent = payload;
+            break;
+        case 'error':
+            throw new Error(payload.error);
+    }
+}
+
 // Display analysis results
 function displayAnalysis(data) {
     // Display AI Summary
     document.getElementById('aiSummary').textContent = data.ai_summary;
     
     // Display metrics table
-    const tableBody = document.getElementById('metricsTableBody');
-    tableBody.innerHTML = '';
-    
-    data.metrics.forEach(metric => {
-        const row = document.createElement('tr');
-        row.innerHTML = `
-            <td title="${metric.name}"><strong>${metric.ticker}</strong></td>
-            <td class="${metric.total_return >= 0 ? 'positive-value' : 'negative-value'}">
-                ${metric.total_return >= 0 ? '+' : ''}${metric.total_return.toFixed(2)}%
-            </td>
-            <td class="${metric.annualized_return >= 0 ? 'positive-value' : 'negative-value'}">
-                ${metric.annualized_return >= 0 ? '+' : ''}${metric.annualized_return.toFixed(2)}%
-            </td>
-            <td>${metric.annualized_volatility.toFixed(2)}%</td>
-            <td class="${metric.sharpe_ratio > 1 ? 'positive-value' : ''}">
-                ${metric.sharpe_ratio.toFixed(2)}
-            </td>
-            <td class="negative-value">${metric.max_drawdown.toFixed(2)}%</td>
-            <td>$${metric.start_price.toFixed(2)}</td>
-            <td>$${metric.end_price.toFixed(2)}</td>
-            <td>${metric.days}</td>
-        `;
-        tableBody.appendChild(row);
-    });
+    document.getElementById('metricsTableBody').innerHTML = '';
+    data.metrics.forEach(appendMetricRow);
     
     // Display stock insights
-    const insightsContainer = document.getElementById('stockInsights');
-    insightsContainer.innerHTML = '<h6 class="mt-3">AI Stock Insights:</h6>';
-    
-    data.metrics.forEach(metric => {
-        const div = document.createElement('div');
-        div.className = 'stock-insight-card fade-in';
-        div.innerHTML = `
-            <div class="insight-ticker">${metric.ticker}</div>
-            <p class="insight-text">${metric.ai_insight}</p>
-        `;
-        insightsContainer.appendChild(div);
-    });
+    document.getElementById('stockInsights').innerHTML = '<h6 class="mt-3">AI Stock Insights:</h6>';
+    data.metrics.forEach(appendInsightCard);
     
     // Create visualizations
+    if (data.chart_data) {
+        Object.assign(data, decodeChartData(data.chart_data));
+    }
     createNormalizedChart(data.normalized_prices);
     createReturnsChart(data.metrics);
     createScatterChart(data.metrics);
     createCorrelationMatrix(data.correlation_matrix);
 }
 
+function appendMetricRow(metric) {
+    const row = document.createElement('tr');
+    row.dataset.ticker = metric.ticker;
+    row.innerHTML = `
+        <td title="${metric.name}"><strong>${metric.ticker}</strong></td>
+        <td class="live-total-return ${metric.total_return >= 0 ? 'positive-value' : 'negative-value'}">
+            ${metric.total_return >= 0 ? '+' : ''}${metric.total_return.toFixed(2)}%
+        </td>
+        <td class="${metric.annualized_return >= 0 ? 'positive-value' : 'negative-value'}">
+            ${metric.annualized_return >= 0 ? '+' : ''}${metric.annualized_return.toFixed(2)}%
+        </td>
+        <td>${metric.annualized_volatility.toFixed(2)}%</td>
+        <td class="${metric.sharpe_ratio > 1 ? 'positive-value' : ''}">
+            ${metric.sharpe_ratio.toFixed(2)}
+        </td>
+        <td class="negative-value">${metric.max_drawdown.toFixed(2)}%</td>
+        <td>$${metric.start_price.toFixed(2)}</td>
+        <td class="live-end-price">$${metric.end_price.toFixed(2)}</td>
+        <td>${metric.days}</td>
+    `;
+    document.getElementById('metricsTableBody').appendChild(row);
+}
+
+// ============================================
+// LIVE QUOTES
+// ============================================
+
+// Follow live prices for the analyzed tickers over the same date range
+function startLiveQuotes(data) {
+    stopLiveQuotes();
+    if (!window.EventSource || !data.date_range || data.metrics.length === 0) return;
+
+    const params = new URLSearchParams({
+        tickers: data.metrics.map(m => m.ticker).join(','),
+        period: 'custom',
+        custom_start: data.date_range.start,
+        custom_end: data.date_range.end
+    });
+    liveQuotes = new EventSource(`/api/live?${params}`);
+    liveQuotes.addEventListener('quotes', event => {
+        JSON.parse(event.data).forEach(quote => applyLiveQuote(quote, data));
+    });
+}
+
+function stopLiveQuotes() {
+    if (liveQuotes) {
+        liveQuotes.close();
+        liveQuotes = null;
+    }
+}
+
+function applyLiveQuote(quote, data) {
+    const metric = data.metrics.find(m => m.ticker === quote.ticker);
+    if (metric) {
+        metric.end_price = quote.end_price;
+        metric.total_return = quote.total_return;
+    }
+
+    const row = document.querySelector(`#metricsTableBody tr[data-ticker="${quote.ticker}"]`);
+    if (!row) return;
+
+    const totalReturn = row.querySelector('.live-total-return');
+    totalReturn.textContent = `${quote.total_return >= 0 ? '+' : ''}${quote.total_return.toFixed(2)}%`;
+    totalReturn.classList.toggle('positive-value', quote.total_return >= 0);
+    totalReturn.classList.toggle('negative-value', quote.total_return < 0);
+
+    const endPrice = row.querySelector('.live-end-price');
+    endPrice.textContent = `$${quote.end_price.toFixed(2)}`;
+    endPrice.title = `${quote.change_pct >= 0 ? '+' : ''}${quote.change_pct.toFixed(2)}% since last close`;
+
+    // Restart the highlight animation on every update
+    row.classList.remove('live-updated');
+    void row.offsetWidth;
+    row.classList.add('live-updated');
+}
+
+function appendInsightCard(metric) {
+    const div = document.createElement('div');
+    div.className = 'stock-insight-card fade-in';
+    div.dataset.ticker = metric.ticker;
+    div.innerHTML = `
+        <div class="insight-ticker">${metric.ticker}</div>
+        <p class="insight-text">${metric.ai_insight || 'Generating insight...'}</p>
+    `;
+    document.getElementById('stockInsights').appendChild(div);
+}
+
+// ============================================
+// CHART DATA DECODING
+// ============================================
+
+function base64ToBuffer(text) {
+    const binary = atob(text);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes.buffer;
+}
+
+function decodeChartValues(values, format) {
+    if (format === 'binary') {
+        return new Float32Array(base64ToBuffer(values));
+    }
+    if (format === 'delta') {
+        // Integer hundredths relative to the previous present value
+        let last = 0;
+        return values.map(delta => {
+            if (delta === null) return null;
+            last += delta;
+            return last / 100;
+        });
+    }
+    return values;
+}
+
+// Expand the shared-axis chart payload into the legacy per-ticker shape.
+// All series share a single dates array.
+function decodeChartData(chart) {
+    const deltas = chart.format === 'binary'
+        ? new Uint16Array(base64ToBuffer(chart.axis.deltas))
+        : chart.axis.deltas;
+
+    const dates = [];
+    if (chart.axis.start !== null) {
+        let day = chart.axis.start;
+        dates.push(day);
+        for (let i = 0; i < deltas.length; i++) {
+            day += deltas[i];
+            dates.push(day);
+        }
+    }
+    const isoDates = dates.map(day => new Date(day * 86400000).toISOString().slice(0, 10));
+
+    const normalized_prices = {};
+    const price_data = {};
+    for (const [ticker, series] of Object.entries(chart.series)) {
+        normalized_prices[ticker] = { dates: isoDates, values: decodeChartValues(series.normalized, chart.format) };
+        price_data[ticker] = { dates: isoDates, prices: decodeChartValues(series.prices, chart.format) };
+    }
+    return { normalized_prices, price_data };
+}
+
 // ============================================
 // CHART CREATION
 // ============================================
@@ -0,0 +1,137 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep app.py's on-disk stores out of the repository and its quotes offline
+_STATE = tempfile.mkdtemp(prefix='stockscope-tests-')
+os.environ['PRICE_CACHE_PATH'] = os.path.join(_STATE, 'prices.sqlite3')
+os.environ['SHARED_CACHE_PATH'] = os.path.join(_STATE, 'shared.sqlite3')
+os.environ['WATCHLIST_DB_PATH'] = os.path.join(_STATE, 'watchlists.sqlite3')
+os.environ['ANALYSIS_CACHE_TTL_SECONDS'] = '0'
+os.environ['QUOTE_SOURCE'] = 'fake'
+os.environ['QUOTE_POLL_SECONDS'] = '0.05'
+os.environ['BULK_RATE_PER_SECOND'] = '0'
+os.environ['DOWNLOAD_COALESCE_MS'] = '0'
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+from utils.data_fetcher import DataFetcher  # noqa: E402
+from utils.price_cache import PriceCache  # noqa: E402
+
+START = '2024-01-02'
+
+
+def make_frames(n_tickers, n_days, start=START, seed=0):
+    """Correlated random-walk OHLCV frames on business days, keyed T0000, T0001, ..."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=n_days)
+    market = rng.normal(0, 0.01, size=(n_days, 1))
+    returns = market + rng.normal(0, 0.015, size=(n_days, n_tickers))
+    returns[0] = 0
+    closes = 100 * np.exp(np.cumsum(returns, axis=0))
+
+    frames = {}
+    for i in range(n_tickers):
+        close = closes[:, i]
+        spread = np.abs(rng.normal(0, 0.01, n_days)) * close
+        frames[f'T{i:04d}'] = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.002, n_days)),
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': rng.integers(1_000_000, 10_000_000, n_days).astype(float)
+        }, index=index)
+    return frames
+
+
+class FakeDownloader:
+    """
+    yf.download stand-in over in-memory frames that records every call
+    Returns yfinance's (Price, Ticker) column layout limited to [start, end)
+    """
+
+    def __init__(self, stock_data, delay=0.0):
+        self.stock_data = stock_data
+        self.delay = delay
+        self.error = None
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, tickers, start=None, end=None, **kwargs):
+        names = tickers.split()
+        with self._lock:
+            self.calls.append((tuple(names), start, end))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+
+        frames = {
+            ticker: df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+            for ticker, df in self.stock_data.items() if ticker in names
+        }
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        data.columns.names = ['Price', 'Ticker']
+        return data
+
+
+class StubLLM:
+    """Chat completions client that sleeps `delay` seconds and counts calls"""
+
+    def __init__(self, delay=0.0, reply='Stub insight'):
+        self.delay = delay
+        self.reply = reply
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=self)
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        message = types.SimpleNamespace(content=f"{self.reply}: {messages[-1]['content']}")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def stock_data():
+    return make_frames(6, 300)
+
+
+@pytest.fixture
+def downloader(stock_data):
+    return FakeDownloader(stock_data)
+
+
+@pytest.fixture
+def fetcher(tmp_path, downloader):
+    fetcher = DataFetcher(cache=PriceCache(str(tmp_path / 'prices.sqlite3')), downloader=downloader)
+    fetcher.bulk.backoff = 0
+    return fetcher
+
+
+@pytest.fixture
+def app_module(monkeypatch, downloader):
+    """app.py with the fake downloader, a fresh price cache and AI disabled"""
+    import app
+
+    monkeypatch.setattr(app.data_fetcher, 'downloader', downloader)
+    monkeypatch.setattr(app.data_fetcher, 'cache', PriceCache(os.path.join(tempfile.mkdtemp(dir=_STATE), 'p.sqlite3')))
+    monkeypatch.setattr(app.ai_helper, 'client', None)
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,81 @@
+import time
+
+from conftest import StubLLM
+from utils.ai_helper import AIHelper
+from utils.llm_cache import LLMCache
+
+
+def make_metrics(n):
+    return [
+        {
+            'ticker': f'T{i}', 'total_return': 5.0 * i - 10, 'annualized_volatility': 12.0 + 5 * i,
+            'sharpe_ratio': 0.5 * i - 0.5, 'max_drawdown': -3.0 * i
+        }
+        for i in range(n)
+    ]
+
+
+def make_helper(delay, max_workers=8, deadline=5.0):
+    return AIHelper(None, client=StubLLM(delay), max_workers=max_workers, deadline=deadline,
+                    cache=LLMCache(maxsize=100, ttl=60))
+
+
+def test_insights_run_concurrently():
+    helper = make_helper(delay=0.2)
+    metrics = make_metrics(7)
+
+    start = time.perf_counter()
+    insights, summary = helper.generate_watchlist_insights(metrics)
+    elapsed = time.perf_counter() - start
+
+    # 8 calls of 0.2 s on 8 workers take one round trip, not eight
+    assert elapsed < 0.6
+    assert helper.client.calls == 8
+    assert all(text.startswith('Stub insight') for text in insights)
+    assert summary.startswith('Stub insight')
+
+
+def test_pool_size_bounds_concurrency():
+    helper = make_helper(delay=0.2, max_workers=2)
+
+    start = time.perf_counter()
+    helper.generate_watchlist_insights(make_metrics(3))
+
+    # 4 calls on 2 workers: two rounds
+    assert 0.35 < time.perf_counter() - start < 0.8
+
+
+def test_calls_missing_the_deadline_fall_back_to_rule_based_text():
+    helper = make_helper(delay=1.0, deadline=0.2)
+    metrics = make_metrics(3)
+
+    start = time.perf_counter()
+    insights, summary = helper.generate_watchlist_insights(metrics)
+
+    assert time.perf_counter() - start < 0.5
+    assert insights == [helper._rule_based_insight(m['ticker'], m) for m in metrics]
+    assert summary == helper._rule_based_summary(metrics)
+
+
+def test_results_stay_in_watchlist_order():
+    helper = make_helper(delay=0.05)
+    metrics = make_metrics(5)
+
+    insights, _ = helper.generate_watchlist_insights(metrics)
+
+    for metric, insight in zip(metrics, insights):
+        assert metric['ticker'] in insight
+
+
+def test_failed_calls_fall_back_per_ticker():
+    helper = make_helper(delay=0)
+
+    def fail(**kwargs):
+        raise RuntimeError('HTTP 503')
+    helper.client.create = fail
+    metrics = make_metrics(2)
+
+    insights, summary = helper.generate_watchlist_insights(metrics)
+
+    assert insights == [helper._rule_based_insight(m['ticker'], m) for m in metrics]
+    assert summary == helper._rule_based_summary(metrics)
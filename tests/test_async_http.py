@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from utils import async_http
+from utils.async_http import AsyncHTTPClient
+from utils.data_fetcher import DataFetcher
+
+
+class StubYahoo:
+    """
+    Local HTTP server with scripted answers per path
+    Each path maps to a list of (status, body) popped per request; the last one repeats
+    A status of None drops the connection without answering
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.routes = {}
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                with stub._lock:
+                    stub.requests.append((url.path, parse_qs(url.query)))
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                    answers = stub.routes.get(url.path, [(404, {'error': 'not found'})])
+                    status, body = answers.pop(0) if len(answers) > 1 else answers[0]
+                try:
+                    time.sleep(stub.delay)
+                    if status is None:
+                        self.close_connection = True
+                        return
+                    payload = json.dumps(body).encode()
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def hits(self, path):
+        return sum(1 for p, _ in self.requests if p == path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubYahoo()
+    yield server
+    server.close()
+
+
+@pytest.fixture(params=['requests', 'aiohttp'])
+def http(request, monkeypatch):
+    """A client on each backend; aiohttp only where it is installed"""
+    if request.param == 'aiohttp':
+        pytest.importorskip('aiohttp')
+    monkeypatch.setattr(async_http, 'AIOHTTP_AVAILABLE', request.param == 'aiohttp')
+    client = AsyncHTTPClient(limit_per_host=2, timeout=2, retries=2, backoff=0)
+    yield client
+    client.close()
+
+
+def chart(timestamps):
+    return {'chart': {'result': [{'timestamp': timestamps}] if timestamps is not None else None}}
+
+
+def test_get_json_returns_status_and_body(stub, http):
+    stub.routes['/ok'] = [(200, {'value': 1})]
+
+    response = http.get_json_sync(f'{stub.url}/ok', params={'q': 'x'})
+
+    assert response.ok and response.status == 200
+    assert response.data == {'value': 1}
+    assert stub.requests == [('/ok', {'q': ['x']})]
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_transient_statuses_are_retried(stub, http, status):
+    stub.routes['/flaky'] = [(status, {}), (status, {}), (200, {'value': 2})]
+
+    response = http.get_json_sync(f'{stub.url}/flaky')
+
+    assert response.data == {'value': 2}
+    assert stub.hits('/flaky') == 3
+
+
+def test_dropped_connections_are_retried(stub, http):
+    stub.routes['/dropped'] = [(None, None), (200, {'value': 3})]
+
+    response = http.get_json_sync(f'{stub.url}/dropped')
+
+    assert response.data == {'value': 3}
+    assert stub.hits('/dropped') == 2
+
+
+def test_last_retry_returns_the_error_response(stub, http):
+    stub.routes['/down'] = [(503, {})]
+
+    response = http.get_json_sync(f'{stub.url}/down')
+
+    assert response.status == 503 and not response.ok
+    assert stub.hits('/down') == http.retries + 1
+
+
+def test_client_errors_are_not_retried(stub, http):
+    response = http.get_json_sync(f'{stub.url}/missing')
+
+    assert response.status == 404
+    assert stub.hits('/missing') == 1
+
+
+def test_requests_per_host_are_bounded(stub, http):
+    stub.delay = 0.1
+    stub.routes['/slow'] = [(200, {})]
+
+    async def fetch_all():
+        return await asyncio.gather(*(http.get_json(f'{stub.url}/slow') for _ in range(6)))
+
+    start = time.perf_counter()
+    responses = http.run(fetch_all())
+
+    assert all(r.ok for r in responses)
+    assert stub.max_active == http.limit_per_host
+    # 6 requests, 2 at a time: three rounds of 0.1 s
+    assert time.perf_counter() - start >= 0.3
+
+
+@pytest.fixture
+def fetcher(stub, http):
+    return DataFetcher(cache=False, http=http, yahoo_base_url=stub.url)
+
+
+def test_search_uses_the_yahoo_search_api(stub, fetcher):
+    stub.routes['/v1/finance/search'] = [(200, {'quotes': [
+        {'symbol': 'zzqa', 'longname': 'Zzq Alpha', 'quoteType': 'EQUITY'},
+        {'symbol': 'ZZQF', 'shortname': 'Zzq Fund', 'quoteType': 'MUTUALFUND'},
+    ]})]
+
+    results = fetcher.search_ticker('zzq')
+
+    assert results == [{'ticker': 'ZZQA', 'name': 'Zzq Alpha', 'sector': 'Unknown'}]
+    # A longer query is answered from the complete cached list
+    assert fetcher.search_ticker('zzqa') == results
+    assert stub.hits('/v1/finance/search') == 1
+
+
+def test_search_falls_back_to_a_symbol_check(stub, fetcher):
+    stub.routes['/v1/finance/search'] = [(200, {'quotes': []})]
+    stub.routes['/v8/finance/chart/ZZQB'] = [(200, chart([1700000000]))]
+
+    assert fetcher.search_ticker('zzqb') == [{'ticker': 'ZZQB', 'name': 'ZZQB', 'sector': 'Unknown'}]
+
+
+def test_queries_extending_an_empty_search_skip_yahoo(stub, fetcher):
+    stub.routes['/v1/finance/search'] = [(200, {'quotes': []})]
+
+    for query in ('zzq', 'zzqx', 'zzq xy'):
+        assert fetcher.search_ticker(query) == []
+
+    assert stub.hits('/v1/finance/search') == 1
+    # Only the query Yahoo search was asked about gets a symbol check
+    assert [path for path, _ in stub.requests if path.startswith('/v8/')] == ['/v8/finance/chart/ZZQ']
+
+
+@pytest.mark.parametrize('status, body, valid', [
+    (200, chart([1700000000]), True),
+    (200, chart(None), False),
+    (404, {'chart': {'result': None}}, False),
+])
+def test_definite_symbol_checks_are_cached(stub, fetcher, status, body, valid):
+    stub.routes['/v8/finance/chart/ZZQC'] = [(status, body)]
+
+    assert fetcher.validate_ticker('zzqc') is valid
+    assert fetcher.validate_ticker('ZZQC') is valid
+    assert stub.hits('/v8/finance/chart/ZZQC') == 1
+
+
+@pytest.mark.parametrize('status', [429, 403])
+def test_failed_symbol_checks_are_not_cached(stub, fetcher, status):
+    stub.routes['/v8/finance/chart/ZZQD'] = [(status, {})]
+
+    assert fetcher.validate_ticker('ZZQD') is False
+
+    stub.routes['/v8/finance/chart/ZZQD'] = [(200, chart([1700000000]))]
+    assert fetcher.validate_ticker('ZZQD') is True
+
+
+def test_symbols_are_checked_concurrently(stub, fetcher):
+    stub.delay = 0.1
+    stub.routes['/v8/finance/chart/ZZQA'] = [(200, chart([1700000000]))]
+
+    start = time.perf_counter()
+    assert fetcher.validate_tickers(['ZZQA', 'ZZQB']) == {'ZZQA': True, 'ZZQB': False}
+    assert time.perf_counter() - start < 0.2
@@ -0,0 +1,88 @@
+import threading
+
+from utils.bulk_download import NO_DATA_IN_RANGE, BulkDownloader
+
+
+class ScriptedChunks:
+    """fetch_chunk that records requests, raises for BAD tickers and returns rows for the rest"""
+
+    def __init__(self, empty=False):
+        self.empty = empty
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, tickers, start_date, end_date):
+        with self._lock:
+            self.calls.append(list(tickers))
+        if any(t.startswith('BAD') for t in tickers):
+            raise RuntimeError('HTTP 404')
+        if self.empty:
+            return {}
+        return {t: f'{t} rows' for t in tickers if t != 'QUIET'}
+
+
+def make_bulk(fetch, **kwargs):
+    return BulkDownloader(fetch, rate=0, backoff=0, **kwargs)
+
+
+def test_an_empty_range_is_one_request_without_errors():
+    fetch = ScriptedChunks(empty=True)
+
+    stock_data, failures = make_bulk(fetch, chunk_size=8).download(['A', 'B', 'C', 'D'], '2024-03-02', '2024-03-04')
+
+    assert fetch.calls == [['A', 'B', 'C', 'D']]
+    assert stock_data == {}
+    assert failures == dict.fromkeys(['A', 'B', 'C', 'D'], NO_DATA_IN_RANGE)
+
+
+def test_tickers_missing_from_a_partial_result_are_not_retried():
+    fetch = ScriptedChunks()
+
+    stock_data, failures = make_bulk(fetch).download(['A', 'QUIET'], '2024-01-01', '2024-06-01')
+
+    assert fetch.calls == [['A', 'QUIET']]
+    assert stock_data == {'A': 'A rows'}
+    assert failures == {'QUIET': 'no data returned'}
+
+
+def test_a_failing_symbol_is_isolated_by_bisection():
+    fetch = ScriptedChunks()
+    tickers = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'BAD']
+
+    stock_data, failures = make_bulk(fetch, chunk_size=8, retries=1).download(tickers, '2024-01-01', '2024-06-01')
+
+    assert sorted(stock_data) == ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+    assert failures == {'BAD': 'RuntimeError: HTTP 404'}
+    # 8 -> 4 -> 2 -> 1, the three passing halves, and one retry of BAD
+    assert len(fetch.calls) == 8
+
+
+def test_chunks_are_downloaded_separately():
+    fetch = ScriptedChunks()
+
+    stock_data, failures = make_bulk(fetch, chunk_size=2).download(['A', 'B', 'C', 'D', 'E'], '2024-01-01', '2024-06-01')
+
+    assert sorted(map(tuple, fetch.calls)) == [('A', 'B'), ('C', 'D'), ('E',)]
+    assert len(stock_data) == 5 and failures == {}
+
+
+def test_repeated_errors_stop_further_requests():
+    fetch = ScriptedChunks()
+    tickers = [f'BAD{i}' for i in range(6)]
+
+    _, failures = make_bulk(fetch, chunk_size=1, workers=1, retries=0,
+                            max_consecutive_errors=2).download(tickers, '2024-01-01', '2024-06-01')
+
+    assert len(fetch.calls) == 2
+    assert all(reason.startswith('not attempted') for t, reason in failures.items() if t not in ('BAD0', 'BAD1'))
+
+
+def test_empty_download_is_not_reported_as_an_error(fetcher, downloader):
+    fetcher.fetch_stock_data(['T0000', 'T0001'], '2024-01-02', '2024-03-02')
+
+    # A weekend: yf.download answers with an empty frame
+    result = fetcher.fetch_stock_data(['T0000', 'T0001'], '2024-01-02', '2024-03-04')
+
+    assert len(downloader.calls) == 2
+    assert sorted(result) == ['T0000', 'T0001']
+    assert fetcher.download_failures.get('T0000') == NO_DATA_IN_RANGE
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_frames
+from utils.correlation import CorrelationEngine
+
+
+@pytest.fixture
+def frames():
+    return make_frames(5, 120)
+
+
+def pandas_matrix(frames):
+    returns = pd.concat({t: df['Close'].pct_change() for t, df in frames.items()}, axis=1).iloc[1:]
+    return returns.corr()
+
+
+def assert_matches_pandas(matrix, frames):
+    expected = pandas_matrix(frames)
+    for a in frames:
+        for b in frames:
+            assert matrix[a][b] == pytest.approx(expected.loc[a, b], abs=1e-3), (a, b)
+
+
+def head(frames, days):
+    return {t: df.iloc[:days] for t, df in frames.items()}
+
+
+def test_first_matrix_matches_pandas(frames):
+    assert_matches_pandas(CorrelationEngine().correlation_matrix(frames), frames)
+
+
+def test_new_days_and_tickers_extend_cached_pairs(frames):
+    engine = CorrelationEngine()
+    tickers = list(frames)
+    engine.correlation_matrix({t: frames[t].iloc[:80] for t in tickers[:3]})
+
+    extended = head(frames, 100)
+    assert_matches_pandas(engine.correlation_matrix(extended), extended)
+
+
+def test_revised_last_bar_is_recomputed(frames):
+    engine = CorrelationEngine()
+    partial = head(frames, 100)
+    for ticker, df in partial.items():
+        # The open market's bar is later replaced by the settled close
+        df = df.copy()
+        df.iloc[-1, df.columns.get_loc('Close')] *= 1.05
+        partial[ticker] = df
+    engine.correlation_matrix(partial)
+
+    settled = head(frames, 101)
+    assert_matches_pandas(engine.correlation_matrix(settled), settled)
+
+
+def test_readjusted_history_is_recomputed(frames):
+    engine = CorrelationEngine()
+    engine.correlation_matrix(head(frames, 100))
+
+    adjusted = head(frames, 110)
+    ticker = next(iter(adjusted))
+    df = adjusted[ticker].copy()
+    # A split adjusts the early closes only
+    df.iloc[:50, df.columns.get_loc('Close')] *= np.linspace(0.5, 1.0, 50)
+    adjusted[ticker] = df
+
+    assert_matches_pandas(engine.correlation_matrix(adjusted), adjusted)
+
+
+def test_least_recently_used_tickers_leave_the_cache(frames):
+    engine = CorrelationEngine(max_tickers=3)
+    a, b, c, d, e = frames
+    partial = head(frames, 100)
+    engine.correlation_matrix({t: partial[t] for t in (a, b, c)})
+
+    # Over the limit: the oldest ticker not in the request goes first
+    assert_matches_pandas(engine.correlation_matrix({t: partial[t] for t in (c, d)}), {t: partial[t] for t in (c, d)})
+    window = next(iter(engine._windows.values()))
+    assert list(window.tickers) == [b, c, d]
+    assert window.stats.shape[:2] == (3, 3)
+
+    # A request larger than the limit keeps all of its own tickers
+    assert_matches_pandas(engine.correlation_matrix(partial), partial)
+    assert sorted(window.tickers) == sorted(frames)
+
+    extended = {t: frames[t].iloc[:110] for t in (a, e)}
+    assert_matches_pandas(engine.correlation_matrix(extended), extended)
+    assert list(window.tickers) == [d, a, e]
@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils.live_quotes import LiveQuotePoller, SharedQuotes, SubscriberLimitError, Subscription
+
+BASELINES = {
+    'AAA': {'start_price': 50.0, 'end_price': 100.0},
+    'BBB': {'start_price': 20.0, 'end_price': 25.0},
+}
+
+
+class CountingSource:
+    """Quote source with settable prices that records every fetch"""
+
+    def __init__(self, prices=None):
+        self.prices = dict(prices or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, symbols):
+        with self._lock:
+            self.calls.append(sorted(symbols))
+            return {s: {'price': self.prices[s], 'time': 1} for s in symbols if s in self.prices}
+
+
+@pytest.fixture
+def poller():
+    poller = LiveQuotePoller(CountingSource({'AAA': 110.0, 'BBB': 24.0, 'CCC': 5.0}), interval=60)
+    yield poller
+    poller.stop(timeout=1)
+
+
+def test_one_fetch_covers_every_subscriber(poller):
+    first = poller.subscribe({'AAA': BASELINES['AAA']})
+    second = poller.subscribe({'AAA': BASELINES['AAA'], 'BBB': BASELINES['BBB']})
+    poller.source.calls.clear()
+
+    poller.poll_once()
+
+    assert poller.source.calls == [['AAA', 'BBB']]
+    assert [q['ticker'] for q in first.get(timeout=0)] == ['AAA']
+    assert [q['ticker'] for q in second.get(timeout=0)] == ['AAA', 'BBB']
+
+
+def test_derived_values_use_each_subscribers_baselines(poller):
+    subscription = poller.subscribe(BASELINES)
+    poller.poll_once()
+
+    quotes = {q['ticker']: q for q in subscription.get(timeout=0)}
+
+    assert quotes['AAA']['price'] == 110.0
+    assert quotes['AAA']['total_return'] == 120.0
+    assert quotes['AAA']['change_pct'] == 10.0
+    assert quotes['BBB']['total_return'] == 20.0
+    assert quotes['BBB']['change_pct'] == -4.0
+
+
+def test_only_changed_prices_are_pushed(poller):
+    subscription = poller.subscribe(BASELINES)
+    poller.poll_once()
+    subscription.get(timeout=0)
+
+    poller.source.prices['BBB'] = 26.0
+    assert set(poller.poll_once()) == {'BBB'}
+    assert [q['ticker'] for q in subscription.get(timeout=0)] == ['BBB']
+    assert poller.poll_once() == {}
+
+
+def test_slow_clients_only_see_the_latest_price():
+    subscription = Subscription(BASELINES)
+    for price in (101.0, 102.0, 103.0):
+        subscription.push({'AAA': {'price': price, 'time': 1}})
+
+    assert [q['price'] for q in subscription.get(timeout=0)] == [103.0]
+    assert subscription.get(timeout=0) == []
+
+
+def test_new_subscribers_get_known_prices_straight_away(poller):
+    poller.subscribe(BASELINES)
+    poller.poll_once()
+
+    late = poller.subscribe({'AAA': BASELINES['AAA']})
+
+    assert [q['price'] for q in late.get(timeout=0)] == [110.0]
+
+
+def test_unsubscribed_symbols_are_no_longer_fetched(poller):
+    keep = poller.subscribe({'AAA': BASELINES['AAA']})
+    leave = poller.subscribe(BASELINES)
+    poller.unsubscribe(leave)
+    poller.source.calls.clear()
+
+    poller.poll_once()
+
+    assert poller.source.calls == [['AAA']]
+    assert poller.status()['symbols'] == ['AAA']
+    poller.unsubscribe(keep)
+    assert poller.poll_once() == {}
+
+
+def test_thread_exits_without_subscribers():
+    poller = LiveQuotePoller(CountingSource({'AAA': 110.0}), interval=0.02)
+
+    subscription = poller.subscribe({'AAA': BASELINES['AAA']})
+    assert poller.running
+    assert subscription.get(timeout=1)
+
+    poller.unsubscribe(subscription)
+    deadline = time.time() + 1
+    while poller.running and time.time() < deadline:
+        time.sleep(0.01)
+    assert not poller.running
+
+    # The next subscriber starts it again
+    subscription = poller.subscribe({'AAA': BASELINES['AAA']})
+    assert poller.running
+    poller.unsubscribe(subscription)
+    poller.stop(timeout=1)
+
+
+def test_clients_beyond_the_limit_are_turned_away():
+    poller = LiveQuotePoller(CountingSource({'AAA': 110.0}), interval=60, max_subscribers=1)
+    first = poller.subscribe(BASELINES)
+
+    with pytest.raises(SubscriberLimitError):
+        poller.subscribe(BASELINES)
+
+    poller.unsubscribe(first)
+    poller.unsubscribe(poller.subscribe(BASELINES))
+    poller.stop(timeout=1)
+
+
+def test_one_publisher_serves_every_worker(tmp_path):
+    upstream = CountingSource({'AAA': 110.0, 'BBB': 24.0})
+    path = str(tmp_path / 'quotes.sqlite3')
+    publisher = SharedQuotes(upstream, path)
+    other_worker = SharedQuotes(CountingSource(), path)
+
+    # Nothing is published yet; fetching records what each worker follows
+    assert publisher.fetch(['AAA']) == {}
+    assert other_worker.fetch(['BBB']) == {}
+    publisher.publish_once()
+
+    assert upstream.calls == [['AAA', 'BBB']]
+    assert other_worker.fetch(['BBB']) == {'BBB': {'price': 24.0, 'time': 1}}
+    assert other_worker.source.calls == []
+
+
+def test_symbols_nobody_follows_are_no_longer_published(tmp_path):
+    upstream = CountingSource({'AAA': 110.0})
+    shared = SharedQuotes(upstream, str(tmp_path / 'quotes.sqlite3'), ttl=0.05)
+    shared.fetch(['AAA'])
+    shared.publish_once()
+
+    time.sleep(0.1)
+    assert shared.publish_once() == {}
+    assert shared.fetch(['AAA']) == {}
+    assert upstream.calls == [['AAA']]
+
+
+def test_pollers_push_published_quotes(tmp_path):
+    shared = SharedQuotes(CountingSource({'AAA': 110.0}), str(tmp_path / 'quotes.sqlite3'))
+    poller = LiveQuotePoller(shared, interval=60)
+    subscription = poller.subscribe({'AAA': BASELINES['AAA']})
+    poller.poll_once()
+    shared.publish_once()
+
+    poller.poll_once()
+
+    assert [q['price'] for q in subscription.get(timeout=0)] == [110.0]
+    poller.unsubscribe(subscription)
+    poller.stop(timeout=1)
+
+
+def test_live_endpoint_streams_quotes(client, app_module):
+    response = client.get('/api/live?tickers=T0000,T0001&period=custom'
+                          '&custom_start=2024-01-02&custom_end=2024-12-01', buffered=False)
+    events = []
+    for chunk in response.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith('event:'):
+            name, data = text.split('\n')[:2]
+            events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+        if len(events) == 2:
+            break
+    response.close()
+
+    assert events[0] == ('ready', {'tickers': ['T0000', 'T0001'], 'interval': app_module.live_quotes.interval})
+    assert events[1][0] == 'quotes'
+    assert {q['ticker'] for q in events[1][1]} <= {'T0000', 'T0001'}
+
+
+def test_live_endpoint_rejects_missing_tickers(client):
+    assert client.get('/api/live').status_code == 400
+
+
+def test_live_endpoint_is_unavailable_when_full(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.live_quotes, 'max_subscribers', 0)
+
+    response = client.get('/api/live?tickers=T0000&period=custom&custom_start=2024-01-02&custom_end=2024-12-01')
+
+    assert response.status_code == 503
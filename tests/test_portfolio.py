@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from utils.portfolio import PortfolioOptimizer
+
+BODY = {'tickers': ['T0000', 'T0001', 'T0002'], 'period': 'custom',
+        'custom_start': '2024-01-02', 'custom_end': '2024-12-01'}
+
+
+def test_allocations_are_long_only_and_fully_invested(stock_data):
+    result = PortfolioOptimizer.from_stock_data(stock_data).optimize(frontier_points=10)
+
+    for name in ('min_variance', 'max_sharpe', 'risk_parity'):
+        weights = result[name]['weights']
+        assert all(w >= 0 for w in weights.values())
+        assert sum(weights.values()) == pytest.approx(1, abs=1e-3)
+    assert len(result['frontier']) == 10
+    # Minimum variance is the frontier's least volatile point
+    assert result['min_variance']['volatility'] <= min(p['volatility'] for p in result['frontier']) + 0.01
+
+
+def test_flat_prices_are_rejected():
+    returns = np.column_stack([np.random.default_rng(0).normal(0, 0.01, 50), np.zeros(50)])
+
+    with pytest.raises(ValueError, match='FLAT'):
+        PortfolioOptimizer(returns, ['MOVES', 'FLAT'])
+
+
+def test_flat_ticker_is_a_bad_request(client, stock_data):
+    stock_data['T0002']['Close'] = 50.0
+
+    response = client.post('/api/portfolio', json=BODY)
+
+    assert response.status_code == 400
+    assert 'T0002' in response.get_json()['error']
+
+
+def test_portfolio_endpoint(client):
+    response = client.post('/api/portfolio', json={**BODY, 'tickers': BODY['tickers'] + ['NOPE']})
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['tickers'] == BODY['tickers']
+    assert result['missing'] == ['NOPE']
@@ -0,0 +1,129 @@
+import sqlite3
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from utils.price_cache import PriceCache
+
+
+def test_repeat_request_is_served_from_cache(fetcher, downloader, stock_data):
+    first = fetcher.fetch_stock_data(['T0000', 'T0001'], '2024-01-02', '2024-06-01')
+    second = fetcher.fetch_stock_data(['T0000', 'T0001'], '2024-01-02', '2024-06-01')
+
+    assert len(downloader.calls) == 1
+    for ticker in first:
+        pd.testing.assert_frame_equal(first[ticker], second[ticker], check_freq=False)
+        expected = stock_data[ticker][stock_data[ticker].index < '2024-06-01']
+        pd.testing.assert_frame_equal(second[ticker], expected, check_freq=False, check_names=False)
+
+
+def test_only_missing_head_and_tail_are_downloaded(fetcher, downloader):
+    fetcher.fetch_stock_data(['T0000'], '2024-03-01', '2024-06-01')
+    fetcher.fetch_stock_data(['T0000'], '2024-02-01', '2024-07-01')
+
+    assert [(start, end) for _, start, end in downloader.calls] == [
+        ('2024-03-01', '2024-06-01'),
+        ('2024-02-01', '2024-03-01'),
+        ('2024-06-01', '2024-07-01'),
+    ]
+    assert fetcher.cache.get_range('T0000') == ('2024-02-01', '2024-07-01')
+
+
+def days_ago(n):
+    return (date.today() - timedelta(days=n)).strftime('%Y-%m-%d')
+
+
+def test_todays_bar_survives_a_head_and_tail_download(fetcher, downloader, stock_data):
+    today = pd.Timestamp(date.today())
+    for ticker in ('T0000', 'T0001'):
+        df = stock_data[ticker].iloc[:40]
+        stock_data[ticker] = df.set_axis(pd.date_range(end=today, periods=40, freq='D'))
+    tomorrow = days_ago(-1)
+
+    # T0001 then only misses the tail that T0000 shares with it, ahead of T0000's head
+    fetcher.fetch_stock_data(['T0001'], days_ago(39), days_ago(10))
+    fetcher.fetch_stock_data(['T0000'], days_ago(20), days_ago(10))
+    result = fetcher.fetch_stock_data(['T0001', 'T0000'], days_ago(39), tomorrow)
+
+    for ticker in ('T0000', 'T0001'):
+        assert result[ticker].index[-1] == today
+        assert len(result[ticker]) == 40
+    assert fetcher.cache.get_range('T0000') == (days_ago(39), today.strftime('%Y-%m-%d'))
+
+
+def test_tickers_missing_the_same_range_share_one_download(fetcher, downloader):
+    fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-06-01')
+    fetcher.fetch_stock_data(['T0000', 'T0001', 'T0002'], '2024-01-02', '2024-06-01')
+
+    assert downloader.calls[1] == (('T0001', 'T0002'), '2024-01-02', '2024-06-01')
+
+
+def test_least_recently_used_tickers_are_evicted(tmp_path, stock_data):
+    df = stock_data['T0000']
+    cache = PriceCache(str(tmp_path / 'small.sqlite3'), max_bytes=10 ** 9)
+    cache.merge('A', df, '2024-01-02', '2025-01-01')
+    with sqlite3.connect(cache.path) as conn:
+        size = conn.execute("SELECT size FROM prices WHERE ticker = 'A'").fetchone()[0]
+    cache.max_bytes = 2 * size
+
+    cache.merge('B', df, '2024-01-02', '2025-01-01')
+    cache.load('A')
+    cache.merge('C', df, '2024-01-02', '2025-01-01')
+
+    assert cache.get_range('A') is not None
+    assert cache.get_range('B') is None
+    assert cache.get_range('C') is not None
+
+
+def test_failed_download_does_not_mark_days_as_cached(fetcher, downloader):
+    fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-03-01')
+
+    downloader.error = RuntimeError('HTTP 429')
+    during = fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-06-01')
+    assert fetcher.cache.get_range('T0000') == ('2024-01-02', '2024-03-01')
+    # The cached days are still served while the tail cannot be downloaded
+    assert during['T0000'].index[-1] < pd.Timestamp('2024-03-01')
+
+    downloader.error = None
+    after = fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-06-01')
+    assert fetcher.cache.get_range('T0000') == ('2024-01-02', '2024-06-01')
+    assert after['T0000'].index[-1] > pd.Timestamp('2024-05-20')
+
+
+def test_empty_range_is_recorded_as_covered(fetcher, downloader):
+    fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-03-02')
+    # 2024-03-02 and 03-03 are a weekend: the request succeeds without rows
+    fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-03-04')
+    fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-03-04')
+
+    assert len(downloader.calls) == 2
+    assert fetcher.cache.get_range('T0000') == ('2024-01-02', '2024-03-04')
+
+
+def test_stale_history_is_downloaded_again(fetcher, downloader, stock_data):
+    fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-06-01')
+
+    # A split halves every adjusted close
+    stock_data['T0000'] = stock_data['T0000'] * 0.5
+    fetcher.cache.refresh_age = 1e-9
+    refreshed = fetcher.fetch_stock_data(['T0000'], '2024-03-01', '2024-06-01')
+
+    assert downloader.calls[-1] == (('T0000',), '2024-01-02', '2024-06-01')
+    expected = stock_data['T0000']
+    expected = expected[(expected.index >= '2024-03-01') & (expected.index < '2024-06-01')]
+    pd.testing.assert_frame_equal(refreshed['T0000'], expected, check_freq=False, check_names=False)
+
+    fetcher.cache.refresh_age = 3600
+    fetcher.fetch_stock_data(['T0000'], '2024-01-02', '2024-06-01')
+    assert len(downloader.calls) == 2
+
+
+@pytest.mark.parametrize('start, end', [('2024-01-02', '2024-02-01'), ('2024-05-01', '2024-06-01')])
+def test_cached_slices_match_a_direct_download(fetcher, stock_data, start, end):
+    fetcher.fetch_stock_data(['T0003'], '2024-01-02', '2024-06-01')
+    sliced = fetcher.fetch_stock_data(['T0003'], start, end)['T0003']
+
+    expected = stock_data['T0003']
+    expected = expected[(expected.index >= start) & (expected.index < end)]
+    pd.testing.assert_frame_equal(sliced, expected, check_freq=False, check_names=False)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_frames
+from utils.rolling import rolling_metrics, sliding_max_drawdown
+
+
+def brute_force_max_drawdown(closes, window):
+    """Worst fall from the running high of every trailing window, one window at a time"""
+    result = np.full(len(closes), np.nan)
+    for t in range(len(closes)):
+        if np.isnan(closes[t]):
+            continue
+        prices = closes[max(0, t - window + 1):t + 1]
+        prices = prices[~np.isnan(prices)]
+        result[t] = (prices / np.maximum.accumulate(prices) - 1).min() * 100
+    return result
+
+
+def test_a_peak_that_left_the_window_is_not_used():
+    df = pd.DataFrame({'Close': [100, 50, 50, 50, 60, 60.0]}, index=pd.bdate_range('2024-01-02', periods=6))
+
+    _, series = rolling_metrics({'A': df}, window=2)
+
+    assert series['A']['max_drawdown'].tolist() == [0, -50, 0, 0, 0, 0]
+
+
+@pytest.mark.parametrize('window', [2, 3, 5, 20, 63, 400])
+def test_max_drawdown_matches_a_per_window_loop(window):
+    frames = make_frames(4, 250, seed=window)
+    # Gaps and a late listing leave NaNs on the shared date axis
+    frames['T0001'] = frames['T0001'].drop(frames['T0001'].index[40:47])
+    frames['T0002'] = frames['T0002'].iloc[100:]
+
+    dates, series = rolling_metrics(frames, window=window)
+
+    for ticker, df in frames.items():
+        closes = df['Close'].reindex(dates).to_numpy()
+        np.testing.assert_allclose(series[ticker]['max_drawdown'],
+                                   brute_force_max_drawdown(closes, window), atol=1e-9)
+
+
+def test_single_series_and_windows_without_prices():
+    closes = np.array([np.nan, np.nan, 10.0, 5.0, np.nan, 8.0, 4.0])
+
+    result = sliding_max_drawdown(closes, 3)
+
+    assert result[:2].tolist() == [np.inf, np.inf]
+    np.testing.assert_allclose(result[2:], [0, -0.5, -0.5, 0, -0.5])
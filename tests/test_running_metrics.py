@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_incremental import full_values, random_closes, relative_difference
+from utils.calculations import MetricsCalculator
+from utils.prefetch import PrefetchScheduler
+from utils.running_metrics import RunningMetrics
+
+KINDS = ('walk', 'flat', 'cents', 'crash')
+TOLERANCE = 1e-9
+
+
+def random_series(seed, count=8, max_days=80):
+    rng = np.random.default_rng(seed)
+    return [random_closes(rng, KINDS[i % len(KINDS)], int(rng.integers(2, max_days))) for i in range(count)]
+
+
+def frame(closes):
+    return pd.DataFrame({'Close': closes}, index=pd.bdate_range('2024-01-02', periods=len(closes)))
+
+
+def assert_rounded_match(actual, expected):
+    """Metrics rounded to cents may differ by one cent where a tie is broken differently"""
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        if isinstance(value, float) and math.isnan(value):
+            assert math.isnan(actual[name]), name
+        elif isinstance(value, float):
+            assert actual[name] == pytest.approx(value, abs=0.01 + TOLERANCE), name
+        else:
+            assert actual[name] == value, name
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_appending_matches_a_full_recompute_after_every_bar(seed):
+    calculator = MetricsCalculator({})
+    for closes in random_series(seed):
+        state = RunningMetrics('X', closes[0])
+        for k in range(1, len(closes)):
+            state.append(closes[k])
+            assert relative_difference(state.values(), full_values(calculator, closes[:k + 1])) <= TOLERANCE
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_array_built_state_matches_the_appended_one(seed):
+    for closes in random_series(seed):
+        appended = RunningMetrics('X', closes[0])
+        appended.extend(closes[1:])
+        built = RunningMetrics.from_closes('X', closes)
+
+        assert built.days == appended.days
+        assert relative_difference(built.values(), appended.values()) <= TOLERANCE
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_metrics_match_calculate_all_metrics(seed):
+    series = random_series(seed)
+    stock_data = {f'T{i}': frame(closes) for i, closes in enumerate(series)}
+    calculator = MetricsCalculator(stock_data)
+
+    for ticker, df in stock_data.items():
+        running = RunningMetrics.from_closes(ticker, df['Close']).metrics()
+        assert_rounded_match(running, calculator.calculate_all_metrics(ticker))
+
+
+def test_a_single_close_has_no_metrics():
+    assert RunningMetrics('X', 10.0).metrics() is None
+    assert RunningMetrics.from_closes('X', [10.0]).values() is None
+    with pytest.raises(ValueError):
+        RunningMetrics.from_closes('X', [])
+
+
+def test_copies_do_not_share_state():
+    state = RunningMetrics.from_closes('X', [10.0, 11.0, 12.0])
+    clone = state.copy()
+    clone.append(6.0)
+
+    assert state.days == 3 and state.last_price == 12.0
+    assert clone.days == 4 and clone.worst == pytest.approx(-0.5)
+
+
+def test_prefetch_updates_match_a_full_recompute():
+    scheduler = PrefetchScheduler(data_fetcher=None)
+    closes = random_closes(np.random.default_rng(7), 'walk', 200)
+    states = {}
+
+    # Grow the frame a week at a time, revising today's bar before it settles
+    for end in range(100, 200, 7):
+        revised = closes[:end].copy()
+        revised[-1] *= 1.01
+        scheduler._advance(states, 'X', frame(revised))
+        metrics = scheduler._advance(states, 'X', frame(closes[:end]))
+        assert_rounded_match(metrics, MetricsCalculator({'X': frame(closes[:end])}).calculate_all_metrics('X'))
+    assert scheduler.incremental_updates > scheduler.full_updates
+
+    # A dividend adjusts every past close: the state is rebuilt
+    full_updates = scheduler.full_updates
+    adjusted = closes * 0.98
+    metrics = scheduler._advance(states, 'X', frame(adjusted))
+    assert scheduler.full_updates == full_updates + 1
+    assert_rounded_match(metrics, MetricsCalculator({'X': frame(adjusted)}).calculate_all_metrics('X'))
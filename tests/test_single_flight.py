@@ -0,0 +1,158 @@
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.screener import Screener
+from utils.single_flight import DownloadCoalescer, SingleFlight
+
+
+class CountingDownload:
+    """Batch download that sleeps, counts calls and returns one value per ticker"""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = []
+        self.error = None
+        self._lock = threading.Lock()
+
+    def __call__(self, tickers, start_date, end_date):
+        with self._lock:
+            self.calls.append(sorted(tickers))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {t: f'{t}:{start_date}:{end_date}' for t in tickers if t != 'MISSING'}
+
+
+def fetch_concurrently(coalescer, requests):
+    barrier = threading.Barrier(len(requests))
+
+    def run(request):
+        barrier.wait()
+        return coalescer.fetch(*request)
+
+    with ThreadPoolExecutor(len(requests)) as pool:
+        return list(pool.map(run, requests))
+
+
+def test_identical_requests_share_one_download():
+    download = CountingDownload()
+    coalescer = DownloadCoalescer(download, window=0.02)
+
+    results = fetch_concurrently(coalescer, [(['AAA', 'BBB'], '2024-01-01', '2024-06-01')] * 8)
+
+    assert download.calls == [['AAA', 'BBB']]
+    assert all(result == {'AAA': 'AAA:2024-01-01:2024-06-01', 'BBB': 'BBB:2024-01-01:2024-06-01'}
+               for result in results)
+
+
+def test_overlapping_ticker_sets_are_merged_into_one_batch():
+    download = CountingDownload()
+    coalescer = DownloadCoalescer(download, window=0.05)
+
+    results = fetch_concurrently(coalescer, [
+        (['AAA', 'BBB'], '2024-01-01', '2024-06-01'),
+        (['BBB', 'CCC'], '2024-01-01', '2024-06-01'),
+        (['DDD'], '2024-01-01', '2024-06-01'),
+    ])
+
+    assert download.calls == [['AAA', 'BBB', 'CCC', 'DDD']]
+    assert [sorted(result) for result in results] == [['AAA', 'BBB'], ['BBB', 'CCC'], ['DDD']]
+
+
+def test_different_ranges_are_separate_downloads():
+    download = CountingDownload()
+    coalescer = DownloadCoalescer(download, window=0.02)
+
+    fetch_concurrently(coalescer, [
+        (['AAA'], '2024-01-01', '2024-06-01'),
+        (['AAA'], '2024-02-01', '2024-06-01'),
+    ])
+
+    assert len(download.calls) == 2
+
+
+def test_later_requests_start_a_new_download():
+    download = CountingDownload(delay=0)
+    coalescer = DownloadCoalescer(download, window=0)
+
+    coalescer.fetch(['AAA'], '2024-01-01', '2024-06-01')
+    coalescer.fetch(['AAA'], '2024-01-01', '2024-06-01')
+
+    assert len(download.calls) == 2
+
+
+def test_missing_tickers_are_left_out():
+    coalescer = DownloadCoalescer(CountingDownload(delay=0), window=0)
+
+    assert coalescer.fetch(['AAA', 'MISSING'], '2024-01-01', '2024-06-01') == {'AAA': 'AAA:2024-01-01:2024-06-01'}
+
+
+def test_errors_reach_every_waiter():
+    download = CountingDownload()
+    download.error = RuntimeError('HTTP 503')
+    coalescer = DownloadCoalescer(download, window=0.02)
+    request = (['AAA'], '2024-01-01', '2024-06-01')
+    barrier = threading.Barrier(4)
+
+    def run(_):
+        barrier.wait()
+        with pytest.raises(RuntimeError, match='HTTP 503'):
+            coalescer.fetch(*request)
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(run, range(4)))
+    assert len(download.calls) == 1
+
+    # The failed flight is not remembered
+    download.error = None
+    assert coalescer.fetch(*request) == {'AAA': 'AAA:2024-01-01:2024-06-01'}
+
+
+def test_screener_builds_are_shared_per_date_range_only(fetcher, monkeypatch):
+    screener = Screener(fetcher)
+    builds = []
+
+    def slow_build(period, start_date, end_date):
+        builds.append((start_date, end_date))
+        time.sleep(0.2)
+        return types.SimpleNamespace(built_at=time.time())
+    monkeypatch.setattr(screener, '_build', slow_build)
+
+    barrier = threading.Barrier(4)
+
+    def table(date_range):
+        barrier.wait()
+        return screener.table('custom', *date_range)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool:
+        tables = list(pool.map(table, [('2024-01-01', '2024-06-01')] * 2 + [('2023-01-01', '2023-06-01')] * 2))
+
+    assert sorted(builds) == [('2023-01-01', '2023-06-01'), ('2024-01-01', '2024-06-01')]
+    assert tables[0] is tables[1] and tables[2] is tables[3]
+    # The two date ranges were built side by side
+    assert time.perf_counter() - start < 0.35
+
+
+def test_a_failed_flight_raises_for_every_caller():
+    flight = SingleFlight()
+    barrier = threading.Barrier(3)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError('upstream down')
+
+    def run(_):
+        barrier.wait()
+        with pytest.raises(RuntimeError, match='upstream down'):
+            flight.do('key', fail)
+
+    with ThreadPoolExecutor(3) as pool:
+        list(pool.map(run, range(3)))
+    assert len(calls) == 1
@@ -0,0 +1,88 @@
+import json
+import time
+
+from conftest import StubLLM
+
+BODY = {'tickers': ['T0000', 'T0001', 'T0002'], 'period': 'custom',
+        'custom_start': '2024-01-02', 'custom_end': '2024-12-01'}
+
+
+def read_events(response):
+    """Yield (seconds since the request, event, data) as NDJSON lines arrive"""
+    start = time.perf_counter()
+    buffer = b''
+    for chunk in response.response:
+        buffer += chunk if isinstance(chunk, bytes) else chunk.encode()
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                message = json.loads(line)
+                yield time.perf_counter() - start, message['event'], message['data']
+
+
+def test_metrics_arrive_before_slow_ai_calls_finish(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.ai_helper, 'client', StubLLM(delay=0.5))
+
+    response = client.post('/api/analyze/stream', json=BODY, buffered=False)
+    events = list(read_events(response))
+
+    first_metric = next(elapsed for elapsed, name, _ in events if name == 'metric')
+    done = next(elapsed for elapsed, name, _ in events if name == 'done')
+    # Time to first result does not wait for the 0.5 s LLM calls
+    assert first_metric < 0.4
+    assert done >= 0.5
+
+
+def test_a_slow_download_does_not_hold_back_other_metrics(client, app_module, downloader, monkeypatch):
+    # T0000 is in the price cache; T0001 and T0002 are downloaded one per chunk
+    app_module.data_fetcher.fetch_stock_data(['T0000'], BODY['custom_start'], BODY['custom_end'])
+    monkeypatch.setattr(app_module, 'STREAM_CHUNK_SIZE', 1)
+
+    def slow_t0002(tickers, **kwargs):
+        if 'T0002' in tickers.split():
+            time.sleep(0.5)
+        return downloader(tickers, **kwargs)
+    monkeypatch.setattr(app_module.data_fetcher, 'downloader', slow_t0002)
+
+    response = client.post('/api/analyze/stream', json=BODY, buffered=False)
+    arrived = {data['ticker']: elapsed for elapsed, name, data in read_events(response) if name == 'metric'}
+
+    assert sorted(arrived) == BODY['tickers']
+    assert arrived['T0000'] < 0.3 and arrived['T0001'] < 0.3
+    assert arrived['T0002'] >= 0.5
+
+
+def test_events_cover_the_full_analysis(client):
+    response = client.post('/api/analyze/stream', json=BODY, buffered=False)
+    events = [(name, data) for _, name, data in read_events(response)]
+    names = [name for name, _ in events]
+
+    assert names[0] == 'start' and names[-1] == 'done'
+    assert [data['ticker'] for name, data in events if name == 'metric'] == BODY['tickers']
+    for name in ('correlation_matrix', 'chart_data', 'watchlist_summary', 'ai_summary'):
+        assert names.count(name) == 1
+    assert names.index('metric') < names.index('correlation_matrix') < names.index('ai_summary')
+
+
+def test_stream_matches_the_buffered_endpoint(client):
+    streamed = {}
+    response = client.post('/api/analyze/stream', json=BODY, buffered=False)
+    for _, name, data in read_events(response):
+        if name == 'metric':
+            streamed.setdefault('metrics', []).append(data)
+        else:
+            streamed[name] = data
+
+    buffered = client.post('/api/analyze', json=BODY).get_json()
+
+    assert streamed['metrics'] == buffered['metrics']
+    assert streamed['correlation_matrix'] == buffered['correlation_matrix']
+    assert streamed['chart_data'] == buffered['chart_data']
+    assert streamed['watchlist_summary'] == buffered['watchlist_summary']
+
+
+def test_stream_reports_missing_data(client):
+    response = client.post('/api/analyze/stream', json={**BODY, 'tickers': ['NOPE']}, buffered=False)
+    names = [name for _, name, _ in read_events(response)]
+
+    assert names == ['start', 'error']
@@ -0,0 +1,36 @@
+import pytest
+
+from utils.watchlists import WatchlistStore
+
+
+@pytest.fixture
+def store(app_module, monkeypatch, tmp_path):
+    store = WatchlistStore(str(tmp_path / 'watchlists.sqlite3'))
+    monkeypatch.setattr(app_module, 'watchlist_store', store)
+    return store
+
+
+def test_watchlists_are_limited_to_what_the_dashboard_shows(client, store, app_module):
+    limit = app_module.WATCHLIST_MAX_TICKERS
+    tickers = [f'T{i:04d}' for i in range(limit + 1)]
+
+    response = client.post('/api/watchlists', json={'name': 'Too many', 'tickers': tickers})
+    assert response.status_code == 400
+
+    created = client.post('/api/watchlists', json={'name': 'Full', 'tickers': tickers[:limit]})
+    assert created.status_code == 201
+    watchlist_id = created.get_json()['id']
+
+    response = client.put(f'/api/watchlists/{watchlist_id}', json={'tickers': tickers})
+    assert response.status_code == 400
+    assert client.get(f'/api/watchlists/{watchlist_id}').get_json()['tickers'] == tickers[:limit]
+
+
+def test_saved_analysis_covers_the_whole_watchlist(client, store):
+    tickers = ['t0000', 'T0001', 'T0000', 'T0002']
+    watchlist_id = client.post('/api/watchlists', json={'name': 'Mine', 'tickers': tickers}).get_json()['id']
+
+    analysis = client.get(f'/api/watchlists/{watchlist_id}/analysis?period=custom'
+                          '&custom_start=2024-01-02&custom_end=2024-12-01').get_json()
+
+    assert [m['ticker'] for m in analysis['metrics']] == ['T0000', 'T0001', 'T0002']
@@ -1,6 +1,13 @@
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 from dotenv import load_dotenv
 from utils.data_fetcher import DataFetcher
+from utils.llm_cache import LLMCache
+from utils.instrumentation import LLM_FALLBACKS, UPSTREAM_ERRORS, record_cache, timed
+
+logger = logging.getLogger(__name__)
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
 
@@ -9,25 +16,69 @@ try:
     AI_AVAILABLE = True
 except ImportError:
     AI_AVAILABLE = False
-    print("Groq not installed, using rule-based fallback")
+    logger.warning("Groq not installed, using rule-based fallback")
 
 
 class AIHelper:
-    def __init__(self, data_fetcher: DataFetcher):
+    MODEL = "llama-3.1-8b-instant"
+
+    def __init__(self, data_fetcher: DataFetcher, client=None, max_workers=None, deadline=None, cache=None):
+        """
+        client: chat completions client to use instead of building a Groq client
+        cache: LLMCache for responses (default: in-memory, plus disk if LLM_CACHE_PATH is set)
+        max_workers: size of the shared pool used for concurrent insight generation
+        deadline: seconds a whole batch of insights may take before falling back
+        """
         self.data_fetcher = data_fetcher
+        self.max_workers = max_workers or int(os.getenv("AI_MAX_WORKERS", 8))
+        self.deadline = deadline if deadline is not None else float(os.getenv("AI_DEADLINE_SECONDS", 10))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ai-insight")
+        self.cache = cache or LLMCache(
+            maxsize=int(os.getenv("LLM_CACHE_SIZE", 1024)),
+            ttl=float(os.getenv("LLM_CACHE_TTL_SECONDS", 86400)),
+            path=os.getenv("LLM_CACHE_PATH")
+        )
         api_key = os.getenv("OPENAI_API_KEY")   # ✅ FIXED
 
-        if not api_key or not AI_AVAILABLE:
-            print("⚠ AI features disabled — using fallback responses")
+        if client is not None:
+            self.client = client
+        elif not api_key or not AI_AVAILABLE:
+            logger.warning("⚠ AI features disabled — using fallback responses")
             self.client = None
         else:
             try:
-                self.client = Groq(api_key=api_key)
-                print("✓ Groq AI initialized")
+                self.client = Groq(api_key=api_key, timeout=self.deadline)
+                logger.info("✓ Groq AI initialized")
             except Exception as e:
-                print(f"⚠ AI initialization failed: {e}")
+                logger.error("⚠ AI initialization failed: %s", e)
                 self.client = None
 
+    def _complete(self, messages, max_tokens, temperature):
+        """
+        Run a chat completion through the response cache
+        Identical model/messages/sampling parameters are answered from the cache
+        """
+        key = LLMCache.make_key(self.MODEL, messages, max_tokens=max_tokens, temperature=temperature)
+        cached = self.cache.get(key)
+        record_cache('llm', cached is not None)
+        if cached is not None:
+            return cached
+
+        try:
+            with timed('ai'):
+                response = self.client.chat.completions.create(
+                    model=self.MODEL,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+        except Exception:
+            UPSTREAM_ERRORS.inc(upstream='llm')
+            raise
+        content = response.choices[0].message.content.strip()
+        self.cache.set(key, content)
+        return content
+
     # =========================================================
     # 🧠 GENERAL AI CHAT (CAN ANSWER ANYTHING)
     # =========================================================
@@ -45,15 +96,14 @@ class AIHelper:
         lower_msg = message.lower()
         for key in fallback_knowledge:
             if key in lower_msg:
-                print("📚 Using fallback response")
+                logger.debug("📚 Using fallback response")
                 return fallback_knowledge[key]
 
         # 🔹 Use AI if available
         if self.client:
             try:
-                print("🤖 AI GENERAL ASSISTANT ACTIVE")
-                response = self.client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
+                logger.debug("🤖 AI GENERAL ASSISTANT ACTIVE")
+                return self._complete(
                     messages=[
                         {
                             "role": "system",
@@ -68,16 +118,43 @@ class AIHelper:
                     max_tokens=300,
                     temperature=0.7
                 )
-                return response.choices[0].message.content.strip()
             except Exception as e:
-                print("⚠ AI failed:", e)
+                LLM_FALLBACKS.inc(reason='error')
+                logger.warning("⚠ AI failed: %s", e)
 
         return "I'm here to help! Ask me anything about finance, investing, or general knowledge."
 
+    # =========================================================
+    # 📚 CONCEPT EXPLANATIONS
+    # =========================================================
+    def explain_concept(self, concept, context=''):
+        concept = concept.strip()
+        fallback = f"{concept} is a financial metric. Ask the assistant for a beginner-friendly explanation."
+
+        if self.client:
+            try:
+                logger.debug("🤖 AI CONCEPT EXPLANATION")
+                prompt = f"Explain '{concept}' to a beginner investor in two short paragraphs."
+                if context:
+                    prompt += f" Context: {context}"
+                return self._complete(
+                    messages=[
+                        {"role": "system", "content": "You are a patient finance teacher."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=250,
+                    temperature=0.5
+                )
+            except Exception as e:
+                LLM_FALLBACKS.inc(reason='error')
+                logger.warning("⚠ AI failed: %s", e)
+
+        return fallback
+
     # =========================================================
     # 📈 STOCK INSIGHT GENERATOR (UNCHANGED PURPOSE)
     # =========================================================
-    def generate_stock_insight(self, ticker, metrics):
+    def _rule_based_insight(self, ticker, metrics):
         total_return = metrics['total_return']
         volatility = metrics['annualized_volatility']
         sharpe = metrics['sharpe_ratio']
@@ -110,13 +187,15 @@ class AIHelper:
         else:
             sharpe_desc = "below-average risk-adjusted returns"
 
-        insight = f"{ticker} showed {performance} {vol_desc}, delivering {sharpe_desc}."
+        return f"{ticker} showed {performance} {vol_desc}, delivering {sharpe_desc}."
+
+    def generate_stock_insight(self, ticker, metrics):
+        insight = self._rule_based_insight(ticker, metrics)
 
         if self.client:
             try:
-                print("🤖 AI STOCK INSIGHT")
-                response = self.client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
+                logger.debug("🤖 AI STOCK INSIGHT")
+                return self._complete(
                     messages=[
                         {"role": "system", "content": "You are a financial analyst."},
                         {"role": "user", "content": f"Explain this stock performance in one short sentence: {insight}"}
@@ -124,29 +203,31 @@ class AIHelper:
                     max_tokens=60,
                     temperature=0.6
                 )
-                return response.choices[0].message.content.strip()
-            except:
-                pass
+            except Exception as e:
+                LLM_FALLBACKS.inc(reason='error')
+                logger.warning("⚠ AI failed: %s", e)
 
         return insight
 
     # =========================================================
     # 📊 WATCHLIST SUMMARY AI
     # =========================================================
+    def _rule_based_summary(self, metrics_list):
+        avg_return = sum(m['total_return'] for m in metrics_list) / len(metrics_list)
+        avg_volatility = sum(m['annualized_volatility'] for m in metrics_list) / len(metrics_list)
+
+        return f"Your watchlist average return is {avg_return:.1f}% with volatility of {avg_volatility:.1f}%."
+
     def generate_watchlist_summary(self, metrics_list):
         if not metrics_list:
             return "Watchlist analyzed successfully."
 
-        avg_return = sum(m['total_return'] for m in metrics_list) / len(metrics_list)
-        avg_volatility = sum(m['annualized_volatility'] for m in metrics_list) / len(metrics_list)
-
-        summary = f"Your watchlist average return is {avg_return:.1f}% with volatility of {avg_volatility:.1f}%."
+        summary = self._rule_based_summary(metrics_list)
 
         if self.client:
             try:
-                print("🤖 AI WATCHLIST SUMMARY")
-                response = self.client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
+                logger.debug("🤖 AI WATCHLIST SUMMARY")
+                return self._complete(
                     messages=[
                         {"role": "system", "content": "You are a financial advisor."},
                         {"role": "user", "content": summary}
@@ -154,8 +235,66 @@ class AIHelper:
                     max_tokens=100,
                     temperature=0.7
                 )
-                return response.choices[0].message.content.strip()
-            except:
-                pass
+            except Exception as e:
+                LLM_FALLBACKS.inc(reason='error')
+                logger.warning("⚠ AI failed: %s", e)
 
         return summary
+
+    # =========================================================
+    # ⚡ CONCURRENT WATCHLIST INSIGHTS
+    # =========================================================
+    def iter_watchlist_insights(self, metrics_list, deadline=None):
+        """
+        Generate every stock insight and the watchlist summary concurrently
+        on the shared worker pool. The calls are submitted immediately and
+        the returned iterator yields results as they complete. Calls still
+        running when the overall deadline expires fall back to the
+        rule-based text.
+        Yields: (index into metrics_list, insight) pairs, then (None, summary)
+        """
+        deadline = self.deadline if deadline is None else deadline
+        expires_at = time.monotonic() + deadline
+
+        futures = {
+            self._executor.submit(self.generate_stock_insight, m['ticker'], m): i
+            for i, m in enumerate(metrics_list)
+        }
+        futures[self._executor.submit(self.generate_watchlist_summary, metrics_list)] = None
+
+        return self._collect_insights(futures, metrics_list, deadline, expires_at)
+
+    def _collect_insights(self, futures, metrics_list, deadline, expires_at):
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=max(0, expires_at - time.monotonic())):
+                pending.discard(future)
+                yield futures[future], future.result()
+        except TimeoutError:
+            LLM_FALLBACKS.inc(len(pending), reason='deadline')
+            logger.warning("⚠ %d AI calls missed the %ss deadline, using fallback", len(pending), deadline)
+
+        for future in pending:
+            future.cancel()
+            index = futures[future]
+            if index is not None:
+                m = metrics_list[index]
+                yield index, self._rule_based_insight(m['ticker'], m)
+            elif metrics_list:
+                yield None, self._rule_based_summary(metrics_list)
+            else:
+                yield None, "Watchlist analyzed successfully."
+
+    def generate_watchlist_insights(self, metrics_list, deadline=None):
+        """
+        Collect iter_watchlist_insights into a complete result
+        Returns: (list of insights in metrics_list order, summary)
+        """
+        insights = [None] * len(metrics_list)
+        summary = None
+        for index, text in self.iter_watchlist_insights(metrics_list, deadline):
+            if index is None:
+                summary = text
+            else:
+                insights[index] = text
+        return insights, summary
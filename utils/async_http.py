@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+    logger.info("aiohttp not installed, async HTTP falls back to a pooled requests session")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Timeouts and connection failures; aiohttp's (a dropped keep-alive connection,
+# a truncated body) are not OSErrors
+RETRY_ERRORS = (asyncio.TimeoutError, OSError, requests.RequestException)
+if AIOHTTP_AVAILABLE:
+    RETRY_ERRORS += (aiohttp.ClientError,)
+
+
+class HTTPResponse:
+    """Status and parsed JSON body (None if the body was not JSON)"""
+
+    def __init__(self, status, data):
+        self.status = status
+        self.data = data
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+
+class AsyncHTTPClient:
+    """
+    Shared asyncio event loop on a background thread with one keep-alive
+    connection pool for every outgoing JSON request.
+
+    Flask views are synchronous, so they call run(...) to execute a coroutine
+    on the shared loop and wait for its result; several requests can be
+    awaited together with asyncio.gather inside one coroutine.
+
+    Each host gets at most `limit_per_host` concurrent requests. Timeouts,
+    connection errors and 429/5xx responses are retried up to `retries` times
+    with exponential backoff plus jitter.
+
+    Uses aiohttp when installed, otherwise a pooled requests.Session run on
+    the loop's thread pool.
+    """
+
+    def __init__(self, limit_per_host=4, timeout=5.0, retries=2, backoff=0.25, headers=None):
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = headers or {'User-Agent': 'Mozilla/5.0'}
+
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name='async-http', daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the shared loop and return its result"""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout)
+
+    def get_json_sync(self, url, params=None):
+        """Blocking get_json for callers outside the loop"""
+        return self.run(self.get_json(url, params))
+
+    async def get_json(self, url, params=None):
+        """GET a URL and return an HTTPResponse, retrying transient failures"""
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.limit_per_host)
+
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                async with semaphore:
+                    response = await self._get(url, params)
+                if response.status not in RETRY_STATUSES or last_attempt:
+                    return response
+            except RETRY_ERRORS as e:
+                if last_attempt:
+                    raise
+                logger.warning("Retrying %s after error: %s", url, e)
+
+            await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+    async def _get(self, url, params):
+        if AIOHTTP_AVAILABLE:
+            session = self._aiohttp_session()
+            async with session.get(url, params=params) as response:
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError:
+                    data = None
+                return HTTPResponse(response.status, data)
+
+        session = self._requests_session()
+        response = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: session.get(url, params=params, timeout=self.timeout)
+        )
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return HTTPResponse(response.status_code, data)
+
+    def _aiohttp_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit_per_host=self.limit_per_host, keepalive_timeout=60)
+            )
+        return self._session
+
+    def _requests_session(self):
+        if self._session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.limit_per_host)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
+    def close(self):
+        """Close the connection pool and stop the loop"""
+        if self._loop is None:
+            return
+
+        async def close_session():
+            if self._session is not None:
+                result = self._session.close()
+                if asyncio.iscoroutine(result):
+                    await result
+                self._session = None
+
+        self.run(close_session(), timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop = None
+        self._thread = None
+        self._semaphores.clear()
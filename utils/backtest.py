@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+
+from utils.calculations import batch_metrics
+from utils.downsampling import lttb_indices
+from utils.instrumentation import timed
+
+# Rebalance schedules: pandas period codes, or 'D' for every trading day
+FREQUENCIES = ('D', 'W', 'M', 'Q', 'Y')
+
+STRATEGY_DEFAULTS = {
+    'buy_and_hold': {},
+    'rebalance': {'frequency': 'M'},
+    'sma_crossover': {'fast': 50, 'slow': 200},
+    'momentum': {'lookback': 252, 'skip': 21, 'top': 10, 'frequency': 'M'}
+}
+
+
+class Backtester:
+    """
+    Long-only strategy backtests over a whole watchlist at once.
+
+    Closes are aligned once into a (days, tickers) matrix, forward-filled
+    over gaps and NaN before a ticker's first trade. A strategy only decides
+    on which rows it rebalances and to which target weights (the remainder
+    is cash earning nothing); simulate() then values every holding period
+    from price relatives to the last rebalance, so weights drift with prices
+    between trades and no step loops over days:
+
+      buy_and_hold     equal weights on the first day, never traded again
+      rebalance        equal weights restored at the end of every period
+      sma_crossover    1/N of capital in each ticker while its fast moving
+                       average is above the slow one, traded on crossings
+      momentum         equal weights in the top-N tickers by trailing
+                       return (skipping the most recent month) each period
+    """
+
+    def __init__(self, stock_data, initial_capital=10000.0, risk_free_rate=0.02):
+        frames = {ticker: df for ticker, df in stock_data.items() if not df.empty}
+        if not frames:
+            raise ValueError("no price data to backtest")
+
+        self.tickers = list(frames)
+        self.initial_capital = initial_capital
+        self.risk_free_rate = risk_free_rate
+        self.dates, self.closes = _price_matrix(frames)
+        self.listed = np.isfinite(self.closes)
+
+    # ===== Strategies =====
+    # Each returns (rows, targets): sorted rebalance row numbers starting at 0
+    # and a (len(rows), tickers) array of target weights after each rebalance
+
+    def buy_and_hold(self):
+        return np.zeros(1, dtype=np.int64), _equal_weights(self.listed[:1])
+
+    def rebalance(self, frequency='M'):
+        rows = self._schedule(frequency)
+        return rows, _equal_weights(self.listed[rows])
+
+    def sma_crossover(self, fast=50, slow=200):
+        if not 0 < fast < slow:
+            raise ValueError("fast must be positive and shorter than slow")
+        with np.errstate(invalid='ignore'):
+            active = _moving_average(self.closes, fast) > _moving_average(self.closes, slow)
+
+        changed = np.flatnonzero((active[1:] != active[:-1]).any(axis=1)) + 1
+        rows = np.concatenate(([0], changed))
+        sleeves = np.maximum(self.listed[rows].sum(axis=1, keepdims=True), 1)
+        return rows, active[rows] / sleeves
+
+    def momentum(self, lookback=252, skip=21, top=10, frequency='M'):
+        if not 0 <= skip < lookback:
+            raise ValueError("skip must be non-negative and shorter than lookback")
+        if top < 1:
+            raise ValueError("top must be at least 1")
+        rows = self._schedule(frequency)
+
+        # Trailing return from `lookback` to `skip` days before each rebalance
+        scored = rows >= lookback
+        recent, past = self.closes[rows[scored] - skip], self.closes[rows[scored] - lookback]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score = np.where(np.isfinite(recent / past), recent / past, -np.inf)
+
+        top = min(top, len(self.tickers))
+        winners = np.argpartition(-score, top - 1, axis=1)[:, :top]
+        chosen = np.zeros(score.shape, dtype=bool)
+        np.put_along_axis(chosen, winners, True, axis=1)
+        chosen &= np.isfinite(score)
+
+        targets = np.zeros((len(rows), len(self.tickers)))
+        targets[scored] = _equal_weights(chosen)
+        return rows, targets
+
+    # ===== Simulation =====
+
+    def simulate(self, rows, targets, cost_bps=0.0):
+        """
+        Equity curve for a rebalance schedule
+        cost_bps: charged on the traded fraction of the portfolio at each rebalance
+        Returns: (equity array, turnover per rebalance)
+        """
+        n_days = len(self.dates)
+        segment = np.cumsum(np.isin(np.arange(n_days), rows)) - 1
+        # The position held over (t-1, t] was set at the previous day's segment
+        held = np.concatenate(([0], segment[:-1]))
+        start = rows[held]
+        weights = targets[held]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            relative = self.closes / self.closes[start]
+        exposure = np.where(weights > 0, weights * np.nan_to_num(relative), 0.0)
+        value = 1 - weights.sum(axis=1) + exposure.sum(axis=1)
+        value[0] = 1.0
+
+        # Weights have drifted to exposure / value by the time of each rebalance
+        drifted = exposure[rows] / value[rows, None]
+        drifted[0] = 0
+        turnover = np.abs(targets - drifted).sum(axis=1)
+
+        # Capital after each rebalance, then each day's value from its segment's base
+        base = np.cumprod(value[rows] * (1 - cost_bps / 10000 * turnover))
+        equity = base[held] * value
+        equity[rows] = base
+        return equity * self.initial_capital, turnover
+
+    @timed('backtest')
+    def run(self, strategies=None, cost_bps=0.0, max_points=None):
+        """
+        Backtest several strategies on the watchlist
+        strategies: {name: {'type': strategy, **parameters}}, every strategy
+                    with default parameters when omitted
+        max_points: optional LTTB point budget per equity curve
+        Returns: {'equity': {name: {'dates', 'values'}}, 'metrics': [...]}
+        """
+        if strategies is None:
+            strategies = {name: {'type': name} for name in STRATEGY_DEFAULTS}
+
+        curves, turnovers = {}, {}
+        for name, spec in strategies.items():
+            params = dict(spec)
+            kind = params.pop('type', name)
+            if kind not in STRATEGY_DEFAULTS:
+                raise ValueError(f"unknown strategy '{kind}'")
+            rows, targets = getattr(self, kind)(**{**STRATEGY_DEFAULTS[kind], **params})
+            curves[name], turnovers[name] = self.simulate(rows, targets, cost_bps)
+
+        # Equity curves go through the same metrics as ticker prices
+        years = len(self.dates) / 252
+        metrics = []
+        for m in batch_metrics(list(curves), list(curves.values()), self.risk_free_rate):
+            name = m.pop('ticker')
+            m['start_value'] = m.pop('start_price')
+            m['end_value'] = m.pop('end_price')
+            metrics.append({
+                'strategy': name,
+                **m,
+                'rebalances': len(turnovers[name]),
+                'annual_turnover': round(float(turnovers[name].sum() / years * 100), 2)
+            })
+
+        return {
+            'equity': {name: self._series(curve, max_points) for name, curve in curves.items()},
+            'metrics': metrics
+        }
+
+    # ===== Internals =====
+
+    def _schedule(self, frequency):
+        """Row 0 plus the last trading day of every period"""
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"frequency must be one of {', '.join(FREQUENCIES)}")
+        if frequency == 'D':
+            return np.arange(len(self.dates))
+        periods = self.dates.to_period(frequency).asi8
+        ends = np.flatnonzero(periods[1:] != periods[:-1])
+        return np.concatenate(([0], ends[ends > 0]))
+
+    def _series(self, curve, max_points):
+        dates = self.dates
+        if max_points and len(curve) > max_points:
+            positions = (dates - pd.Timestamp('1970-01-01')) // pd.Timedelta(days=1)
+            keep = lttb_indices(positions, curve, max_points)
+            dates, curve = dates[keep], curve[keep]
+        return {
+            'dates': dates.strftime('%Y-%m-%d').tolist(),
+            'values': np.round(curve, 2).tolist()
+        }
+
+
+def _price_matrix(frames):
+    """(dates, closes) with closes forward-filled; NaN only before a ticker's first price"""
+    indexes = [df.index for df in frames.values()]
+    if all(index.equals(indexes[0]) for index in indexes[1:]):
+        dates = indexes[0]
+        closes = np.column_stack([df['Close'].to_numpy(dtype=np.float64) for df in frames.values()])
+    else:
+        aligned = pd.concat({t: df['Close'] for t, df in frames.items()}, axis=1).sort_index()
+        dates, closes = aligned.index, aligned.to_numpy(dtype=np.float64)
+
+    filled = np.where(np.isfinite(closes), np.arange(len(closes))[:, None], 0)
+    np.maximum.accumulate(filled, axis=0, out=filled)
+    closes = closes[filled, np.arange(closes.shape[1])]
+    return pd.DatetimeIndex(dates), closes
+
+
+def _equal_weights(mask):
+    """Row-wise equal weights over True entries (all zero for an empty row)"""
+    counts = mask.sum(axis=1, keepdims=True)
+    return np.divide(mask, counts, out=np.zeros(mask.shape), where=counts > 0)
+
+
+def _moving_average(closes, window):
+    """Trailing simple moving average per column, NaN until `window` prices exist"""
+    valid = np.isfinite(closes)
+    sums = np.cumsum(np.where(valid, closes, 0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts == window, sums / window, np.nan)
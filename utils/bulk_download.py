@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+# Failure reason for tickers of a request that succeeded with no rows at all,
+# e.g. a range that only covers a weekend or holiday
+NO_DATA_IN_RANGE = 'no data in range'
+
+
+class DownloadError(Exception):
+    """A batch download that failed as a whole"""
+
+
+class RateLimiter:
+    """
+    Token bucket shared across threads: up to `burst` calls go through at
+    once, then calls are spaced 1 / rate seconds apart (rate 0: no limit)
+    """
+
+    def __init__(self, rate, burst=8):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Take the token now, going negative reserves the next one to refill
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+class BulkDownloader:
+    """
+    Chunked, parallel batch downloads that isolate bad tickers.
+
+    The ticker list is split into chunks of `chunk_size` that run on up to
+    `workers` threads, each request taking a token from a shared rate limiter. A
+    chunk that fails as a whole is split in half and both halves retried,
+    recursively, so one bad symbol costs about log2(chunk_size) extra
+    requests instead of the whole chunk. A single ticker that still fails
+    is retried `retries` times with backoff before it is reported. Only
+    requests that raise are split or retried; an empty result is an answer.
+
+    After `max_consecutive_errors` failed requests in a row (the upstream is
+    down, not one symbol) the remaining work is reported as failed without
+    being requested.
+    """
+
+    def __init__(self, fetch_chunk, chunk_size=50, workers=4, rate=2.0, burst=8, retries=1,
+                 backoff=0.5, max_consecutive_errors=8):
+        """
+        fetch_chunk: callable(tickers, start_date, end_date) -> {ticker: DataFrame},
+                     raising when the request fails as a whole and returning
+                     {} when it succeeded without rows
+        rate, burst: sustained requests per second across all workers (0 for
+                     no limit) and how many may go out back to back
+        """
+        self.fetch_chunk = fetch_chunk
+        self.chunk_size = max(1, chunk_size)
+        self.workers = max(1, workers)
+        self.limiter = RateLimiter(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_consecutive_errors = max_consecutive_errors
+
+    def download(self, tickers, start_date, end_date):
+        """
+        Returns: (stock_data, failures) where failures maps each ticker that
+        could not be downloaded to the reason
+        """
+        tickers = list(dict.fromkeys(tickers))
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        state = {'consecutive_errors': 0, 'last_error': None, 'lock': threading.Lock()}
+
+        def run(chunk):
+            stock_data, failures = {}, {}
+            self._fetch(chunk, start_date, end_date, stock_data, failures, state)
+            return stock_data, failures
+
+        if len(chunks) <= 1:
+            results = [run(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                    thread_name_prefix='bulk-download') as pool:
+                results = list(pool.map(run, chunks))
+
+        stock_data, failures = {}, {}
+        for chunk_data, chunk_failures in results:
+            stock_data.update(chunk_data)
+            failures.update(chunk_failures)
+        failed = sum(reason != NO_DATA_IN_RANGE for reason in failures.values())
+        if failed:
+            logger.warning("⚠ %d of %d tickers failed to download", failed, len(tickers))
+        return stock_data, failures
+
+    def _fetch(self, tickers, start_date, end_date, stock_data, failures, state, attempt=0):
+        if state['consecutive_errors'] >= self.max_consecutive_errors:
+            reason = f"not attempted after repeated errors: {state['last_error']}"
+            failures.update((t, reason) for t in tickers)
+            return
+
+        self.limiter.wait()
+        try:
+            result = self.fetch_chunk(tickers, start_date, end_date)
+        except Exception as e:
+            error = str(e) if isinstance(e, DownloadError) else f"{type(e).__name__}: {e}"
+            with state['lock']:
+                state['consecutive_errors'] += 1
+                state['last_error'] = error
+
+            if len(tickers) > 1:
+                middle = len(tickers) // 2
+                logger.debug("Chunk of %d failed (%s), bisecting", len(tickers), error)
+                self._fetch(tickers[:middle], start_date, end_date, stock_data, failures, state)
+                self._fetch(tickers[middle:], start_date, end_date, stock_data, failures, state)
+            elif attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+                self._fetch(tickers, start_date, end_date, stock_data, failures, state, attempt + 1)
+            else:
+                failures[tickers[0]] = error
+            return
+
+        with state['lock']:
+            state['consecutive_errors'] = 0
+        stock_data.update(result)
+        reason = 'no data returned' if result else NO_DATA_IN_RANGE
+        failures.update((t, reason) for t in tickers if t not in result)
+
+
+def split_download(data, tickers):
+    """
+    {ticker: OHLCV frame} from a yf.download result, either column layout
+    (group_by='column' gives (Price, Ticker), group_by='ticker' (Ticker, Price))
+    The whole download is copied once into a (tickers, fields, days) array
+    and each ticker's frame is a view of its slice, which is already the
+    layout pandas keeps a float block in; only tickers with missing days
+    are copied when those rows are dropped. Tickers with no prices are left out.
+    """
+    if data.empty:
+        return {}
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        if len(tickers) != 1:
+            logger.warning("⚠ Unexpected column format for multiple tickers")
+            return {}
+        present = list(tickers)
+        values = data[FIELDS].to_numpy(dtype=np.float64).T[None]
+    else:
+        ticker_level = 1 if 'Close' in data.columns.get_level_values(0) else 0
+        available = set(data.columns.get_level_values(ticker_level))
+        present = [t for t in tickers if t in available]
+        if not present:
+            return {}
+
+        days = len(data)
+        if ticker_level == 0:
+            columns = pd.MultiIndex.from_product([present, FIELDS])
+            values = data.reindex(columns=columns).to_numpy(dtype=np.float64)
+            values = values.reshape(days, len(present), len(FIELDS)).transpose(1, 2, 0)
+        else:
+            columns = pd.MultiIndex.from_product([FIELDS, present])
+            values = data.reindex(columns=columns).to_numpy(dtype=np.float64)
+            values = values.reshape(days, len(FIELDS), len(present)).transpose(2, 1, 0)
+    values = np.ascontiguousarray(values)
+
+    complete = np.isfinite(values).all(axis=1)
+    stock_data = {}
+    for i, ticker in enumerate(present):
+        rows = complete[i]
+        if not rows.any():
+            continue
+        if rows.all():
+            stock_data[ticker] = pd.DataFrame(values[i].T, index=data.index, columns=FIELDS, copy=False)
+        else:
+            stock_data[ticker] = pd.DataFrame(values[i][:, rows].T, index=data.index[rows], columns=FIELDS)
+    return stock_data
@@ -1,13 +1,22 @@
+import logging
 import pandas as pd
 import numpy as np
+from utils.chart_encoding import encode_chart_data
+from utils.downsampling import lttb_indices
+from utils.rolling import rolling_metrics
+from utils.instrumentation import timed
 from scipy import stats
 
+logger = logging.getLogger(__name__)
+
 class MetricsCalculator:
-    def __init__(self, stock_data):
+    def __init__(self, stock_data, correlation_engine=None):
         """
         stock_data: Dictionary with ticker as key and dataframe as value
+        correlation_engine: optional CorrelationEngine reusing pair stats across calls
         """
         self.stock_data = stock_data
+        self.correlation_engine = correlation_engine
     
     def calculate_returns(self, df):
         """Calculate daily returns"""
@@ -81,6 +90,7 @@ class MetricsCalculator:
         
         return max_drawdown
     
+    @timed('metrics')
     def calculate_all_metrics(self, ticker):
 
 
@@ -92,9 +102,7 @@ class MetricsCalculator:
         
         if df.empty or len(df) < 2:
             return None
-        print(f"Calculating metrics for {ticker}")
-        print("Dataframe length:", len(df))
-        print(df.head())
+        logger.debug("Calculating metrics for %s (%d rows)", ticker, len(df))
         metrics = {
             'ticker': ticker,
             'total_return': round(self.calculate_total_return(df), 2),
@@ -109,10 +117,55 @@ class MetricsCalculator:
         
         return metrics
     
+    def calculate_all_metrics_batch(self, tickers=None):
+        """
+        Calculate all metrics for many tickers in one vectorized pass
+        Returns the same dicts as calculate_all_metrics, in ticker order,
+        skipping tickers without enough data
+        """
+        if tickers is None:
+            tickers = list(self.stock_data.keys())
+
+        valid = [
+            ticker for ticker in tickers
+            if ticker in self.stock_data and len(self.stock_data[ticker]) >= 2
+        ]
+        closes = [self.stock_data[ticker]['Close'].to_numpy(dtype=float) for ticker in valid]
+        return batch_metrics(valid, closes)
+
+    @staticmethod
+    def calculate_store_metrics(store, tickers=None, start_date=None, end_date=None, chunk_size=256):
+        """
+        Same dicts as calculate_all_metrics_batch, read straight from a ColumnarStore
+        Close slices are memmap views; only chunk_size tickers are packed into
+        memory at a time, so memory use does not grow with the universe
+        """
+        if tickers is None:
+            tickers = store.tickers
+        tickers = [ticker for ticker in tickers if ticker in store]
+
+        metrics = []
+        for i in range(0, len(tickers), chunk_size):
+            valid, closes = [], []
+            for ticker in tickers[i:i + chunk_size]:
+                close = store.series(ticker, 'Close', start_date, end_date)
+                # Days the ticker did not trade on the shared axis (rare) need a copy
+                if np.isnan(close).any():
+                    close = close[~np.isnan(close)]
+                if len(close) >= 2:
+                    valid.append(ticker)
+                    closes.append(close)
+            metrics.extend(batch_metrics(valid, closes))
+        return metrics
+
+    @timed('correlation')
     def calculate_correlation_matrix(self):
         """Calculate correlation matrix between all stocks"""
         if not self.stock_data:
             return None
+
+        if self.correlation_engine is not None:
+            return self.correlation_engine.correlation_matrix(self.stock_data)
         
         # Create a dataframe with all closing prices
         price_data = pd.DataFrame()
@@ -132,16 +185,19 @@ class MetricsCalculator:
         
         return correlation_matrix.round(3).to_dict()
     
-    def get_normalized_prices(self):
+    @timed('chart')
+    def get_normalized_prices(self, max_points=None):
         """
         Get normalized prices (starting at 100) for comparison
+        max_points: optional LTTB point budget per ticker
         Returns: Dictionary with dates and normalized prices for each ticker
         """
         normalized_data = {}
         
         for ticker, df in self.stock_data.items():
             if not df.empty and len(df) > 0:
-                normalized = (df['Close'] / df['Close'].iloc[0]) * 100
+                df = self._downsample(df, max_points)
+                normalized = (df['Close'] / self.stock_data[ticker]['Close'].iloc[0]) * 100
                 normalized_data[ticker] = {
                     'dates': df.index.strftime('%Y-%m-%d').tolist(),
                     'values': normalized.round(2).tolist()
@@ -149,12 +205,17 @@ class MetricsCalculator:
         
         return normalized_data
     
-    def get_price_data(self):
-        """Get actual price data for charts"""
+    @timed('chart')
+    def get_price_data(self, max_points=None):
+        """
+        Get actual price data for charts
+        max_points: optional LTTB point budget per ticker
+        """
         price_data = {}
         
         for ticker, df in self.stock_data.items():
             if not df.empty:
+                df = self._downsample(df, max_points)
                 price_data[ticker] = {
                     'dates': df.index.strftime('%Y-%m-%d').tolist(),
                     'prices': df['Close'].round(2).tolist()
@@ -162,6 +223,45 @@ class MetricsCalculator:
         
         return price_data
     
+    def _downsample(self, df, max_points):
+        """Keep the LTTB-selected rows of a ticker's frame for charting"""
+        if not max_points or len(df) <= max_points:
+            return df
+        positions = (df.index - pd.Timestamp('1970-01-01')) // pd.Timedelta(days=1)
+        return df.iloc[lttb_indices(positions, df['Close'].to_numpy(dtype=float), max_points)]
+    
+    @timed('chart')
+    def get_chart_data(self, fmt='compact', max_points=None):
+        """
+        Get prices and normalized prices on one shared date axis
+        See utils.chart_encoding.encode_chart_data for the formats
+        """
+        return encode_chart_data(self.stock_data, fmt, max_points)
+    
+    @timed('rolling')
+    def get_rolling_metrics(self, window=63, benchmark=None, metrics=None):
+        """
+        Trailing-window metrics on one shared date axis, JSON-ready
+        See utils.rolling.rolling_metrics for the definitions
+        metrics: names to include (default: all available)
+        """
+        dates, series = rolling_metrics(self.stock_data, window, benchmark)
+
+        def to_list(values):
+            return [None if np.isnan(v) else v for v in np.round(values, 4).tolist()]
+
+        return {
+            'dates': dates.strftime('%Y-%m-%d').tolist(),
+            'series': {
+                ticker: {
+                    name: to_list(values)
+                    for name, values in ticker_metrics.items()
+                    if metrics is None or name in metrics
+                }
+                for ticker, ticker_metrics in series.items()
+            }
+        }
+
     def get_watchlist_summary(self, metrics_list):
         """Calculate summary statistics for the entire watchlist"""
         if not metrics_list:
@@ -179,3 +279,70 @@ class MetricsCalculator:
         }
         
         return summary
+
+
+@timed('metrics')
+def batch_metrics(tickers, closes, risk_free_rate=0.02):
+    """
+    Vectorized equivalent of MetricsCalculator.calculate_all_metrics
+    tickers: list of ticker symbols
+    closes: list of 1-D close price arrays (at least 2 prices each)
+    Each series is packed top-aligned into one (T, N) array padded with NaN,
+    so every ticker keeps its own trading days exactly like the per-ticker path
+    """
+    if not tickers:
+        return []
+
+    lengths = np.array([len(c) for c in closes])
+    prices = np.full((lengths.max(), len(closes)), np.nan)
+    for i, c in enumerate(closes):
+        prices[:len(c), i] = c
+
+    columns = np.arange(len(closes))
+    start_prices = prices[0]
+    end_prices = prices[lengths - 1, columns]
+
+    total_return = (end_prices - start_prices) / start_prices * 100
+    years = lengths / 252
+    annualized_return = ((1 + total_return / 100) ** (1 / years) - 1) * 100
+
+    # Daily returns are computed once and shared by every metric below
+    returns = prices[1:] / prices[:-1] - 1
+    valid = ~np.isnan(returns)
+    counts = lengths - 1
+    daily_rf = (1 + risk_free_rate) ** (1 / 252) - 1
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volatility = _masked_std(returns, valid, counts) * np.sqrt(252) * 100
+
+        excess_returns = returns - daily_rf
+        excess_mean = np.where(valid, excess_returns, 0).sum(axis=0) / counts
+        excess_std = _masked_std(excess_returns, valid, counts)
+        sharpe = np.where(excess_std == 0, 0, excess_mean / excess_std * np.sqrt(252))
+
+        cumulative = np.cumprod(1 + returns, axis=0)
+        running_max = np.maximum.accumulate(cumulative, axis=0)
+        drawdown = np.where(valid, (cumulative - running_max) / running_max, np.inf)
+        max_drawdown = drawdown.min(axis=0) * 100
+
+    return [
+        {
+            'ticker': ticker,
+            'total_return': round(float(total_return[i]), 2),
+            'annualized_return': round(float(annualized_return[i]), 2),
+            'annualized_volatility': round(float(volatility[i]), 2),
+            'sharpe_ratio': round(float(sharpe[i]), 2),
+            'max_drawdown': round(float(max_drawdown[i]), 2),
+            'start_price': round(float(start_prices[i]), 2),
+            'end_price': round(float(end_prices[i]), 2),
+            'days': int(lengths[i])
+        }
+        for i, ticker in enumerate(tickers)
+    ]
+
+
+def _masked_std(values, valid, counts):
+    """Sample standard deviation (ddof=1) per column over the valid rows"""
+    mean = np.where(valid, values, 0).sum(axis=0) / counts
+    deviations = np.where(valid, values - mean, 0)
+    return np.sqrt((deviations ** 2).sum(axis=0) / (counts - 1))
@@ -0,0 +1,96 @@
+import base64
+
+import numpy as np
+import pandas as pd
+
+from utils.downsampling import lttb_indices
+
+CHART_FORMATS = ('legacy', 'compact', 'delta', 'binary')
+
+EPOCH = pd.Timestamp('1970-01-01')
+
+
+def encode_chart_data(stock_data, fmt='compact', max_points=None):
+    """
+    Encode Close prices and normalized prices (base 100) for every ticker
+    against one shared date axis instead of a dates list per series.
+
+    fmt:
+      'compact' - JSON numbers rounded to 2 decimals, null where a ticker has no bar
+      'delta'   - values as integer hundredths, each relative to the previous bar
+      'binary'  - base64 little-endian float32 arrays (NaN where missing)
+
+    max_points: if set, the shared axis is downsampled to this many dates with
+    LTTB over all normalized series at once, so every series keeps the same axis
+
+    Returns:
+      {
+        'format': fmt,
+        'axis': {'start': epoch day, 'deltas': day gaps between consecutive bars},
+        'series': {ticker: {'prices': ..., 'normalized': ...}}
+      }
+    """
+    if fmt not in CHART_FORMATS or fmt == 'legacy':
+        raise ValueError(f"Unsupported chart format: {fmt}")
+
+    frames = {ticker: df for ticker, df in stock_data.items() if not df.empty}
+    if not frames:
+        return {'format': fmt, 'axis': {'start': None, 'deltas': []}, 'series': {}}
+
+    axis = frames[next(iter(frames))].index
+    for df in frames.values():
+        if not df.index.equals(axis):
+            axis = axis.union(df.index)
+
+    epoch_days = ((axis - EPOCH) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+
+    prices = np.empty((len(axis), len(frames)))
+    for i, df in enumerate(frames.values()):
+        close = df['Close']
+        if not df.index.equals(axis):
+            close = close.reindex(axis)
+        prices[:, i] = close.to_numpy(dtype=np.float64)
+
+    first = pd.DataFrame(prices).bfill().to_numpy()[0]
+    normalized = prices / first * 100
+
+    if max_points and len(axis) > max_points:
+        keep = lttb_indices(epoch_days, normalized, max_points)
+        epoch_days, prices, normalized = epoch_days[keep], prices[keep], normalized[keep]
+
+    gaps = np.diff(epoch_days)
+    series = {
+        ticker: {
+            'prices': _encode_values(prices[:, i], fmt),
+            'normalized': _encode_values(normalized[:, i], fmt)
+        }
+        for i, ticker in enumerate(frames)
+    }
+
+    return {
+        'format': fmt,
+        'axis': {
+            'start': int(epoch_days[0]),
+            'deltas': _b64(gaps.astype('<u2')) if fmt == 'binary' else gaps.tolist()
+        },
+        'series': series
+    }
+
+
+def _encode_values(values, fmt):
+    if fmt == 'binary':
+        return _b64(values.astype('<f4'))
+
+    hundredths = np.round(values * 100)
+    if fmt == 'compact':
+        return [None if np.isnan(v) else v / 100 for v in hundredths.tolist()]
+
+    # delta: first value absolute, then differences from the last present value
+    present = ~np.isnan(hundredths)
+    filled = pd.Series(hundredths).ffill().fillna(0).to_numpy()
+    deltas = np.diff(filled, prepend=0)
+    return [int(d) if ok else None for d, ok in zip(deltas.tolist(), present.tolist())]
+
+
+def _b64(array):
+    return base64.b64encode(array.tobytes()).decode('ascii')
@@ -0,0 +1,131 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+EPOCH = pd.Timestamp('1970-01-01')
+
+# Close feeds every metric so it keeps full precision; the rest are display-only
+DEFAULT_FIELDS = {
+    'Close': 'float64',
+    'Open': 'float32',
+    'High': 'float32',
+    'Low': 'float32',
+    'Volume': 'float32'
+}
+
+
+class ColumnarStore:
+    """
+    On-disk price store with one contiguous array per field, memory-mapped.
+
+    Layout of the store directory:
+      meta.json    tickers (row order) and field dtypes
+      dates.npy    int64 epoch days, the date axis shared by every ticker
+      <Field>.npy  (tickers, dates) array, NaN where a ticker has no bar
+
+    Arrays are ticker-major, so one ticker's history over any date range is
+    a contiguous slice of the mapped file. Reading it copies nothing and
+    only the pages touched are loaded, so resident memory depends on what a
+    request reads, not on how many tickers are stored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.tickers = meta['tickers']
+        self.fields = meta['fields']
+        self.rows = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._days = np.load(os.path.join(path, 'dates.npy'), mmap_mode='r')
+        self._arrays = {}
+
+    @classmethod
+    def build(cls, path, stock_data, fields=None):
+        """
+        Write {ticker: DataFrame} to a new store at path (replacing any
+        existing one) and return it opened. Tickers are written one at a
+        time, so the full matrix is never held in memory.
+        """
+        fields = dict(fields or DEFAULT_FIELDS)
+        frames = {ticker: df for ticker, df in stock_data.items() if not df.empty}
+        os.makedirs(path, exist_ok=True)
+
+        axis = pd.DatetimeIndex([])
+        for df in frames.values():
+            axis = axis.union(df.index)
+        days = ((axis - EPOCH) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+        np.save(os.path.join(path, 'dates.npy'), days)
+
+        for field, dtype in fields.items():
+            array = np.lib.format.open_memmap(
+                os.path.join(path, f'{field}.npy'), mode='w+', dtype=dtype,
+                shape=(len(frames), len(days))
+            )
+            for i, df in enumerate(frames.values()):
+                column = df[field] if field in df else pd.Series(np.nan, index=df.index)
+                array[i] = column.reindex(axis).to_numpy(dtype=dtype)
+            array.flush()
+            del array
+
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'tickers': list(frames), 'fields': fields}, f)
+
+        return cls(path)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.rows
+
+    @property
+    def dates(self):
+        return EPOCH + pd.to_timedelta(np.asarray(self._days), unit='D')
+
+    def array(self, field):
+        """The whole (tickers, dates) memmap for a field"""
+        if field not in self._arrays:
+            if field not in self.fields:
+                raise KeyError(f"Field not in store: {field}")
+            self._arrays[field] = np.load(os.path.join(self.path, f'{field}.npy'), mmap_mode='r')
+        return self._arrays[field]
+
+    def date_slice(self, start_date=None, end_date=None):
+        """Columns for [start_date, end_date) (end exclusive, like yf.download)"""
+        start = 0 if start_date is None else np.searchsorted(self._days, _epoch_day(start_date))
+        end = len(self._days) if end_date is None else np.searchsorted(self._days, _epoch_day(end_date))
+        return slice(int(start), int(end))
+
+    def series(self, ticker, field='Close', start_date=None, end_date=None, trim=True):
+        """
+        Zero-copy view of one ticker's field over a date range
+        trim drops the leading/trailing NaN before listing or after delisting
+        """
+        values = self.array(field)[self.rows[ticker], self.date_slice(start_date, end_date)]
+        if trim:
+            present = np.flatnonzero(~np.isnan(values))
+            values = values[present[0]:present[-1] + 1] if len(present) else values[:0]
+        return values
+
+    def frame(self, ticker, start_date=None, end_date=None, fields=None):
+        """A DataFrame for one ticker, shaped like a stock_data entry"""
+        window = self.date_slice(start_date, end_date)
+        data = {
+            field: self.array(field)[self.rows[ticker], window]
+            for field in (fields or self.fields)
+        }
+        df = pd.DataFrame(data, index=self.dates[window])
+        return df.dropna(subset=['Close'] if 'Close' in df else None)
+
+    def stock_data(self, tickers, start_date=None, end_date=None, fields=None):
+        """{ticker: DataFrame} for the stored tickers, like DataFetcher.fetch_stock_data"""
+        return {
+            ticker: self.frame(ticker, start_date, end_date, fields)
+            for ticker in tickers if ticker in self.rows
+        }
+
+
+def _epoch_day(value):
+    return (pd.Timestamp(value) - EPOCH) // pd.Timedelta(days=1)
@@ -0,0 +1,223 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Sufficient statistics kept per ordered pair (x, y), in this order
+N, SX, SY, SXX, SYY, SXY = range(6)
+SWAPPED = [N, SY, SX, SYY, SXX, SXY]
+
+NOT_COMPUTED = np.iinfo(np.int64).min
+
+
+class _Window:
+    """Cached pair stats for the most recently used tickers with one window start date"""
+
+    def __init__(self):
+        # ticker -> position in stats/ends, least recently used first
+        self.tickers = OrderedDict()
+        self.stats = np.zeros((0, 0, 6))
+        self.ends = np.zeros((0, 0), dtype=np.int64)
+        # ticker -> (last date, fingerprint of its returns up to that date)
+        self.fingerprints = {}
+
+    def revised(self, tickers, dates, values, valid):
+        """
+        Mask of tickers whose returns up to their last cached date differ
+        from what the cached stats were built from (a replaced partial bar,
+        re-adjusted history); their pairs must be recomputed
+        """
+        last = dates[-1]
+        revised = np.zeros(len(tickers), dtype=bool)
+        for k, ticker in enumerate(tickers):
+            cached = self.fingerprints.get(ticker)
+            if cached is None:
+                continue
+            end, fingerprint = cached
+            revised[k] = end > last or _fingerprint(dates, values[:, k], valid[:, k], end) != fingerprint
+        return revised
+
+    def remember(self, tickers, dates, values, valid):
+        last = dates[-1]
+        for k, ticker in enumerate(tickers):
+            self.fingerprints[ticker] = (last, _fingerprint(dates, values[:, k], valid[:, k], last))
+
+    def positions(self, tickers, max_tickers):
+        """
+        Positions of the tickers, growing the arrays for unseen ones and first
+        dropping the least recently used others beyond max_tickers
+        """
+        new = [t for t in tickers if t not in self.tickers]
+        excess = len(self.tickers) + len(new) - max_tickers
+        if excess > 0:
+            wanted = set(tickers)
+            self._drop([t for t in self.tickers if t not in wanted][:excess])
+        if new:
+            size = len(self.tickers) + len(new)
+            stats = np.zeros((size, size, 6))
+            ends = np.full((size, size), NOT_COMPUTED, dtype=np.int64)
+            old = len(self.tickers)
+            stats[:old, :old] = self.stats
+            ends[:old, :old] = self.ends
+            self.stats, self.ends = stats, ends
+            for t in new:
+                self.tickers[t] = len(self.tickers)
+        for t in tickers:
+            self.tickers.move_to_end(t)
+        return np.array([self.tickers[t] for t in tickers])
+
+    def _drop(self, tickers):
+        for t in tickers:
+            del self.tickers[t]
+            self.fingerprints.pop(t, None)
+        index = np.array(list(self.tickers.values()), dtype=np.intp)
+        grid = np.ix_(index, index)
+        self.stats, self.ends = self.stats[grid], self.ends[grid]
+        for position, t in enumerate(self.tickers):
+            self.tickers[t] = position
+
+
+class CorrelationEngine:
+    """
+    Correlation matrix of daily returns backed by cached pairwise
+    sufficient statistics (count, sums, sums of squares, cross-products)
+    over the dates both tickers traded.
+
+    Stats are grouped by the first date of the window and remember the
+    last date they include, so for a watchlist seen before:
+    - adding a ticker only computes its column against the others: O(N*T)
+    - new trailing days are added to every pair: O(N^2) per new day
+    - removing a ticker costs nothing
+    Each ticker's returns up to its last cached date are fingerprinted, so
+    pairs are recomputed when earlier rows change (today's partial bar
+    replaced, history re-adjusted) instead of extending stale sums.
+    Results match pandas' pairwise DataFrame.corr() within float tolerance.
+
+    At most max_windows start dates are kept, and per start date the pairs of
+    the max_tickers most recently used tickers (an N^2 array), least recently
+    used first out.
+    """
+
+    def __init__(self, max_windows=16, max_tickers=200):
+        self.max_windows = max_windows
+        self.max_tickers = max_tickers
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def correlation_matrix(self, stock_data):
+        """Return {ticker: {ticker: correlation}} rounded to 3 decimals, or None"""
+        closes = {ticker: df['Close'] for ticker, df in stock_data.items() if not df.empty}
+        if not closes:
+            return None
+
+        returns = pd.concat(
+            {ticker: close.pct_change() for ticker, close in closes.items()},
+            axis=1
+        ).iloc[1:]
+        if returns.empty:
+            return None
+
+        tickers = list(returns.columns)
+        dates = returns.index.as_unit('ns').asi8
+        origin, last = dates[0], dates[-1]
+
+        valid = returns.notna().to_numpy()
+        values = np.where(valid, returns.to_numpy(dtype=np.float64), 0.0)
+
+        with self._lock:
+            window = self._windows.get(origin)
+            if window is None:
+                window = self._windows[origin] = _Window()
+            self._windows.move_to_end(origin)
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+
+            positions = window.positions(tickers, self.max_tickers)
+            grid = np.ix_(positions, positions)
+            stats = window.stats[grid]
+            ends = window.ends[grid]
+
+            revised = window.revised(tickers, dates, values, valid)
+            ends[revised, :] = NOT_COMPUTED
+            ends[:, revised] = NOT_COMPUTED
+            stats = self._update(stats, ends, dates, values, valid)
+
+            window.stats[grid] = stats
+            window.ends[grid] = last
+            window.remember(tickers, dates, values, valid)
+
+        return _to_dict(tickers, stats)
+
+    def _update(self, stats, ends, dates, values, valid):
+        last = dates[-1]
+        missing = (ends == NOT_COMPUTED) | (ends > last)
+        recomputed = np.zeros_like(missing)
+
+        # Missing pairs over the full window. Each pair is computed from the
+        # endpoint that appears in the most missing pairs, so one added ticker
+        # costs a single column against all the others
+        if missing.any():
+            counts = missing.sum(axis=0)
+            prefer_row = counts[:, None] >= counts[None, :]
+            anchors = (missing & prefer_row).any(axis=1) | (missing & ~prefer_row).any(axis=0)
+            columns = np.flatnonzero(anchors)
+
+            block = _pair_stats(values[:, columns], valid[:, columns], values, valid)
+            stats[columns, :] = block
+            stats[:, columns] = block.transpose(1, 0, 2)[..., SWAPPED]
+            recomputed[columns, :] = True
+            recomputed[:, columns] = True
+
+        # Cached pairs whose window gained trailing days: add only the new rows
+        stale = ~recomputed & (ends < last)
+        for end in np.unique(ends[stale]):
+            start = np.searchsorted(dates, end, side='right')
+            block = _pair_stats(values[start:], valid[start:], values[start:], valid[start:])
+            mask = stale & (ends == end)
+            stats[mask] += block[mask]
+
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+
+def _fingerprint(dates, column, column_valid, end):
+    """Digest of one ticker's valid returns and their dates up to end"""
+    rows = column_valid & (dates <= end)
+    digest = hashlib.blake2b(dates[rows].tobytes(), digest_size=16)
+    digest.update(column[rows].tobytes())
+    return digest.digest()
+
+
+def _pair_stats(x, x_valid, y, y_valid):
+    """
+    Stats for every (column of x, column of y) pair over rows where both are valid
+    Returns an (x columns, y columns, 6) array
+    """
+    xm = x_valid.astype(np.float64)
+    ym = y_valid.astype(np.float64)
+
+    # x and y are zero where invalid, so masking one side by the other's validity suffices
+    return np.stack([
+        xm.T @ ym,
+        x.T @ ym,
+        xm.T @ y,
+        (x * x).T @ ym,
+        xm.T @ (y * y),
+        x.T @ y
+    ], axis=-1)
+
+
+def _to_dict(tickers, stats):
+    n, sx, sy, sxx, syy, sxy = np.moveaxis(stats, -1, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denominator = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        matrix = np.clip((n * sxy - sx * sy) / np.sqrt(denominator), -1, 1)
+    matrix[(n < 2) | ~(denominator > 0)] = np.nan
+    np.fill_diagonal(matrix, np.where(np.isnan(np.diag(matrix)), np.nan, 1.0))
+
+    return pd.DataFrame(matrix, index=tickers, columns=tickers).round(3).to_dict()
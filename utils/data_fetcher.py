@@ -2,15 +2,81 @@ import yfinance as yf
 yf.set_tz_cache_location("timezone_cache")
 import pandas as pd
 from datetime import datetime, timedelta
+import hashlib
 import json
 import os
-import requests
+import asyncio
+import logging
+from utils.async_http import AsyncHTTPClient
+from utils.bulk_download import NO_DATA_IN_RANGE, BulkDownloader, DownloadError, split_download
+from utils.price_cache import PriceCache, slice_frame
+from utils.ticker_index import TickerIndex
+from utils.single_flight import DownloadCoalescer
+from utils.ttl_cache import TTLCache
+from utils.instrumentation import UPSTREAM_ERRORS, record_cache, timed
+
+logger = logging.getLogger(__name__)
+
+# Yahoo search returns at most this many quotes; fewer means the list is complete
+SEARCH_QUOTES_COUNT = 10
+
 class DataFetcher:
-    def __init__(self):
+    def __init__(self, cache=None, downloader=None, http=None, yahoo_base_url=None):
+        """
+        cache: PriceCache used to serve already-downloaded days
+               (default: on-disk cache, pass False to disable)
+        downloader: callable with the yf.download signature (default: yf.download)
+        http: AsyncHTTPClient for Yahoo search and symbol checks
+        yahoo_base_url: Yahoo API root (default: YAHOO_BASE_URL or query2.finance.yahoo.com)
+        """
+        self.cache = PriceCache() if cache is None else (cache or None)
+        self.downloader = downloader or yf.download
+        self.http = http or AsyncHTTPClient(
+            limit_per_host=int(os.getenv('HTTP_LIMIT_PER_HOST', 4)),
+            timeout=float(os.getenv('HTTP_TIMEOUT_SECONDS', 5)),
+            retries=int(os.getenv('HTTP_RETRIES', 2))
+        )
+        self.yahoo_base_url = (
+            yahoo_base_url or os.getenv('YAHOO_BASE_URL', 'https://query2.finance.yahoo.com')
+        ).rstrip('/')
+
+        # Symbol checks remember both answers: invalid symbols (typos) expire sooner
+        self.valid_ttl = float(os.getenv('TICKER_VALID_TTL_SECONDS', 86400))
+        self.invalid_ttl = float(os.getenv('TICKER_INVALID_TTL_SECONDS', 3600))
+        self.validation_cache = TTLCache(maxsize=10000, ttl=self.valid_ttl)
+        # Yahoo search results per normalized query: (results, complete)
+        self.search_cache = TTLCache(
+            maxsize=5000, ttl=float(os.getenv('SEARCH_CACHE_TTL_SECONDS', 3600))
+        )
+        # Normalized queries Yahoo search found nothing at all for
+        self.empty_searches = TTLCache(maxsize=5000, ttl=self.search_cache.ttl)
+        # Big ticker lists are split into parallel, rate-limited chunks;
+        # chunks that fail are bisected down to the bad tickers
+        self.bulk = BulkDownloader(
+            self._download_chunk,
+            chunk_size=int(os.getenv('BULK_CHUNK_SIZE', 50)),
+            workers=int(os.getenv('BULK_WORKERS', 4)),
+            rate=float(os.getenv('BULK_RATE_PER_SECOND', 2)),
+            burst=int(os.getenv('BULK_RATE_BURST', 8))
+        )
+        # Why the last download of a ticker failed, for fetch_bulk reports
+        self.download_failures = TTLCache(maxsize=10000, ttl=self.invalid_ttl)
+        # Identical concurrent downloads share one in-flight request
+        self.coalescer = DownloadCoalescer(
+            self._download,
+            window=float(os.getenv('DOWNLOAD_COALESCE_MS', 10)) / 1000
+        )
+
         # Load sector data
         sectors_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'sectors.json')
         with open(sectors_path, 'r') as f:
             self.sectors_data = json.load(f)
+
+        # Index the universe once for name resolution and search
+        self.ticker_index = TickerIndex.from_sectors(self.sectors_data)
+        master_path = os.getenv('TICKER_MASTER_PATH')
+        if master_path:
+            self.ticker_index.load_file(master_path)
     
     def get_sectors(self):
         """Return list of available sectors"""
@@ -24,77 +90,161 @@ class DataFetcher:
         
     def get_company_name(self, ticker):
         """Get company name for a ticker"""
-        for sector, companies in self.sectors_data.items():
-            for company in companies:
-                if company['ticker'] == ticker:
-                    return company['name']
-        return ticker
+        entry = self.ticker_index.get(ticker)
+        return entry['name'] if entry else ticker
     
     def fetch_stock_data(self, tickers, start_date, end_date):
         """
         Fetch historical stock data for multiple tickers
+        Only the head/tail days missing from the local price cache are downloaded,
+        plus the whole range of tickers due for a refresh (see PriceCache.stale)
         Returns: Dictionary with ticker as key and dataframe as value
         """
-        print("=== FETCHING STOCK DATA ===")
-        print("Tickers:", tickers)
-        print("Start:", start_date, "End:", end_date)
+        logger.debug("Fetching %s from %s to %s", tickers, start_date, end_date)
 
-        stock_data = {}
+        if self.cache is None:
+            return self.coalescer.fetch(tickers, start_date, end_date)
 
-        try:
-            data = yf.download(
-                tickers=" ".join(tickers),
-                start=start_date,
-                end=end_date,
-                auto_adjust=True,
-                progress=False,
-                threads=False,
-            )
+        stock_data = {}
 
-            print("Downloaded data type:", type(data))
+        # Group tickers by the range they are missing so each range is one download
+        missing_groups = {}
+        refresh_groups = {}
+        stale = set(self.cache.stale(tickers))
+        for ticker in tickers:
+            covered = self.cache.get_range(ticker) if ticker in stale else None
+            if covered is not None:
+                refresh_range = (min(start_date, covered[0]), max(end_date, covered[1]))
+                refresh_groups.setdefault(refresh_range, []).append(ticker)
+                continue
+            for missing_range in self.cache.missing_ranges(ticker, start_date, end_date):
+                missing_groups.setdefault(missing_range, []).append(ticker)
 
-            if data.empty:
-                print("⚠ Yahoo returned empty dataset")
-                return stock_data
+        missed = {ticker for group in missing_groups.values() for ticker in group}
+        refreshed = {ticker for group in refresh_groups.values() for ticker in group}
+        record_cache('price', True, len(set(tickers)) - len(missed) - len(refreshed))
+        record_cache('price', False, len(missed) + len(refreshed))
 
-            # ===== Single ticker =====
-            if len(tickers) == 1:
-                ticker = tickers[0]
+        merged = {}
+        for (range_start, range_end), group in refresh_groups.items():
+            logger.debug("Refreshing %s in %s → %s", group, range_start, range_end)
+            downloaded = self.coalescer.fetch(group, range_start, range_end)
+            # A failed refresh keeps the old rows and is retried on the next request
+            for ticker in group:
+                if ticker in downloaded:
+                    merged[ticker] = self.cache.replace(ticker, downloaded[ticker], range_start, range_end)
 
-                if isinstance(data.columns, pd.MultiIndex):
-                    df = data.xs(ticker, axis=1, level=1)
+        downloads = {}
+        for (range_start, range_end), group in missing_groups.items():
+            logger.debug("Cache miss for %s in %s → %s", group, range_start, range_end)
+            downloaded = self.coalescer.fetch(group, range_start, range_end)
+            for ticker in group:
+                if ticker in downloaded:
+                    df = downloaded[ticker]
+                elif self.download_failures.get(ticker) == NO_DATA_IN_RANGE:
+                    # The request succeeded without rows (a weekend or holiday), so the
+                    # days are known to be empty. Failed downloads leave the range
+                    # uncovered to be retried.
+                    df = None
                 else:
-                    df = data.copy()
+                    continue
+                downloads.setdefault(ticker, []).append((range_start, range_end, df))
 
-                df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-                df.dropna(inplace=True)
+        # Merge each ticker's ranges oldest first: only the last one can hold today's
+        # bar, which is never persisted, so no later merge reloads the frame without it
+        for ticker, ranges in downloads.items():
+            for range_start, range_end, df in sorted(ranges, key=lambda r: r[:2]):
+                # Empty ranges of unknown symbols are never recorded
+                if df is not None or self.cache.get_range(ticker) is not None:
+                    merged[ticker] = self.cache.merge(ticker, df, range_start, range_end)
 
+        for ticker in tickers:
+            if ticker in merged:
+                df = slice_frame(merged[ticker], start_date, end_date)
+            else:
+                df = self.cache.get(ticker, start_date, end_date)
+                if df is None and ticker in missed:
+                    # The missing days could not be downloaded: serve what is cached
+                    cached = self.cache.load(ticker)
+                    df = None if cached is None else slice_frame(cached, start_date, end_date)
+
+            if df is not None and not df.empty:
                 stock_data[ticker] = df
-                print(f"{ticker} dataframe shape:", df.shape)
 
-            # ===== Multiple tickers =====
-            else:
-                if isinstance(data.columns, pd.MultiIndex):
-                    for ticker in tickers:
-                        try:
-                            df = data.xs(ticker, axis=1, level=1).copy()
+        return stock_data
 
-                            df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-                            df.dropna(inplace=True)
+    def needs_download(self, tickers, start_date, end_date):
+        """Tickers fetch_stock_data would download for the range rather than serve from the cache"""
+        if self.cache is None:
+            return list(dict.fromkeys(tickers))
+        stale = set(self.cache.stale(tickers))
+        return [
+            ticker for ticker in dict.fromkeys(tickers)
+            if (ticker in stale and self.cache.get_range(ticker) is not None)
+            or self.cache.missing_ranges(ticker, start_date, end_date)
+        ]
 
-                            print(f"{ticker} dataframe shape:", df.shape)
+    def fetch_bulk(self, tickers, start_date, end_date):
+        """
+        fetch_stock_data plus why tickers are missing
+        Returns: (stock_data, failures) with failures as {ticker: reason}
+        """
+        stock_data = self.fetch_stock_data(tickers, start_date, end_date)
+        failures = {
+            ticker: self.download_failures.get(ticker) or NO_DATA_IN_RANGE
+            for ticker in dict.fromkeys(tickers) if ticker not in stock_data
+        }
+        return stock_data, failures
 
-                            if not df.empty:
-                                stock_data[ticker] = df
+    def data_version(self, tickers):
+        """
+        Token that changes whenever new price rows for the tickers land in the
+        price cache, or None when the cache is disabled
+        """
+        if self.cache is None:
+            return None
+        versions = sorted(self.cache.versions(tickers).items())
+        return hashlib.sha1(json.dumps(versions).encode()).hexdigest()
 
-                        except KeyError:
-                            print(f"No data found for {ticker}")
-                else:
-                    print("⚠ Unexpected column format for multiple tickers")
+    def _download(self, tickers, start_date, end_date):
+        """
+        Download historical data straight from Yahoo Finance
+        Large lists go out as parallel chunks; see utils.bulk_download
+        """
+        stock_data, failures = self.bulk.download(tickers, start_date, end_date)
+        for ticker in stock_data:
+            self.download_failures.delete(ticker)
+        for ticker, reason in failures.items():
+            logger.log(logging.DEBUG if reason == NO_DATA_IN_RANGE else logging.INFO, "No data for %s: %s", ticker, reason)
+            self.download_failures.set(ticker, reason)
+        return stock_data
 
+    def _download_chunk(self, tickers, start_date, end_date):
+        """One yf.download request; raises DownloadError when it fails as a whole, {} when it has no rows"""
+        try:
+            with timed('download'):
+                data = self.downloader(
+                    tickers=" ".join(tickers),
+                    start=start_date,
+                    end=end_date,
+                    auto_adjust=True,
+                    progress=False,
+                    threads=False,
+                    group_by='ticker',
+                )
         except Exception as e:
-            print(f"Yahoo Finance download error: {e}")
+            UPSTREAM_ERRORS.inc(upstream='yahoo_download')
+            logger.error("Yahoo Finance download error: %s", e)
+            raise DownloadError(f"{type(e).__name__}: {e}") from e
 
+        if data is None or data.empty:
+            # Not an error: weekend and holiday tails are legitimately empty
+            logger.debug("No rows for %s in %s → %s", tickers, start_date, end_date)
+            return {}
+
+        stock_data = split_download(data, tickers)
+        for ticker, df in stock_data.items():
+            logger.debug("%s dataframe shape: %s", ticker, df.shape)
         return stock_data
 
     def search_ticker(self, query):
@@ -102,59 +252,144 @@ class DataFetcher:
         if not query:
             return []
 
-        results = []
+        # 🔹 1. Search the local ticker index first
+        results = self.ticker_index.search(query, limit=10)
 
-        # 🔹 1. Search local sectors.json first
-        query_upper = query.upper()
-        for sector, companies in self.sectors_data.items():
-            for company in companies:
-                if query_upper in company['ticker'] or query_upper in company['name'].upper():
-                    results.append({
-                        'ticker': company['ticker'],
-                        'name': company['name'],
-                        'sector': sector
-                    })
-
-        # 🔹 2. Yahoo Finance Search API (if not found locally)
+        # 🔹 2. Yahoo Finance search API, then a direct symbol check
         if not results:
-            try:
-                url = f"https://query2.finance.yahoo.com/v1/finance/search?q={query}&quotesCount=10&newsCount=0"
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                response = requests.get(url, headers=headers, timeout=5)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    quotes = data.get('quotes', [])
-
-                    for quote in quotes:
-                        symbol = quote.get('symbol')
-                        name = quote.get('longname') or quote.get('shortname') or symbol
-                        quote_type = quote.get('quoteType')
-
-                        # Only include stocks and ETFs
-                        if symbol and quote_type in ['EQUITY', 'ETF']:
-                            results.append({
-                                'ticker': symbol.upper(),
-                                'name': name,
-                                'sector': quote.get('sector', 'Unknown')
-                            })
-            except Exception as e:
-                print("Yahoo search API failed:", e)
-
-        # 🔹 3. Final fallback: direct ticker check
-        if not results:
-            try:
-                test = yf.download(query.upper(), period="5d", progress=False, threads=False)
-                if not test.empty:
-                    results.append({
-                        'ticker': query.upper(),
-                        'name': query.upper(),
-                        'sector': 'Unknown'
-                    })
-            except:
-                pass
+            results = self.http.run(self._search_remote(query))
 
         return results[:10]
+
+    async def _search_remote(self, query):
+        try:
+            results = await self.cached_search(query)
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream='yahoo_search')
+            logger.warning("Yahoo search API failed: %s", e)
+            results = []
+
+        # Yahoo search matches symbol prefixes, so no query that extends one it found
+        # nothing for can be a symbol: typing on skips the symbol check too
+        if not results and not self.extends_empty_search(query) and await self.check_ticker(query):
+            results = [{
+                'ticker': query.upper(),
+                'name': query.upper(),
+                'sector': 'Unknown'
+            }]
+        return results
+
+    async def cached_search(self, query):
+        """
+        search_yahoo behind the search cache
+        A longer query whose prefix got a complete (not truncated) result list
+        is answered by filtering that list, so typing never calls Yahoo again
+        """
+        key = normalize_query(query)
+
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            record_cache('ticker_search', True)
+            return list(cached[0])
+
+        for end in range(len(key) - 1, 0, -1):
+            cached = self.search_cache.get(key[:end])
+            if cached is not None and cached[1]:
+                record_cache('ticker_search', True)
+                return [
+                    r for r in cached[0]
+                    if key in r['ticker'].lower() or key in normalize_query(r['name'])
+                ]
+
+        response = await self.search_yahoo(query)
+        record_cache('ticker_search', False)
+        if response is None:
+            return []
+        self.search_cache.set(key, response)
+        if response == ([], True):
+            self.empty_searches.set(key, True)
+        return list(response[0])
+
+    def extends_empty_search(self, query):
+        """True if Yahoo search found nothing at all for a shorter prefix of the query"""
+        key = normalize_query(query)
+        return any(key[:end] in self.empty_searches for end in range(1, len(key)))
+
+    async def search_yahoo(self, query):
+        """
+        Stocks and ETFs matching a query from the Yahoo Finance search API
+        Returns (results, complete), or None if the request failed
+        """
+        response = await self.http.get_json(
+            f"{self.yahoo_base_url}/v1/finance/search",
+            params={'q': query, 'quotesCount': SEARCH_QUOTES_COUNT, 'newsCount': 0}
+        )
+        if not response.ok or not response.data:
+            return None
+
+        quotes = response.data.get('quotes', [])
+        results = []
+        for quote in quotes:
+            symbol = quote.get('symbol')
+            name = quote.get('longname') or quote.get('shortname') or symbol
+            quote_type = quote.get('quoteType')
+
+            # Only include stocks and ETFs
+            if symbol and quote_type in ['EQUITY', 'ETF']:
+                results.append({
+                    'ticker': symbol.upper(),
+                    'name': name,
+                    'sector': quote.get('sector', 'Unknown')
+                })
+        return results, len(quotes) < SEARCH_QUOTES_COUNT
+
+    async def check_ticker(self, ticker):
+        """True if Yahoo has recent daily bars for the symbol (cached both ways)"""
+        symbol = ticker.strip().upper()
+        cached = self.validation_cache.get(symbol)
+        record_cache('ticker_validation', cached is not None)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.http.get_json(
+                f"{self.yahoo_base_url}/v8/finance/chart/{symbol}",
+                params={'range': '5d', 'interval': '1d'}
+            )
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream='yahoo_chart')
+            logger.warning("Ticker check failed for %s: %s", symbol, e)
+            return False
+
+        # Only definite answers are cached: bars, a 404 or a 200 without bars.
+        # Rate limiting (429), other errors and server errors are retried next time.
+        if response.status != 404 and not response.ok:
+            UPSTREAM_ERRORS.inc(upstream='yahoo_chart')
+            logger.warning("Ticker check for %s got HTTP %s", symbol, response.status)
+            return False
+
+        result = ((response.data or {}).get('chart') or {}).get('result') or []
+        valid = bool(response.ok and result and result[0].get('timestamp'))
+        self.validation_cache.set(symbol, valid, self.valid_ttl if valid else self.invalid_ttl)
+        return valid
+
+    def validate_ticker(self, ticker):
+        """Blocking check_ticker for Flask views"""
+        return self.http.run(self.check_ticker(ticker))
+
+    def validate_tickers(self, tickers):
+        """Check several symbols concurrently; returns {ticker: bool}"""
+        async def check_all():
+            return await asyncio.gather(*(self.check_ticker(t) for t in tickers))
+
+        return dict(zip(tickers, self.http.run(check_all())))
+
+    def lookup_cache_stats(self):
+        """Hit/miss counters for the symbol check and search caches"""
+        return {
+            'validation': self.validation_cache.stats(),
+            'search': self.search_cache.stats()
+        }
     
     def get_date_range(self, period):
         """
@@ -178,3 +413,8 @@ class DataFetcher:
             start_date = end_date - timedelta(days=180)
         
         return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+
+
+def normalize_query(query):
+    """Lowercase with whitespace collapsed, used as the search cache key"""
+    return ' '.join(query.lower().split())
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    x: 1-D array of increasing positions (e.g. epoch days)
+    y: 1-D array, or (len(x), k) array to pick one shared set of points
+       for k series at once (triangle areas are summed across series)
+    threshold: number of points to keep
+
+    Returns the sorted indices of the kept points. The first and last
+    points are always kept; NaN gaps are bridged with the neighbouring
+    values for the area computation only.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    if threshold is None or threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    if y.ndim == 1:
+        y = y[:, None]
+    if np.isnan(y).any():
+        y = pd.DataFrame(y).ffill().bfill().fillna(0).to_numpy()
+
+    every = (n - 2) / (threshold - 2)
+    buckets = np.arange(threshold - 2)
+    starts = (buckets * every).astype(np.int64) + 1
+    ends = ((buckets + 1) * every).astype(np.int64) + 1
+
+    # The third triangle vertex is the average of the following bucket;
+    # those averages do not depend on earlier picks, so compute them up front
+    next_ends = np.minimum(((buckets + 2) * every).astype(np.int64) + 1, n)
+    counts = next_ends - ends
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.vstack((np.zeros((1, y.shape[1])), np.cumsum(y, axis=0)))
+    avg_x = (x_sums[next_ends] - x_sums[ends]) / counts
+    avg_y = (y_sums[next_ends] - y_sums[ends]) / counts[:, None]
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+
+    if y.shape[1] == 1:
+        # Buckets are only a few points wide, so plain floats beat numpy calls
+        xs, ys = x.tolist(), y[:, 0].tolist()
+        for i, (start, end, cx, cy) in enumerate(zip(
+                starts.tolist(), ends.tolist(), avg_x.tolist(), avg_y[:, 0].tolist())):
+            xa, ya = xs[a], ys[a]
+            best_area = -1.0
+            for j in range(start, end):
+                area = abs((xa - cx) * (ys[j] - ya) - (xa - xs[j]) * (cy - ya))
+                if area > best_area:
+                    best_area, a = area, j
+            selected[i + 1] = a
+        return selected
+
+    for i in range(len(buckets)):
+        start, end = starts[i], ends[i]
+        area = np.abs(
+            (x[a] - avg_x[i]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end, None]) * (avg_y[i] - y[a])
+        ).sum(axis=1)
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+
+    return selected
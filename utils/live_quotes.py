@@ -0,0 +1,395 @@
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from utils.instrumentation import UPSTREAM_ERRORS, timed
+
+logger = logging.getLogger(__name__)
+
+
+class YahooQuoteSource:
+    """Latest prices from Yahoo's spark endpoint, batched and fetched concurrently"""
+
+    # Symbols the spark endpoint accepts per request
+    BATCH_SIZE = 20
+
+    def __init__(self, http, base_url='https://query2.finance.yahoo.com'):
+        """http: AsyncHTTPClient (shared with DataFetcher)"""
+        self.http = http
+        self.base_url = base_url.rstrip('/')
+
+    def fetch(self, symbols):
+        """Returns: {symbol: {'price', 'time'}} for the symbols Yahoo priced"""
+        return self.http.run(self._fetch_all(list(symbols)))
+
+    async def _fetch_all(self, symbols):
+        batches = [symbols[i:i + self.BATCH_SIZE] for i in range(0, len(symbols), self.BATCH_SIZE)]
+        results = await asyncio.gather(*(self._fetch_batch(b) for b in batches), return_exceptions=True)
+
+        quotes = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                UPSTREAM_ERRORS.inc(upstream='yahoo_spark')
+                logger.warning("Quote request failed for %s: %s", batch, result)
+                continue
+            quotes.update(result)
+        return quotes
+
+    async def _fetch_batch(self, symbols):
+        response = await self.http.get_json(
+            f"{self.base_url}/v7/finance/spark",
+            params={'symbols': ','.join(symbols), 'range': '1d', 'interval': '5m'}
+        )
+        if not response.ok:
+            raise RuntimeError(f"HTTP {response.status}")
+
+        quotes = {}
+        for item in ((response.data or {}).get('spark') or {}).get('result') or []:
+            meta = ((item.get('response') or [{}])[0] or {}).get('meta') or {}
+            price = meta.get('regularMarketPrice')
+            if item.get('symbol') and price is not None:
+                quotes[item['symbol']] = {'price': float(price), 'time': meta.get('regularMarketTime')}
+        return quotes
+
+
+class FakeQuoteSource:
+    """
+    Random-walk quotes for local testing (QUOTE_SOURCE=fake)
+    Each symbol starts from the last close the poller seeds it with
+    """
+
+    def __init__(self, volatility=0.002, seed=None):
+        self.volatility = volatility
+        self.prices = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def seed(self, prices):
+        with self._lock:
+            for symbol, price in prices.items():
+                self.prices.setdefault(symbol, price)
+
+    def fetch(self, symbols):
+        now = int(time.time())
+        with self._lock:
+            for symbol in symbols:
+                price = self.prices.get(symbol, 100.0)
+                self.prices[symbol] = round(price * (1 + self._random.gauss(0, self.volatility)), 4)
+            return {symbol: {'price': self.prices[symbol], 'time': now} for symbol in symbols}
+
+
+class SharedQuotes:
+    """
+    Quote source shared by every worker process on a host through one SQLite file.
+
+    Each worker's LiveQuotePoller fetches from it, which records the symbols
+    the worker follows (for `ttl` seconds) and returns the last published
+    prices. Only the worker that runs the publisher thread (start(), the one
+    holding serve.py's host lock) calls the upstream source: once per
+    interval for the union of every worker's symbols, so the upstream load
+    does not grow with the number of workers.
+    """
+
+    def __init__(self, source, path, interval=5.0, ttl=None):
+        """
+        source: upstream quote source, called by the publisher only
+        ttl: seconds a worker's symbols stay wanted without being fetched again
+        """
+        self.source = source
+        self.path = path
+        self.interval = interval
+        self.ttl = ttl if ttl is not None else max(3 * interval, 15)
+        self._seeds = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS wanted ('
+                'symbol TEXT NOT NULL, pid INTEGER NOT NULL, expires_at REAL NOT NULL, seed REAL, '
+                'PRIMARY KEY (symbol, pid))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS quotes ('
+                'symbol TEXT PRIMARY KEY, price REAL NOT NULL, time INTEGER, updated REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        """A connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def seed(self, prices):
+        """Starting prices, passed on to an upstream source that takes them (FakeQuoteSource)"""
+        with self._lock:
+            self._seeds.update(prices)
+
+    def fetch(self, symbols):
+        """Mark the symbols as wanted by this process and return their published prices"""
+        symbols = list(dict.fromkeys(symbols))
+        expires_at = time.time() + self.ttl
+        pid = os.getpid()
+        with self._lock:
+            self._seeds = {s: self._seeds[s] for s in symbols if s in self._seeds}
+            seeds = dict(self._seeds)
+
+        quotes = {}
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO wanted (symbol, pid, expires_at, seed) VALUES (?, ?, ?, ?)',
+                [(symbol, pid, expires_at, seeds.get(symbol)) for symbol in symbols]
+            )
+            # Stay under SQLite's bound parameter limit
+            for i in range(0, len(symbols), 500):
+                chunk = symbols[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT symbol, price, time FROM quotes WHERE symbol IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                quotes.update((symbol, {'price': price, 'time': t}) for symbol, price, t in rows)
+        return quotes
+
+    def publish_once(self):
+        """Fetch every wanted symbol from the upstream source and store the prices"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM wanted WHERE expires_at <= ?', (now,))
+            conn.execute('DELETE FROM quotes WHERE symbol NOT IN (SELECT symbol FROM wanted)')
+            rows = conn.execute('SELECT symbol, MAX(seed) FROM wanted GROUP BY symbol').fetchall()
+        if not rows:
+            return {}
+
+        if hasattr(self.source, 'seed'):
+            self.source.seed({symbol: seed for symbol, seed in rows if seed is not None})
+        quotes = self.source.fetch([symbol for symbol, _ in rows])
+
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO quotes (symbol, price, time, updated) VALUES (?, ?, ?, ?)',
+                [(symbol, q['price'], q.get('time'), now) for symbol, q in quotes.items()]
+            )
+        return quotes
+
+    def start(self):
+        """Start publishing in this process (no-op if already running)"""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='quote-publisher', daemon=True)
+        self._thread.start()
+        logger.info("✓ Publishing live quotes for every worker")
+        return True
+
+    def stop(self, timeout=None):
+        thread = self._thread
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.publish_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("⚠ Quote publish failed: %s", e)
+            self._stop.wait(self.interval)
+
+
+class SubscriberLimitError(Exception):
+    """The poller already serves its maximum number of clients"""
+
+
+class Subscription:
+    """
+    One client's view of the live quotes: derived values are computed from
+    its own baselines and only the newest update per ticker is kept until
+    the client reads it, so a slow client never queues stale prices
+    """
+
+    def __init__(self, baselines):
+        """baselines: {ticker: {'start_price', 'end_price'}} from the analyzed history"""
+        self.baselines = baselines
+        self._pending = {}
+        self._changed = threading.Condition()
+
+    @property
+    def tickers(self):
+        return list(self.baselines)
+
+    def push(self, quotes):
+        updates = {}
+        for ticker, quote in quotes.items():
+            baseline = self.baselines.get(ticker)
+            if baseline is None:
+                continue
+            price = quote['price']
+            updates[ticker] = {
+                'ticker': ticker,
+                'price': round(price, 2),
+                'end_price': round(price, 2),
+                'total_return': round((price - baseline['start_price']) / baseline['start_price'] * 100, 2),
+                'change_pct': round((price - baseline['end_price']) / baseline['end_price'] * 100, 2),
+                'time': quote.get('time')
+            }
+        if updates:
+            with self._changed:
+                self._pending.update(updates)
+                self._changed.notify_all()
+
+    def get(self, timeout=None):
+        """Wait for updates; returns the pending ones in ticker order (empty on timeout)"""
+        with self._changed:
+            if not self._pending:
+                self._changed.wait(timeout)
+            pending, self._pending = self._pending, {}
+        return [pending[t] for t in self.baselines if t in pending]
+
+
+class LiveQuotePoller:
+    """
+    One background poller for every connected client.
+
+    Each poll requests the union of all subscribed tickers once, keeps the
+    latest quote per symbol and fans out only the prices that changed to
+    the subscriptions that follow them. The thread starts with the first
+    subscriber and exits when the last one leaves.
+
+    Every client holds a server thread for as long as it follows the
+    prices, so at most `max_subscribers` are served at once.
+    """
+
+    def __init__(self, source, interval=5.0, max_subscribers=None):
+        """
+        source: object with fetch(symbols) -> {symbol: {'price', 'time'}}
+        interval: seconds between polls
+        max_subscribers: clients served at once (None for no limit)
+        """
+        self.source = source
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._subscriptions = set()
+        self._symbols = Counter()
+        self._quotes = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.last_poll = None
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, baselines):
+        """Raises SubscriberLimitError when max_subscribers clients are already served"""
+        subscription = Subscription(baselines)
+        if hasattr(self.source, 'seed'):
+            self.source.seed({t: b['end_price'] for t, b in baselines.items()})
+
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscriptions) >= self.max_subscribers:
+                raise SubscriberLimitError(f"{len(self._subscriptions)} clients are already following quotes")
+            self._subscriptions.add(subscription)
+            self._symbols.update(subscription.tickers)
+            known = {t: self._quotes[t] for t in subscription.tickers if t in self._quotes}
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name='live-quotes', daemon=True)
+                self._thread.start()
+
+        # A new client gets the last known prices straight away
+        subscription.push(known)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+            self._symbols.subtract(subscription.tickers)
+            for ticker in subscription.tickers:
+                if self._symbols[ticker] <= 0:
+                    del self._symbols[ticker]
+                    self._quotes.pop(ticker, None)
+
+    def stop(self, timeout=None):
+        thread = self._thread
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def poll_once(self):
+        """Fetch the union of subscribed symbols and push what changed"""
+        with self._lock:
+            symbols = list(self._symbols)
+        if not symbols:
+            return {}
+
+        with timed('quotes'):
+            quotes = self.source.fetch(symbols)
+
+        with self._lock:
+            changed = {
+                symbol: quote for symbol, quote in quotes.items()
+                if symbol in self._symbols and self._quotes.get(symbol, {}).get('price') != quote['price']
+            }
+            self._quotes.update(changed)
+            subscriptions = list(self._subscriptions)
+            self.polls += 1
+            self.last_poll = time.time()
+
+        for subscription in subscriptions:
+            subscription.push(changed)
+        return changed
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+            try:
+                self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("⚠ Quote poll failed: %s", e)
+            self._stop.wait(self.interval)
+
+        with self._lock:
+            self._thread = None
+
+    def status(self):
+        with self._lock:
+            return {
+                'running': self.running,
+                'interval_seconds': self.interval,
+                'subscribers': len(self._subscriptions),
+                'max_subscribers': self.max_subscribers,
+                'symbols': sorted(self._symbols),
+                'polls': self.polls,
+                'last_poll': self.last_poll,
+                'last_error': self.last_error
+            }
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.ttl_cache import TTLCache
+
+
+class LLMCache:
+    """
+    Content-addressed cache for chat completion responses.
+
+    Keys are a hash of the model, the messages and the sampling parameters,
+    so identical prompts are answered once. Entries live in an in-memory
+    TTL/LRU tier and, when a path is given, in an SQLite tier that survives
+    restarts.
+    """
+
+    def __init__(self, maxsize=1024, ttl=86400, path=None):
+        self.ttl = ttl
+        self.path = path
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS responses ('
+                    'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+                )
+
+    @contextmanager
+    def _connect(self):
+        """A connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model, messages, **params):
+        """Hash the full request so any change to prompt or sampling is a new key"""
+        payload = json.dumps(
+            {'model': model, 'messages': messages, 'params': params},
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response text, or None"""
+        value = self.memory.get(key)
+        if value is None and self.path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT value, expires_at FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+            if row and row[1] > time.time():
+                value = row[0]
+                self.memory.set(key, value, ttl=row[1] - time.time())
+                with self._lock:
+                    self.disk_hits += 1
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, value, time.time() + self.ttl)
+                )
+                conn.execute('DELETE FROM responses WHERE expires_at <= ?', (time.time(),))
+
+    def clear(self):
+        self.memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM responses')
+
+    def stats(self):
+        """Return hit/miss counters across both tiers"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'memory_hits': self.hits - self.disk_hits,
+            'disk_hits': self.disk_hits,
+            'memory_size': len(self.memory),
+            'disk_enabled': bool(self.path)
+        }
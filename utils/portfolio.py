@@ -0,0 +1,374 @@
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import timed
+
+TRADING_DAYS = 252
+
+
+class PortfolioOptimizer:
+    """
+    Long-only allocations (weights >= 0, summing to 1) for a watchlist.
+
+    Expected returns and the covariance matrix are annualized from daily
+    returns once, with Ledoit-Wolf shrinkage toward a scaled identity so
+    the covariance stays well conditioned when there are many assets
+    relative to trading days. Every solver then works on those arrays:
+
+      min_variance, efficient_frontier
+        mean-variance problems solved with accelerated projected gradient
+        and an exact simplex projection, all frontier points at once as
+        columns of one matrix; the loose solution's support is then polished
+        to the exact KKT solution with a few small linear solves
+      max_sharpe
+        the closed-form tangency portfolio on the support of the best
+        frontier point, corrected by the same active-set swaps
+      risk_parity
+        equal risk contributions via Newton's method on the convex
+        log-barrier formulation (Spinu 2013)
+
+    scipy.optimize's SLSQP solves the same problems but takes seconds at a
+    few hundred assets; benchmarks/bench_portfolio.py checks these solvers
+    against it.
+    """
+
+    def __init__(self, returns, tickers, risk_free_rate=0.02, shrink=True):
+        """
+        returns: (days, assets) array of daily returns with no gaps
+        tickers: asset names in column order
+        """
+        returns = np.asarray(returns, dtype=np.float64)
+        if returns.ndim != 2 or returns.shape[1] != len(tickers):
+            raise ValueError("returns must be a (days, assets) array matching tickers")
+        if returns.shape[0] < 2:
+            raise ValueError("at least two days of returns are needed")
+        # A price that never moves has zero variance and leaves the covariance singular
+        flat = [ticker for ticker, variance in zip(tickers, returns.var(axis=0)) if not variance > 0]
+        if flat:
+            raise ValueError(f"prices do not change over the period for {', '.join(flat)}")
+
+        self.tickers = list(tickers)
+        self.risk_free_rate = risk_free_rate
+        self.observations = returns.shape[0]
+
+        daily_cov, self.shrinkage = _ledoit_wolf(returns) if shrink else (np.cov(returns, rowvar=False), 0.0)
+        self.mu = returns.mean(axis=0) * TRADING_DAYS
+        self.cov = np.atleast_2d(daily_cov) * TRADING_DAYS
+
+        # Step size and momentum for the projected gradient come from the
+        # extreme eigenvalues (shrinkage keeps the smallest away from zero)
+        eigenvalues = np.linalg.eigvalsh(self.cov)
+        self._lipschitz = float(eigenvalues[-1])
+        self._convexity = max(float(eigenvalues[0]), 0.0)
+
+    @classmethod
+    def from_stock_data(cls, stock_data, risk_free_rate=0.02, shrink=True):
+        """Build from {ticker: DataFrame} using the days every ticker traded"""
+        frames = {ticker: df for ticker, df in stock_data.items() if not df.empty}
+        tickers = list(frames)
+        indexes = [df.index for df in frames.values()]
+
+        # One download shares one index; stack the arrays instead of aligning
+        if all(index.equals(indexes[0]) for index in indexes[1:]):
+            closes = np.column_stack([df['Close'].to_numpy(dtype=np.float64) for df in frames.values()])
+        else:
+            closes = pd.concat({t: df['Close'] for t, df in frames.items()}, axis=1).to_numpy(dtype=np.float64)
+
+        returns = closes[1:] / closes[:-1] - 1
+        returns = returns[np.isfinite(returns).all(axis=1)]
+        return cls(returns, tickers, risk_free_rate, shrink)
+
+    # ===== Solvers =====
+
+    def min_variance(self):
+        return self._solve_mean_variance(np.zeros(1))[:, 0]
+
+    def efficient_frontier(self, points=25, solutions=None):
+        """
+        Weights along the frontier from the minimum-variance portfolio to the
+        highest-return asset: an (assets, points) array with columns ordered
+        by increasing risk
+        solutions: (tolerances, weights) from frontier_solutions, to reuse
+        """
+        _, weights = solutions or self.frontier_solutions(points)
+        risk = np.einsum('ik,ij,jk->k', weights, self.cov, weights)
+        return weights[:, np.argsort(risk, kind='stable')]
+
+    def frontier_solutions(self, points=25):
+        """Risk tolerances and the (assets, points) weights solved for them"""
+        tolerances = self._risk_tolerances(points)
+        return tolerances, self._solve_mean_variance(tolerances)
+
+    def max_sharpe(self, points=25, solutions=None):
+        """
+        Highest Sharpe ratio portfolio: the tangency portfolio on the support
+        of the best frontier point, made exact by active-set swaps. Falls back
+        to a golden-section search along the frontier (Sharpe is unimodal on
+        it) when no asset beats the risk-free rate or the swaps do not settle.
+        """
+        tolerances, weights = solutions or self.frontier_solutions(points)
+        sharpe = self._sharpe(weights)
+        best = int(np.argmax(sharpe))
+
+        tangency = self._tangency(weights[:, best])
+        if tangency is not None:
+            return tangency
+        return self._golden_sharpe(tolerances, weights[:, best], best)
+
+    def risk_parity(self, budgets=None, tol=1e-16, max_iter=100):
+        """
+        Weights whose risk contributions w_i * (cov w)_i are proportional to
+        budgets (equal by default)
+        """
+        n = len(self.tickers)
+        b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=np.float64) / np.sum(budgets)
+
+        # minimize 1/2 y'Σy - Σ b_i log y_i; the solution normalized is the allocation
+        y = b / np.sqrt(np.diag(self.cov))
+        y /= np.sqrt(y @ self.cov @ y)
+        for _ in range(max_iter):
+            cy = self.cov @ y
+            gradient = cy - b / y
+            hessian = self.cov + np.diag(b / (y * y))
+            step = np.linalg.solve(hessian, gradient)
+            if gradient @ step < tol:
+                break
+            # Damped step keeping every y_i > 0
+            shrink = step > 0
+            t = min(1.0, 0.95 * np.min(y[shrink] / step[shrink])) if shrink.any() else 1.0
+            y = y - t * step
+        return y / y.sum()
+
+    # ===== Reporting =====
+
+    def describe(self, weights):
+        """Expected return, volatility (%) and Sharpe ratio of one weight vector"""
+        expected = float(self.mu @ weights)
+        volatility = float(np.sqrt(max(weights @ self.cov @ weights, 0.0)))
+        sharpe = (expected - self.risk_free_rate) / volatility if volatility > 0 else 0.0
+        return {
+            'expected_return': round(expected * 100, 2),
+            'volatility': round(volatility * 100, 2),
+            'sharpe_ratio': round(sharpe, 2)
+        }
+
+    def allocation(self, weights):
+        """describe() plus {ticker: weight}, dropping weights below 0.01%"""
+        result = self.describe(weights)
+        result['weights'] = {
+            ticker: round(float(w), 4)
+            for ticker, w in zip(self.tickers, weights)
+            if w >= 1e-4
+        }
+        return result
+
+    @timed('portfolio')
+    def optimize(self, frontier_points=25):
+        """Every allocation plus the frontier, JSON-ready"""
+        solutions = self.frontier_solutions(frontier_points)
+        frontier = self.efficient_frontier(solutions=solutions)
+        return {
+            'tickers': self.tickers,
+            'observations': self.observations,
+            'shrinkage': round(self.shrinkage, 4),
+            # The first frontier point is the t = 0 solve, i.e. minimum variance
+            'min_variance': self.allocation(solutions[1][:, 0]),
+            'max_sharpe': self.allocation(self.max_sharpe(solutions=solutions)),
+            'risk_parity': self.allocation(self.risk_parity()),
+            'frontier': [self.describe(frontier[:, k]) for k in range(frontier.shape[1])]
+        }
+
+    # ===== Internals =====
+
+    def _risk_tolerances(self, points):
+        """
+        Risk tolerances t for min 1/2 w'Σw - t mu'w, from 0 (minimum variance)
+        up to a value where the highest-return asset dominates
+        """
+        spread = np.ptp(self.mu)
+        if points < 2 or spread <= 0:
+            return np.zeros(1)
+        top = 4 * self._lipschitz / spread
+        return np.concatenate(([0.0], np.geomspace(top * 1e-4, top, points - 1)))
+
+    def _sharpe(self, weights):
+        expected = self.mu @ weights
+        volatility = np.sqrt(np.maximum(np.einsum('ik,ij,jk->k', weights, self.cov, weights), 0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(volatility > 0, (expected - self.risk_free_rate) / volatility, -np.inf)
+
+    def _solve_mean_variance(self, tolerances, start=None, tol=1e-5, max_iter=5000):
+        """
+        Solve min 1/2 w'Σw - t mu'w on the simplex for every t at once:
+        accelerated projected gradient to a loose tolerance finds the support,
+        then each column is polished to the exact solution on it. Columns the
+        polish cannot settle keep iterating to a tight tolerance.
+        Returns an (assets, len(tolerances)) array
+        """
+        w = self._projected_gradient(tolerances, start, tol, max_iter)
+        failed = []
+        for k, tolerance in enumerate(tolerances):
+            polished = self._polish(w[:, k], tolerance)
+            if polished is None:
+                failed.append(k)
+            else:
+                w[:, k] = polished
+        if failed:
+            w[:, failed] = self._projected_gradient(tolerances[failed], w[:, failed], 1e-9, max_iter)
+        return w
+
+    def _projected_gradient(self, tolerances, start, tol, max_iter):
+        """Accelerated projected gradient for every column of the mean-variance problem"""
+        n, k = len(self.tickers), len(tolerances)
+        step = 1.0 / self._lipschitz
+        linear = np.outer(self.mu, tolerances)
+
+        # Strongly convex: constant momentum converges in ~sqrt(L/m) log(1/tol) steps
+        q = self._convexity / self._lipschitz
+        constant = (1 - np.sqrt(q)) / (1 + np.sqrt(q)) if q > 1e-8 else None
+
+        if start is None:
+            w = np.full((n, k), 1.0 / n)
+        else:
+            w = np.array(start, dtype=np.float64).reshape(n, -1) * np.ones((1, k))
+        z, momentum = w.copy(), 1.0
+        for _ in range(max_iter):
+            w_next = project_simplex(z - step * (self.cov @ z - linear))
+            change = np.abs(w_next - w).max()
+            if constant is None:
+                momentum_next = (1 + np.sqrt(1 + 4 * momentum * momentum)) / 2
+                beta, momentum = (momentum - 1) / momentum_next, momentum_next
+            else:
+                beta = constant
+            z = w_next + beta * (w_next - w)
+            w = w_next
+            if change < tol:
+                break
+        return w
+
+    def _polish(self, w, tolerance, max_swaps=20):
+        """
+        Exact solution from an approximate one: solve the equality-constrained
+        problem on the support, dropping assets that go negative and adding the
+        worst KKT violator until none is left. None if it does not settle.
+        """
+        support = w > 1e-6
+        ones = np.ones(len(w))
+        for _ in range(max_swaps):
+            idx = np.flatnonzero(support)
+            if len(idx) == 0:
+                return None
+            # w_S = Σ_SS^-1 (t mu_S + eta 1) with eta fixing the budget
+            a = np.linalg.solve(self.cov[np.ix_(idx, idx)], np.column_stack([tolerance * self.mu[idx], ones[idx]]))
+            eta = (1 - a[:, 0].sum()) / a[:, 1].sum()
+            w_support = a[:, 0] + eta * a[:, 1]
+            if (w_support < 0).any():
+                support[idx[w_support < 0]] = False
+                continue
+
+            polished = np.zeros(len(w))
+            polished[idx] = w_support
+            slack = self.cov @ polished - tolerance * self.mu - eta
+            slack[support] = np.inf
+            worst = int(np.argmin(slack))
+            if slack[worst] >= -1e-12 * self._lipschitz:
+                return polished
+            support[worst] = True
+        return None
+
+    def _tangency(self, w, max_swaps=20):
+        """
+        Long-only tangency portfolio by active-set swaps from the support of w:
+        Σ_SS^-1 (mu - rf)_S normalized, optimal once every asset left out
+        satisfies (Σw)_i (e'w) >= (w'Σw) e_i. None if it does not settle.
+        """
+        excess = self.mu - self.risk_free_rate
+        if not (excess > 0).any():
+            return None
+
+        support = w > 1e-6
+        for _ in range(max_swaps):
+            idx = np.flatnonzero(support)
+            if len(idx) == 0:
+                return None
+            y = np.linalg.solve(self.cov[np.ix_(idx, idx)], excess[idx])
+            if (y < 0).any() or y.sum() <= 0:
+                support[idx[y < 0]] = False
+                continue
+
+            tangency = np.zeros(len(w))
+            tangency[idx] = y / y.sum()
+            cw = self.cov @ tangency
+            slack = cw * (excess @ tangency) - (tangency @ cw) * excess
+            slack[support] = np.inf
+            worst = int(np.argmin(slack))
+            if slack[worst] >= -1e-12 * self._lipschitz:
+                return tangency
+            support[worst] = True
+        return None
+
+    def _golden_sharpe(self, tolerances, start, best, iterations=12):
+        """Golden-section search for the best Sharpe ratio between the neighbours of frontier point `best`"""
+        best_weights = start
+        best_sharpe = self._sharpe(start[:, None])[0]
+
+        def evaluate(tolerance):
+            nonlocal best_weights, best_sharpe
+            w = self._solve_mean_variance(np.array([tolerance]), start=best_weights)
+            value = self._sharpe(w)[0]
+            if value > best_sharpe:
+                best_weights, best_sharpe = w[:, 0], value
+            return value
+
+        ratio = (np.sqrt(5) - 1) / 2
+        a = tolerances[max(best - 1, 0)]
+        b = tolerances[min(best + 1, len(tolerances) - 1)]
+        if b <= a:
+            return best_weights
+
+        c, d = b - ratio * (b - a), a + ratio * (b - a)
+        fc, fd = evaluate(c), evaluate(d)
+        # Each step shrinks the bracket by 0.618 with one new solve
+        for _ in range(iterations):
+            if fc >= fd:
+                b, d, fd = d, c, fc
+                c = b - ratio * (b - a)
+                fc = evaluate(c)
+            else:
+                a, c, fc = c, d, fd
+                d = a + ratio * (b - a)
+                fd = evaluate(d)
+        return best_weights
+
+
+def project_simplex(v):
+    """
+    Euclidean projection of every column of v onto {w >= 0, sum(w) = 1}
+    (sort-based, Held/Wolfe/Crowder)
+    """
+    n = v.shape[0]
+    u = -np.sort(-v, axis=0)
+    cumulative = np.cumsum(u, axis=0) - 1
+    ranks = np.arange(1, n + 1)[:, None]
+    rho = np.count_nonzero(u - cumulative / ranks > 0, axis=0)
+    theta = cumulative[rho - 1, np.arange(v.shape[1])] / rho
+    return np.maximum(v - theta, 0)
+
+
+def _ledoit_wolf(returns):
+    """
+    Ledoit-Wolf (2004) shrinkage of the sample covariance toward mu * I
+    Returns (covariance, shrinkage intensity in [0, 1])
+    """
+    t, n = returns.shape
+    x = returns - returns.mean(axis=0)
+    sample = x.T @ x / t
+    target = np.trace(sample) / n
+
+    d2 = np.sum((sample - target * np.eye(n)) ** 2) / n
+    x2 = x * x
+    b2 = (np.sum((x2.T @ x2) / t) - np.sum(sample ** 2)) / (t * n)
+    shrinkage = 0.0 if d2 == 0 else float(np.clip(b2 / d2, 0, 1))
+
+    covariance = shrinkage * target * np.eye(n) + (1 - shrinkage) * sample
+    return covariance * t / (t - 1), shrinkage
@@ -0,0 +1,214 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+
+from utils.running_metrics import RunningMetrics
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_PERIODS = ('1M', '3M', '6M', '1Y', 'YTD')
+
+
+class PrefetchScheduler:
+    """
+    Background warm-up of the sectors.json universe.
+
+    Every `interval` seconds the standard periods are downloaded for every
+    known ticker in chunks, with a rate limit plus random jitter between
+    chunks, and their metrics are precomputed. Analyze requests for those
+    tickers and periods can then be served from memory. Per-ticker running
+    metric state is kept between runs, so a period whose start date has not
+    moved (YTD) only folds in the new bars.
+    """
+
+    def __init__(self, data_fetcher, periods=PREFETCH_PERIODS, interval=3600,
+                 chunk_size=20, delay=1.0, jitter=0.5):
+        """
+        interval: seconds between full refreshes
+        chunk_size: tickers per download
+        delay, jitter: seconds to wait between chunks (delay + uniform(0, jitter))
+        """
+        self.data_fetcher = data_fetcher
+        self.periods = periods
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.jitter = jitter
+
+        self._store = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run_started = None
+        self.last_run_finished = None
+        self.last_error = None
+        self.incremental_updates = 0
+        self.full_updates = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background thread (no-op if already running)"""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='prefetch', daemon=True)
+        self._thread.start()
+        logger.info("✓ Prefetch scheduler started")
+        return True
+
+    def stop(self, timeout=None):
+        """Ask the background thread to stop after the current chunk"""
+        if not self.running:
+            return False
+        self._stop.set()
+        self._thread.join(timeout)
+        logger.info("Prefetch scheduler stopped")
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("⚠ Prefetch run failed: %s", e)
+            self._stop.wait(self.interval)
+
+    def universe(self):
+        """Every ticker in sectors.json, in file order"""
+        tickers = []
+        for companies in self.data_fetcher.sectors_data.values():
+            tickers.extend(company['ticker'] for company in companies)
+        return list(dict.fromkeys(tickers))
+
+    def run_once(self):
+        """Refresh every period for the whole universe once"""
+        self.last_run_started = time.time()
+        tickers = self.universe()
+
+        # Longest range first so the shorter periods are served by the price cache
+        ranges = {period: self.data_fetcher.get_date_range(period) for period in self.periods}
+        for period in sorted(self.periods, key=lambda p: ranges[p][0]):
+            start_date, end_date = ranges[period]
+            for i in range(0, len(tickers), self.chunk_size):
+                if self._stop.is_set():
+                    return
+                self._refresh_chunk(period, tickers[i:i + self.chunk_size], start_date, end_date)
+                self._stop.wait(self.delay + random.uniform(0, self.jitter))
+
+        self.last_run_finished = time.time()
+
+    def _refresh_chunk(self, period, tickers, start_date, end_date):
+        stock_data, failures = self.data_fetcher.fetch_bulk(tickers, start_date, end_date)
+
+        with self._lock:
+            entry = self._store.get(period)
+            if entry is None or entry['date_range'] != (start_date, end_date):
+                # Running metric state survives a later end date, not a new start
+                keep = entry is not None and entry['date_range'][0] == start_date
+                entry = {
+                    'date_range': (start_date, end_date), 'frames': {}, 'metrics': {}, 'updated': {},
+                    'failures': {}, 'states': entry['states'] if keep else {}
+                }
+                self._store[period] = entry
+            states = entry['states']
+
+        metrics = [
+            self._advance(states, ticker, stock_data[ticker])
+            for ticker in tickers if ticker in stock_data and len(stock_data[ticker]) >= 2
+        ]
+        now = time.time()
+
+        with self._lock:
+            entry['failures'].update(failures)
+            for m in metrics:
+                ticker = m['ticker']
+                entry['frames'][ticker] = stock_data[ticker]
+                entry['metrics'][ticker] = m
+                entry['updated'][ticker] = now
+                entry['failures'].pop(ticker, None)
+
+    def _advance(self, states, ticker, df):
+        """
+        Metrics for a ticker's frame from its running state
+        The state covers every bar but the last (today's bar is revised while
+        the market is open); new settled bars are appended in O(1) each and
+        the last one is applied to a copy. The state is rebuilt when the frame
+        no longer extends it, e.g. after a dividend adjusts past closes.
+        """
+        closes = df['Close'].to_numpy(dtype=float)
+        dates = df.index
+
+        settled = None
+        if ticker in states:
+            state, settled_date = states[ticker]
+            position = dates.searchsorted(settled_date)
+            if (position < len(dates) - 1 and dates[position] == settled_date
+                    and closes[position] == state.last_price and closes[0] == state.start_price):
+                settled = state.copy()
+                settled.extend(closes[position + 1:-1])
+                self.incremental_updates += 1
+
+        if settled is None:
+            settled = RunningMetrics.from_closes(ticker, closes[:-1])
+            self.full_updates += 1
+
+        states[ticker] = (settled, dates[-2])
+        current = settled.copy()
+        current.append(closes[-1])
+        return current.metrics()
+
+    def get(self, period, start_date, end_date, tickers):
+        """
+        Return (stock_data, metrics) for the requested tickers that are warm
+        for this period and date range; both are dicts keyed by ticker
+        """
+        with self._lock:
+            entry = self._store.get(period)
+            if entry is None or entry['date_range'] != (start_date, end_date):
+                return {}, {}
+            hits = [t for t in tickers if t in entry['frames']]
+            return (
+                {t: entry['frames'][t] for t in hits},
+                {t: dict(entry['metrics'][t]) for t in hits}
+            )
+
+    def status(self):
+        """Running state plus per-period, per-ticker freshness"""
+        now = time.time()
+
+        def stamp(ts):
+            return datetime.fromtimestamp(ts).isoformat(timespec='seconds') if ts else None
+
+        with self._lock:
+            periods = {
+                period: {
+                    'date_range': {'start': entry['date_range'][0], 'end': entry['date_range'][1]},
+                    'tickers': {
+                        ticker: {
+                            'updated_at': stamp(updated),
+                            'age_seconds': round(now - updated, 1),
+                            'days': entry['metrics'][ticker]['days']
+                        }
+                        for ticker, updated in entry['updated'].items()
+                    },
+                    'failures': dict(entry['failures'])
+                }
+                for period, entry in self._store.items()
+            }
+
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'universe_size': len(self.universe()),
+            'last_run_started': stamp(self.last_run_started),
+            'last_run_finished': stamp(self.last_run_finished),
+            'last_error': self.last_error,
+            'metric_updates': {'incremental': self.incremental_updates, 'full': self.full_updates},
+            'periods': periods
+        }
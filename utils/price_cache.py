@@ -0,0 +1,223 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'prices.sqlite3')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_REFRESH_DAYS = 7
+
+
+class PriceCache:
+    """
+    On-disk OHLCV store keyed by ticker.
+
+    Each ticker keeps a single contiguous covered range [start, end) (end is
+    exclusive, like yf.download), so a request only ever needs the missing
+    head and/or tail days. Entries are evicted least-recently-used once the
+    stored frames exceed max_bytes.
+
+    Closes are split- and dividend-adjusted, so stored history goes stale
+    when a ticker later pays a dividend or splits. A ticker whose whole range
+    was last downloaded more than refresh_age seconds ago is reported by
+    stale() and should be downloaded again and stored with replace().
+    """
+
+    def __init__(self, path=None, max_bytes=None, refresh_age=None):
+        self.path = path or os.getenv('PRICE_CACHE_PATH', DEFAULT_CACHE_PATH)
+        if max_bytes is None:
+            max_bytes = int(os.getenv('PRICE_CACHE_MAX_MB', DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024
+        self.max_bytes = max_bytes
+        if refresh_age is None:
+            refresh_age = float(os.getenv('PRICE_CACHE_REFRESH_DAYS', DEFAULT_REFRESH_DAYS)) * 86400
+        self.refresh_age = refresh_age
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            # WAL is a property of the database file, so setting it once covers every connection
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS prices (
+                    ticker TEXT PRIMARY KEY,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    frame BLOB NOT NULL,
+                    refreshed REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # Stores created before refreshes existed are refreshed on first use
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(prices)')}
+            if 'refreshed' not in columns:
+                conn.execute('ALTER TABLE prices ADD COLUMN refreshed REAL NOT NULL DEFAULT 0')
+
+    @contextmanager
+    def _connect(self):
+        """A connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_range(self, ticker):
+        """Return the covered (start, end) for a ticker, or None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT start, end FROM prices WHERE ticker = ?', (ticker,)).fetchone()
+        return tuple(row) if row else None
+
+    def stale(self, tickers):
+        """Cached tickers whose whole range is due to be downloaded again"""
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers or not self.refresh_age:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker FROM prices WHERE refreshed < ? AND ticker IN ({','.join('?' * len(tickers))})",
+                [time.time() - self.refresh_age, *tickers]
+            ).fetchall()
+        return [ticker for (ticker,) in rows]
+
+    def versions(self, tickers):
+        """
+        Return {ticker: (start, end, size)} for the cached tickers
+        Any merge that lands new rows changes a ticker's entry
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, start, end, size FROM prices WHERE ticker IN ({','.join('?' * len(tickers))})",
+                tickers
+            ).fetchall()
+        return {ticker: (start, end, size) for ticker, start, end, size in rows}
+
+    def missing_ranges(self, ticker, start_date, end_date):
+        """
+        Return the [start, end) ranges that must be downloaded to serve the
+        request. At most a head and a tail range are returned.
+        """
+        covered = self.get_range(ticker)
+        if covered is None:
+            return [(start_date, end_date)]
+
+        cached_start, cached_end = covered
+        missing = []
+        if start_date < cached_start:
+            missing.append((start_date, cached_start))
+        if end_date > cached_end:
+            missing.append((cached_end, end_date))
+        return missing
+
+    def load(self, ticker):
+        """Return the stored frame for a ticker (marking it recently used), or None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT frame FROM prices WHERE ticker = ?', (ticker,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE prices SET last_access = ? WHERE ticker = ?', (time.time(), ticker))
+        return pickle.loads(row[0])
+
+    def get(self, ticker, start_date, end_date):
+        """Return the cached rows in [start_date, end_date) if fully covered, else None"""
+        if self.missing_ranges(ticker, start_date, end_date):
+            return None
+        df = self.load(ticker)
+        if df is None:
+            return None
+        return slice_frame(df, start_date, end_date)
+
+    def merge(self, ticker, new_df, start_date, end_date):
+        """
+        Merge freshly downloaded rows for [start_date, end_date) into the
+        stored frame and extend the covered range. Rows from today onwards are
+        never persisted because the current session's bar is still moving.
+        Only call this after a download that succeeded: new_df None marks the
+        range as known to hold no rows.
+        Returns the merged frame, including any unpersisted rows.
+        """
+        with self._lock:
+            existing = self.load(ticker)
+            covered = self.get_range(ticker)
+
+            if existing is not None and not existing.empty:
+                merged = pd.concat([existing, new_df]) if new_df is not None else existing
+            else:
+                merged = new_df if new_df is not None else pd.DataFrame()
+            if not merged.empty:
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+            today = date.today().strftime('%Y-%m-%d')
+            new_start = min(start_date, covered[0]) if covered else start_date
+            new_end = max(end_date, covered[1]) if covered else end_date
+            new_end = min(new_end, today)
+
+            if new_start < new_end:
+                stored = merged[merged.index < new_end] if not merged.empty else merged
+                self._store(ticker, stored, new_start, new_end, self._refreshed(ticker))
+
+        return merged
+
+    def replace(self, ticker, new_df, start_date, end_date):
+        """
+        Store a fresh download of the ticker's whole range in place of the
+        old rows (adjusted closes may all have changed) and restart its
+        refresh clock. Returns the frame, including any unpersisted rows.
+        """
+        with self._lock:
+            new_end = min(end_date, date.today().strftime('%Y-%m-%d'))
+            if start_date < new_end:
+                self._store(ticker, new_df[new_df.index < new_end], start_date, new_end, time.time())
+        return new_df
+
+    def _refreshed(self, ticker):
+        """When the ticker's whole range was last downloaded (now for a new ticker)"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT refreshed FROM prices WHERE ticker = ?', (ticker,)).fetchone()
+        return row[0] if row else time.time()
+
+    def _store(self, ticker, df, start_date, end_date, refreshed):
+        blob = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO prices (ticker, start, end, last_access, size, frame, refreshed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (ticker, start_date, end_date, time.time(), len(blob), sqlite3.Binary(blob), refreshed)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least-recently-used tickers until the store fits in max_bytes"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM prices').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute('SELECT ticker, size FROM prices ORDER BY last_access ASC').fetchall()
+        for ticker, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM prices WHERE ticker = ?', (ticker,))
+            total -= size
+
+    def clear(self):
+        """Remove every cached ticker"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM prices')
+
+
+def slice_frame(df, start_date, end_date):
+    """Return rows with start_date <= index < end_date"""
+    if df.empty:
+        return df
+    return df[(df.index >= pd.Timestamp(start_date)) & (df.index < pd.Timestamp(end_date))]
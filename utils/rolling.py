@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+ROLLING_METRICS = ('volatility', 'sharpe', 'beta', 'drawdown', 'max_drawdown')
+
+
+def rolling_metrics(stock_data, window=63, benchmark=None, risk_free_rate=0.02):
+    """
+    Trailing-window metrics for every ticker on one shared date axis
+
+    stock_data: {ticker: DataFrame with a Close column}
+    window: trading days per window
+    benchmark: ticker in stock_data to compute beta against (beta is omitted if None)
+
+    Every metric is computed for all tickers at once in O(T) per ticker:
+      volatility   - annualized std of daily returns (%), like calculate_volatility
+      sharpe       - annualized Sharpe ratio, like calculate_sharpe_ratio
+      beta         - cov(returns, benchmark returns) / var(benchmark returns)
+      drawdown     - close vs the highest close of the trailing window (%)
+      max_drawdown - largest peak-to-trough fall inside the trailing window (%),
+                     with the peak taken no earlier than the window's first day
+
+    Return based metrics need `window` returns with no gaps, so they are NaN
+    for the first `window` days; the drawdowns use whatever history exists.
+
+    Returns: (dates, {ticker: {metric: 1-D array}})
+    """
+    frames = {ticker: df for ticker, df in stock_data.items() if not df.empty}
+    if not frames or window < 2:
+        return pd.DatetimeIndex([]), {}
+
+    closes = pd.concat({ticker: df['Close'] for ticker, df in frames.items()}, axis=1)
+    returns = pd.concat(
+        {ticker: df['Close'].pct_change() for ticker, df in frames.items()}, axis=1
+    ).reindex(closes.index)
+    tickers = list(closes.columns)
+
+    prices = closes.to_numpy(dtype=np.float64)
+    values = returns.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    values = np.where(valid, values, 0.0)
+
+    n = window_sum(valid.astype(np.float64), window)
+    full = n == window
+    s = window_sum(values, window)
+    ss = window_sum(values * values, window)
+    daily_rf = (1 + risk_free_rate) ** (1 / 252) - 1
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s / window
+        variance = np.maximum(ss - s * mean, 0) / (window - 1)
+        std = np.sqrt(variance)
+        volatility = np.where(full, std * np.sqrt(252) * 100, np.nan)
+        sharpe = np.where(full, (mean - daily_rf) / std * np.sqrt(252), np.nan)
+        sharpe[full & (std == 0)] = 0
+
+        # Peaks are taken from valid closes only; gaps never set a new high
+        peaks = sliding_max(np.where(np.isnan(prices), -np.inf, prices), window)
+        drawdown = (prices / peaks - 1) * 100
+        max_drawdown = np.where(np.isnan(prices), np.nan, sliding_max_drawdown(prices, window) * 100)
+
+    result = {
+        ticker: {
+            'volatility': volatility[:, i],
+            'sharpe': sharpe[:, i],
+            'drawdown': drawdown[:, i],
+            'max_drawdown': max_drawdown[:, i]
+        }
+        for i, ticker in enumerate(tickers)
+    }
+
+    if benchmark in tickers:
+        beta = _rolling_beta(values, valid, tickers.index(benchmark), window)
+        for i, ticker in enumerate(tickers):
+            result[ticker]['beta'] = beta[:, i]
+
+    return closes.index, result
+
+
+def _rolling_beta(values, valid, column, window):
+    """Beta of every column against values[:, column] over days both traded"""
+    both = valid & valid[:, [column]]
+    bench = np.where(both, values[:, [column]], 0.0)
+    own = np.where(both, values, 0.0)
+
+    n = window_sum(both.astype(np.float64), window)
+    sb = window_sum(bench, window)
+    sr = window_sum(own, window)
+    sbb = window_sum(bench * bench, window)
+    srb = window_sum(own * bench, window)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = srb - sr * sb / n
+        variance = sbb - sb * sb / n
+        beta = np.where((n == window) & (variance > 0), covariance / variance, np.nan)
+    return beta
+
+
+def window_sum(values, window):
+    """
+    Sum of the trailing `window` rows for every row of a (T, N) array
+    (fewer rows for the first window - 1), from one running sum
+    """
+    totals = np.cumsum(values, axis=0)
+    totals[window:] = totals[window:] - totals[:-window]
+    return totals
+
+
+def sliding_max(values, window):
+    """
+    Max of the trailing `window` rows for every row of a (T, N) array
+    (fewer rows for the first window - 1)
+
+    van Herk/Gil-Werman: split the rows into blocks of `window`, take running
+    maxima forward and backward within each block, and every window is then
+    covered by one backward and one forward value. That is three comparisons
+    per element whatever the window size, and each step is a whole-array NumPy
+    operation instead of a per-row monotonic deque in Python.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return sliding_max(values[:, None], window)[:, 0]
+
+    length, columns = values.shape
+    if length == 0:
+        return values.copy()
+
+    window = min(window, length)
+    blocks = -(-length // window)
+    padded = np.full((blocks * window, columns), -np.inf)
+    padded[:length] = values
+    padded = padded.reshape(blocks, window, columns)
+
+    forward = np.maximum.accumulate(padded, axis=1).reshape(-1, columns)[:length]
+    backward = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape(-1, columns)
+
+    result = forward.copy()
+    result[window - 1:] = np.maximum(backward[:length - window + 1], forward[window - 1:])
+    return result
+
+
+def sliding_max_drawdown(prices, window):
+    """
+    Largest peak-to-trough fall (a fraction <= 0) inside the trailing `window`
+    rows for every row of a (T, N) array of prices (fewer rows for the first
+    window - 1). NaN prices are skipped; rows without any price give inf.
+
+    Same blocks as sliding_max: a window that is not a whole block is the tail
+    of one block and the head of the next, so its drawdown is the worst of the
+    tail's own (a backward pass), the head's own (a forward pass) and the
+    head's lowest price against the tail's highest.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        return sliding_max_drawdown(prices[:, None], window)[:, 0]
+
+    length, columns = prices.shape
+    if length == 0:
+        return prices.copy()
+
+    window = min(window, length)
+    blocks = -(-length // window)
+    padded = np.full((blocks * window, columns), np.nan)
+    padded[:length] = prices
+    padded = padded.reshape(blocks, window, columns)
+    missing = np.isnan(padded)
+    highs = np.where(missing, -np.inf, padded)
+    lows = np.where(missing, np.inf, padded)
+
+    def forward(ufunc, values):
+        return ufunc.accumulate(values, axis=1).reshape(-1, columns)
+
+    def backward(ufunc, values):
+        return ufunc.accumulate(values[:, ::-1], axis=1)[:, ::-1].reshape(-1, columns)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Head of a block: fall from the running high since the block started
+        fall = np.where(missing, np.inf, padded / np.maximum.accumulate(highs, axis=1) - 1)
+        head_worst = forward(np.minimum, fall)
+        head_low = forward(np.minimum, lows)
+
+        # Tail of a block: fall from each day's price to the lowest one after it
+        later_low = np.minimum.accumulate(lows[:, ::-1], axis=1)[:, ::-1]
+        tail_worst = backward(np.minimum, np.where(missing, np.inf, later_low / padded - 1))
+        tail_high = backward(np.maximum, highs)
+
+        first = np.arange(length - window + 1)
+        last = first + window - 1
+        across = head_low[last] / tail_high[first] - 1
+        across[(first[:, None] % window == 0) | np.isinf(tail_high[first])] = np.inf
+
+    result = head_worst[:length].copy()
+    result[window - 1:] = np.fmin(np.minimum(tail_worst[first], head_worst[last]), across)
+    return result
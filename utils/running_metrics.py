@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+
+
+class RunningMetrics:
+    """
+    Compact per-ticker state that keeps calculate_all_metrics up to date as
+    bars are appended, in O(1) per bar instead of a full recompute.
+
+    Holds the start and last close, the number of closes, Welford's running
+    mean and sum of squared deviations of daily returns, and the running
+    peak and worst drawdown. The drawdown follows calculate_max_drawdown:
+    the cumulative return series starts at the first daily return, so the
+    peak is taken over closes from the second bar on.
+    """
+
+    __slots__ = ('ticker', 'start_price', 'last_price', 'days', 'mean', 'm2', 'peak', 'worst')
+
+    def __init__(self, ticker, start_price):
+        self.ticker = ticker
+        self.start_price = float(start_price)
+        self.last_price = float(start_price)
+        self.days = 1
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.peak = None
+        self.worst = 0.0
+
+    @classmethod
+    def from_closes(cls, ticker, closes):
+        """State for a whole close series, built with array operations"""
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) == 0:
+            raise ValueError("at least one close is needed")
+
+        state = cls(ticker, closes[0])
+        if len(closes) < 2:
+            return state
+
+        returns = closes[1:] / closes[:-1] - 1
+        tail = closes[1:]
+        running_peak = np.maximum.accumulate(tail)
+
+        state.last_price = float(closes[-1])
+        state.days = len(closes)
+        state.mean = float(returns.mean())
+        state.m2 = float(((returns - state.mean) ** 2).sum())
+        state.peak = float(running_peak[-1])
+        state.worst = float(((tail - running_peak) / running_peak).min())
+        return state
+
+    def append(self, close):
+        """Add the next trading day's close"""
+        close = float(close)
+        daily_return = close / self.last_price - 1
+
+        # Welford's update over daily returns
+        n = self.days
+        delta = daily_return - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (daily_return - self.mean)
+
+        self.peak = close if self.peak is None else max(self.peak, close)
+        self.worst = min(self.worst, (close - self.peak) / self.peak)
+        self.last_price = close
+        self.days += 1
+
+    def extend(self, closes):
+        for close in closes:
+            self.append(close)
+
+    def copy(self):
+        clone = RunningMetrics.__new__(RunningMetrics)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+    def values(self, risk_free_rate=0.02):
+        """Unrounded metrics, or None with fewer than two closes"""
+        if self.days < 2:
+            return None
+
+        total_return = (self.last_price - self.start_price) / self.start_price * 100
+        annualized_return = ((1 + total_return / 100) ** (1 / (self.days / 252)) - 1) * 100
+
+        n = self.days - 1
+        std = math.sqrt(self.m2 / (n - 1)) if n > 1 else math.nan
+        daily_rf = (1 + risk_free_rate) ** (1 / 252) - 1
+        # Excess returns only shift the mean; a flat series has Sharpe 0
+        sharpe = 0 if std == 0 else (self.mean - daily_rf) / std * math.sqrt(252)
+
+        return {
+            'total_return': total_return,
+            'annualized_return': annualized_return,
+            'annualized_volatility': std * math.sqrt(252) * 100,
+            'sharpe_ratio': sharpe,
+            'max_drawdown': self.worst * 100
+        }
+
+    def metrics(self, risk_free_rate=0.02):
+        """The dict calculate_all_metrics returns, or None with fewer than two closes"""
+        values = self.values(risk_free_rate)
+        if values is None:
+            return None
+        return {
+            'ticker': self.ticker,
+            **{name: round(value, 2) for name, value in values.items()},
+            'start_price': round(self.start_price, 2),
+            'end_price': round(self.last_price, 2),
+            'days': self.days
+        }
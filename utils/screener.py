@@ -0,0 +1,230 @@
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from utils.calculations import MetricsCalculator
+from utils.instrumentation import record_cache, timed
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# The calculate_all_metrics set, in display order
+SCREENER_COLUMNS = (
+    'total_return', 'annualized_return', 'annualized_volatility', 'sharpe_ratio',
+    'max_drawdown', 'start_price', 'end_price', 'days'
+)
+SORT_KEYS = ('ticker',) + SCREENER_COLUMNS
+
+
+class ScreenerTable:
+    """
+    Metrics for a whole universe held as one float64 array per metric.
+
+    Filters become boolean masks over the columns, sectors are integer codes
+    and sorting is an argsort of the matching rows (after a partition that
+    drops rows beyond the k-th when only the top k are wanted), so a query never loops over tickers in
+    Python; only the rows of the requested page are turned into dicts.
+    """
+
+    def __init__(self, tickers, names, sectors, columns, date_range):
+        """
+        tickers, names, sectors: one entry per row
+        columns: {metric: 1-D array aligned with tickers}
+        """
+        self.tickers = np.asarray(tickers, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.sector_names, self.sector_codes = np.unique(np.asarray(sectors, dtype=str), return_inverse=True)
+        self.columns = columns
+        self.date_range = date_range
+        self.built_at = time.time()
+        # {ticker: reason} for universe symbols left out for lack of data
+        self.failures = {}
+        # Rank of each ticker in alphabetical order, so 'ticker' sorts like a metric
+        self._ticker_rank = np.empty(len(tickers), dtype=np.float64)
+        self._ticker_rank[np.argsort(self.tickers.astype(str), kind='stable')] = np.arange(len(tickers))
+
+    @classmethod
+    def from_metrics(cls, metrics_list, ticker_index, date_range):
+        """Build from calculate_all_metrics dicts; names and sectors come from the TickerIndex"""
+        entries = [ticker_index.get(m['ticker']) or {} for m in metrics_list]
+        columns = {
+            column: np.array([m[column] for m in metrics_list], dtype=np.float64)
+            for column in SCREENER_COLUMNS
+        }
+        return cls(
+            [m['ticker'] for m in metrics_list],
+            [e.get('name', m['ticker']) for e, m in zip(entries, metrics_list)],
+            [e.get('sector', 'Unknown') for e in entries],
+            columns,
+            date_range
+        )
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def query(self, filters=None, sectors=None, sort='sharpe_ratio', descending=True, top=None,
+              offset=0, limit=50):
+        """
+        filters: {metric: {'min': x, 'max': y}} with inclusive bounds, either optional
+        sectors: keep only these sectors
+        sort: a metric or 'ticker'; NaN values sort last either way
+        top: keep only the best `top` matches by the sort key
+        Returns: (number of matches, rows for [offset, offset + limit))
+        Raises ValueError for an unknown metric, sort key or malformed bound
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+
+        with timed('screener'):
+            mask = np.ones(len(self), dtype=bool)
+            for column, bounds in (filters or {}).items():
+                if column not in self.columns:
+                    raise ValueError(f"Unknown filter '{column}', expected one of {', '.join(SCREENER_COLUMNS)}")
+                if not isinstance(bounds, dict) or not bounds or set(bounds) - {'min', 'max'}:
+                    raise ValueError(f"Filter '{column}' must be an object with 'min' and/or 'max'")
+                for bound in bounds.values():
+                    if isinstance(bound, bool) or not isinstance(bound, (int, float)):
+                        raise ValueError(f"Bounds for '{column}' must be numbers")
+
+                values = self.columns[column]
+                if 'min' in bounds:
+                    mask &= values >= bounds['min']
+                if 'max' in bounds:
+                    mask &= values <= bounds['max']
+
+            if sectors:
+                codes = np.flatnonzero(np.isin(self.sector_names, list(sectors)))
+                mask &= np.isin(self.sector_codes, codes)
+
+            rows = np.flatnonzero(mask)
+            keys = self._ticker_rank[rows] if sort == 'ticker' else self.columns[sort][rows]
+            if descending:
+                keys = -keys
+
+            if top is not None and top < len(rows):
+                # Only rows up to the k-th key can make the cut; ties with it are settled below
+                kth = np.partition(keys, top - 1)[top - 1]
+                if not np.isnan(kth):
+                    candidates = np.flatnonzero(keys <= kth)
+                    rows, keys = rows[candidates], keys[candidates]
+            # Stable on row order, so ties keep universe order across pages
+            rows = rows[np.argsort(keys, kind='stable')][:top]
+
+            return len(rows), [self.row(i) for i in rows[offset:offset + limit]]
+
+    def row(self, i):
+        row = {
+            'ticker': self.tickers[i],
+            'name': self.names[i],
+            'sector': str(self.sector_names[self.sector_codes[i]])
+        }
+        for column, values in self.columns.items():
+            value = float(values[i])
+            row[column] = None if math.isnan(value) else value
+        row['days'] = int(row['days'])
+        return row
+
+    def sectors(self):
+        """{sector: rows} for the sectors present"""
+        counts = np.bincount(self.sector_codes, minlength=len(self.sector_names))
+        return {str(name): int(count) for name, count in zip(self.sector_names, counts)}
+
+
+class Screener:
+    """
+    One ScreenerTable per date range over every symbol in the TickerIndex
+    (sectors.json plus TICKER_MASTER_PATH).
+
+    Metrics come from the prefetch scheduler where it is warm, then from an
+    optional ColumnarStore, and only the rest are downloaded (in parallel
+    chunks through fetch_bulk) and computed with batch_metrics. A table is
+    rebuilt once it is older than `ttl` seconds; concurrent requests for a
+    table being built wait for that build, while other date ranges build
+    alongside it.
+    """
+
+    def __init__(self, data_fetcher, prefetcher=None, store=None, ttl=900, max_tables=8):
+        """
+        store: ColumnarStore with daily bars for (part of) the universe
+        ttl: seconds a table is served before it is rebuilt
+        max_tables: date ranges kept in memory
+        """
+        self.data_fetcher = data_fetcher
+        self.prefetcher = prefetcher
+        self.store = store
+        self.ttl = ttl
+        self.max_tables = max_tables
+        self._tables = {}
+        self._lock = threading.Lock()
+        self._builds = SingleFlight()
+
+    def universe(self):
+        """Every indexed ticker, in index order"""
+        return [entry['ticker'] for entry in self.data_fetcher.ticker_index.entries]
+
+    def table(self, period, start_date, end_date):
+        key = (start_date, end_date)
+        table = self._fresh(key)
+        record_cache('screener', table is not None)
+        if table is not None:
+            return table
+
+        return self._builds.do(key, self._build_once, key, period)
+
+    def _build_once(self, key, period):
+        # A build that finished just before this one started has already stored the table
+        table = self._fresh(key)
+        if table is None:
+            table = self._build(period, *key)
+            with self._lock:
+                self._tables[key] = table
+                while len(self._tables) > self.max_tables:
+                    oldest = min(self._tables, key=lambda k: self._tables[k].built_at)
+                    del self._tables[oldest]
+        return table
+
+    def _fresh(self, key):
+        with self._lock:
+            table = self._tables.get(key)
+        if table is not None and time.time() - table.built_at < self.ttl:
+            return table
+        return None
+
+    @timed('screener_build')
+    def _build(self, period, start_date, end_date):
+        tickers = self.universe()
+        metrics = {}
+
+        if self.prefetcher is not None:
+            _, metrics = self.prefetcher.get(period, start_date, end_date, tickers)
+        warm = len(metrics)
+
+        if self.store is not None:
+            stored = [t for t in tickers if t not in metrics and t in self.store]
+            metrics.update(
+                (m['ticker'], m) for m in MetricsCalculator.calculate_store_metrics(self.store, stored, start_date, end_date)
+            )
+        from_store = len(metrics) - warm
+
+        cold = [t for t in tickers if t not in metrics]
+        failures = {}
+        if cold:
+            stock_data, failures = self.data_fetcher.fetch_bulk(cold, start_date, end_date)
+            metrics.update(
+                (m['ticker'], m) for m in MetricsCalculator(stock_data).calculate_all_metrics_batch(cold)
+            )
+
+        logger.info(
+            "✓ Screener table %s → %s: %d of %d tickers (%d prefetched, %d from store, %d downloaded)",
+            start_date, end_date, len(metrics), len(tickers), warm, from_store, len(metrics) - warm - from_store
+        )
+        table = ScreenerTable.from_metrics(
+            [metrics[t] for t in tickers if t in metrics],
+            self.data_fetcher.ticker_index,
+            (start_date, end_date)
+        )
+        table.failures = failures
+        return table
@@ -0,0 +1,96 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_SHARED_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'shared.sqlite3')
+
+
+class SharedCache:
+    """
+    Key/value store with per-entry expiry in one SQLite file, so every
+    worker process of the production server reads what any worker computed.
+
+    Values are pickled; WAL mode lets readers run alongside a writer.
+    Expired rows are purged whenever new values are written.
+    """
+
+    def __init__(self, path=None, ttl=300):
+        self.path = path or os.getenv('SHARED_CACHE_PATH', DEFAULT_SHARED_CACHE_PATH)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        """A connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are present and fresh"""
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        found = {}
+        now = time.time()
+        with self._connect() as conn:
+            # Stay under SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM entries WHERE expires_at > ? AND key IN ({','.join('?' * len(chunk))})",
+                    [now, *chunk]
+                ).fetchall()
+                found.update((key, pickle.loads(value)) for key, value in rows)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items, ttl=None):
+        """Store {key: value} with a shared ttl (seconds)"""
+        if not items:
+            return
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        rows = [
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at)
+            for key, value in items.items()
+        ]
+        with self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', rows)
+            conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+
+    def stats(self):
+        """Hit/miss counters for this process plus the shared entry count"""
+        with self._connect() as conn:
+            size = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': size, 'path': self.path}
@@ -0,0 +1,125 @@
+import threading
+import time
+
+
+class _Batch:
+    def __init__(self):
+        self.tickers = []
+        self.result = {}
+        self.error = None
+        self.done = threading.Event()
+
+
+class DownloadCoalescer:
+    """
+    Process-wide single-flight layer in front of a batch downloader.
+
+    Concurrent requests for the same (ticker, start, end) wait on one
+    in-flight download and share its result. Requests for the same date
+    range that arrive within `window` seconds of each other are merged into
+    one batched download of the union of their tickers.
+    """
+
+    def __init__(self, download, window=0.01):
+        """
+        download: callable(tickers, start_date, end_date) -> {ticker: DataFrame}
+        window: seconds the first caller waits for others to join its batch
+        """
+        self.download = download
+        self.window = window
+        self._lock = threading.Lock()
+        self._open = {}
+        self._inflight = {}
+
+    def fetch(self, tickers, start_date, end_date):
+        """Return {ticker: DataFrame} for the tickers that could be downloaded"""
+        range_key = (start_date, end_date)
+        waits = []
+        leader = None
+
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                key = (ticker, start_date, end_date)
+                batch = self._inflight.get(key)
+                if batch is None:
+                    batch = self._open.get(range_key)
+                    if batch is None:
+                        batch = leader = _Batch()
+                        self._open[range_key] = batch
+                    batch.tickers.append(ticker)
+                    self._inflight[key] = batch
+                waits.append((ticker, batch))
+
+        if leader is not None:
+            self._run(leader, start_date, end_date)
+
+        stock_data = {}
+        for ticker, batch in waits:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            if ticker in batch.result:
+                stock_data[ticker] = batch.result[ticker]
+        return stock_data
+
+    def _run(self, batch, start_date, end_date):
+        if self.window:
+            time.sleep(self.window)
+
+        with self._lock:
+            # Close the batch: later callers start a new one or wait on this flight
+            if self._open.get((start_date, end_date)) is batch:
+                del self._open[(start_date, end_date)]
+            tickers = list(batch.tickers)
+
+        try:
+            batch.result = self.download(tickers, start_date, end_date)
+        except Exception as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                for ticker in tickers:
+                    self._inflight.pop((ticker, start_date, end_date), None)
+            batch.done.set()
+
+
+class _Call:
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution: the first caller
+    runs the function and the others wait for its result (or its exception).
+    Calls with different keys run independently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
@@ -0,0 +1,147 @@
+import csv
+import heapq
+import json
+from collections import defaultdict
+
+# Match ranks, lower is better
+EXACT_TICKER = 0
+TICKER_PREFIX = 1
+NAME_PREFIX = 2
+SUBSTRING = 3
+
+
+class TickerIndex:
+    """
+    In-memory lookup structure over the ticker universe, built once.
+
+    - by_ticker: ticker -> entry hash map for name/sector resolution
+    - prefix index over tickers and every word of the company name
+    - n-gram index (bigrams for 2-letter queries, trigrams otherwise) for
+      substring matches anywhere in the ticker or name; single letters
+      only match as prefixes since they would match almost everything
+    """
+
+    def __init__(self, max_prefix=8):
+        self.max_prefix = max_prefix
+        self.entries = []
+        self.by_ticker = {}
+        self._ids = {}
+        self._ticker_prefixes = defaultdict(set)
+        self._word_prefixes = defaultdict(set)
+        self._ngrams = {2: defaultdict(set), 3: defaultdict(set)}
+
+    @classmethod
+    def from_sectors(cls, sectors_data):
+        """Build from the sectors.json layout: {sector: [{'ticker', 'name'}, ...]}"""
+        index = cls()
+        for sector, companies in sectors_data.items():
+            for company in companies:
+                index.add(company['ticker'], company['name'], sector)
+        return index
+
+    def load_file(self, path):
+        """
+        Add symbols from a master file
+        CSV with ticker/symbol, name and sector columns, or JSON in sectors.json layout
+        """
+        if path.lower().endswith('.json'):
+            with open(path, 'r') as f:
+                for sector, companies in json.load(f).items():
+                    for company in companies:
+                        self.add(company['ticker'], company['name'], sector)
+            return
+
+        with open(path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+                ticker = row.get('ticker') or row.get('symbol')
+                if ticker:
+                    self.add(ticker, row.get('name') or ticker, row.get('sector') or 'Unknown')
+
+    def add(self, ticker, name, sector):
+        """Add one symbol; the first occurrence of a ticker wins"""
+        ticker = ticker.upper()
+        if ticker in self.by_ticker:
+            return
+
+        entry_id = len(self.entries)
+        entry = {'ticker': ticker, 'name': name, 'sector': sector}
+        self.entries.append(entry)
+        self.by_ticker[ticker] = entry
+        self._ids[ticker] = entry_id
+
+        for i in range(1, min(len(ticker), self.max_prefix) + 1):
+            self._ticker_prefixes[ticker[:i]].add(entry_id)
+
+        name_upper = name.upper()
+        for word in name_upper.split():
+            for i in range(1, min(len(word), self.max_prefix) + 1):
+                self._word_prefixes[word[:i]].add(entry_id)
+
+        for text in (ticker, name_upper):
+            for n, grams in self._ngrams.items():
+                for i in range(len(text) - n + 1):
+                    grams[text[i:i + n]].add(entry_id)
+
+    def get(self, ticker):
+        """Return the entry for a ticker, or None"""
+        return self.by_ticker.get(ticker.upper())
+
+    def search(self, query, limit=10):
+        """
+        Return up to limit entries ranked as exact ticker, ticker prefix,
+        name-word prefix, then substring match
+        """
+        query = query.strip().upper()
+        if not query:
+            return []
+
+        ranks = {}
+
+        def consider(entry_ids, rank, check):
+            for entry_id in entry_ids:
+                if ranks.get(entry_id, SUBSTRING + 1) > rank and check(self.entries[entry_id]):
+                    ranks[entry_id] = rank
+
+        key = query[:self.max_prefix]
+        consider(
+            self._ticker_prefixes.get(key, ()),
+            TICKER_PREFIX,
+            lambda e: e['ticker'].startswith(query)
+        )
+        consider(
+            self._word_prefixes.get(key, ()),
+            NAME_PREFIX,
+            lambda e: any(word.startswith(query) for word in e['name'].upper().split())
+        )
+
+        if len(query) >= 2:
+            n = min(len(query), 3)
+            grams = self._ngrams[n]
+            candidates = None
+            for i in range(len(query) - n + 1):
+                ids = grams.get(query[i:i + n])
+                if not ids:
+                    candidates = set()
+                    break
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            consider(
+                candidates or (),
+                SUBSTRING,
+                lambda e: query in e['ticker'] or query in e['name'].upper()
+            )
+
+        if query in self._ids:
+            ranks[self._ids[query]] = EXACT_TICKER
+
+        ranked = heapq.nsmallest(
+            limit,
+            ranks.items(),
+            key=lambda item: (item[1], len(self.entries[item[0]]['ticker']), self.entries[item[0]]['ticker'])
+        )
+        return [dict(self.entries[entry_id]) for entry_id, _ in ranked]
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_WATCHLIST_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'watchlists.sqlite3')
+
+
+class WatchlistStore:
+    """
+    Named watchlists with a memoized analysis per date range, in one SQLite file.
+
+    Every membership change bumps the watchlist's version and drops its
+    stored analyses. Each analysis also records the price data token it was
+    built from, so it is only served while the version and the token both
+    still match; renaming a watchlist keeps its analyses.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('WATCHLIST_DB_PATH', DEFAULT_WATCHLIST_PATH)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS watchlists (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1
+                );
+                CREATE TABLE IF NOT EXISTS watchlist_tickers (
+                    watchlist_id INTEGER NOT NULL REFERENCES watchlists(id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    ticker TEXT NOT NULL,
+                    PRIMARY KEY (watchlist_id, position)
+                );
+                CREATE TABLE IF NOT EXISTS analyses (
+                    watchlist_id INTEGER NOT NULL REFERENCES watchlists(id) ON DELETE CASCADE,
+                    key TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    data_token TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    blob BLOB NOT NULL,
+                    PRIMARY KEY (watchlist_id, key)
+                );
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        """A connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA foreign_keys=ON')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def list(self):
+        """Every watchlist with its tickers, by name"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT id, name, created, updated, version FROM watchlists ORDER BY name').fetchall()
+            members = conn.execute(
+                'SELECT watchlist_id, ticker FROM watchlist_tickers ORDER BY watchlist_id, position'
+            ).fetchall()
+
+        tickers = {}
+        for watchlist_id, ticker in members:
+            tickers.setdefault(watchlist_id, []).append(ticker)
+        return [_as_dict(row, tickers.get(row[0], [])) for row in rows]
+
+    def get(self, watchlist_id):
+        """The watchlist as a dict, or None"""
+        with self._connect() as conn:
+            return self._get(conn, watchlist_id)
+
+    def create(self, name, tickers):
+        """Raises ValueError if the name is taken"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    'INSERT INTO watchlists (name, created, updated) VALUES (?, ?, ?)', (name, now, now)
+                )
+                self._set_tickers(conn, cursor.lastrowid, tickers)
+                return self._get(conn, cursor.lastrowid)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"A watchlist named '{name}' already exists")
+
+    def update(self, watchlist_id, name=None, tickers=None):
+        """
+        Rename and/or replace the tickers; returns the watchlist, or None if it does not exist
+        A new ticker list (order included) bumps the version and drops the stored analyses
+        Raises ValueError if the new name is taken
+        """
+        try:
+            with self._connect() as conn:
+                current = self._get(conn, watchlist_id)
+                if current is None:
+                    return None
+
+                if name is not None and name != current['name']:
+                    conn.execute(
+                        'UPDATE watchlists SET name = ?, updated = ? WHERE id = ?', (name, time.time(), watchlist_id)
+                    )
+                if tickers is not None and list(tickers) != current['tickers']:
+                    conn.execute(
+                        'UPDATE watchlists SET version = version + 1, updated = ? WHERE id = ?',
+                        (time.time(), watchlist_id)
+                    )
+                    conn.execute('DELETE FROM watchlist_tickers WHERE watchlist_id = ?', (watchlist_id,))
+                    conn.execute('DELETE FROM analyses WHERE watchlist_id = ?', (watchlist_id,))
+                    self._set_tickers(conn, watchlist_id, tickers)
+                return self._get(conn, watchlist_id)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"A watchlist named '{name}' already exists")
+
+    def delete(self, watchlist_id):
+        """Returns whether the watchlist existed"""
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM watchlists WHERE id = ?', (watchlist_id,)).rowcount > 0
+
+    def get_analysis(self, watchlist_id, key, version, data_token):
+        """The stored analysis blob if it was built for this version and data token, else None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT blob FROM analyses WHERE watchlist_id = ? AND key = ? AND version = ? AND data_token = ?',
+                (watchlist_id, key, version, data_token)
+            ).fetchone()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else bytes(row[0])
+
+    def set_analysis(self, watchlist_id, key, version, data_token, blob):
+        """
+        Store an analysis blob, replacing any older one for the key
+        Nothing is stored if the membership changed while it was being computed
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO analyses (watchlist_id, key, version, data_token, created, blob) '
+                'SELECT id, ?, version, ?, ?, ? FROM watchlists WHERE id = ? AND version = ?',
+                (key, data_token, time.time(), sqlite3.Binary(blob), watchlist_id, version)
+            )
+
+    def stats(self):
+        with self._connect() as conn:
+            watchlists = conn.execute('SELECT COUNT(*) FROM watchlists').fetchone()[0]
+            analyses, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(blob)), 0) FROM analyses').fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'watchlists': watchlists,
+            'analyses': analyses,
+            'analysis_bytes': size,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0
+        }
+
+    def _get(self, conn, watchlist_id):
+        row = conn.execute(
+            'SELECT id, name, created, updated, version FROM watchlists WHERE id = ?', (watchlist_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        tickers = [t for (t,) in conn.execute(
+            'SELECT ticker FROM watchlist_tickers WHERE watchlist_id = ? ORDER BY position', (watchlist_id,)
+        )]
+        return _as_dict(row, tickers)
+
+    def _set_tickers(self, conn, watchlist_id, tickers):
+        conn.executemany(
+            'INSERT INTO watchlist_tickers (watchlist_id, position, ticker) VALUES (?, ?, ?)',
+            [(watchlist_id, position, ticker) for position, ticker in enumerate(tickers)]
+        )
+
+
+def _as_dict(row, tickers):
+    watchlist_id, name, created, updated, version = row
+    return {
+        'id': watchlist_id,
+        'name': name,
+        'tickers': tickers,
+        'created': created,
+        'updated': updated,
+        'version': version
+    }